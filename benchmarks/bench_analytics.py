@@ -0,0 +1,76 @@
+"""Compare the old full-CSV pandas analytics pass with the incremental aggregator.
+
+For each history size the script times pd.read_csv plus the regex extraction
+the analytics sheet used to run on every webhook, a cold aggregator rebuild,
+a snapshot restore, and the per-webhook catch-up of one new record.
+
+    python benchmarks/bench_analytics.py --sizes 10000 100000
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.chdir(tempfile.mkdtemp(prefix="bench_analytics_"))
+
+import main  # noqa: E402
+import pandas as pd  # noqa: E402
+
+main.logger.setLevel("WARNING")
+# The aggregator is compared against pandas reading the CSV store
+main.STORAGE_BACKEND = "csv"
+
+
+def write_history(rows: int):
+    sentiments = ["positive", "neutral", "negative"]
+    with open(main.CSV_FILE, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=main.DataManager().csv_fields)
+        writer.writeheader()
+        for i in range(1, rows + 1):
+            writer.writerow({
+                "id": i, "timestamp": f"2025-08-{i % 28 + 1:02d}T10:30:00",
+                "booking_intent": "yes" if i % 3 else "no", "counter_offer": str(1800 + i % 400),
+                "agreed_rate": str(1900 + i % 300), "negotiation_attempts": str(i % 5),
+                "sentiment": sentiments[i % 3], "call_outcome": "booked" if i % 3 else "declined",
+                "raw_payload": json.dumps({"call_id": i})
+            })
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def pandas_pass():
+    df = pd.read_csv(main.CSV_FILE)
+    len(df[df['booking_intent'] == 'yes'])
+    len(df[df['sentiment'] == 'positive'])
+    df['negotiation_attempts'].astype(str).str.extract(r'(\d+)').astype(float).mean()
+
+
+def bench(size: int):
+    write_history(size)
+    if os.path.exists(main.ANALYTICS_SNAPSHOT_FILE):
+        os.remove(main.ANALYTICS_SNAPSHOT_FILE)
+    manager = main.DataManager()
+    results = {"rows": size, "pandas_full_pass_ms": timed(pandas_pass)}
+    results["aggregator_cold_rebuild_ms"] = timed(manager.refresh_analytics)
+    manager.analytics.save_snapshot()
+    results["snapshot_restore_ms"] = timed(lambda: main.DataManager().refresh_analytics())
+    manager.save_record({"timestamp": "2025-08-03T10:30:00", "booking_intent": "yes", "negotiation_attempts": "2"})
+    results["aggregator_per_webhook_ms"] = timed(manager.refresh_analytics)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+    print(json.dumps([bench(size) for size in args.sizes], indent=2))
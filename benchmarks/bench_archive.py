@@ -0,0 +1,144 @@
+"""Compare daily-bookings queries on the columnar archive with full-history reads.
+
+Generates a year of synthetic calls in the CSV and SQLite stores, rolls them
+into the time-partitioned archive and compacts it, then times daily bookings
+for the last week and for the whole year three ways: pandas reading the
+whole CSV and grouping by timestamp date (the old generate_detailed_charts
+approach), a SQLite GROUP BY, and an archive scan that reads only the
+booking_intent column of the partitions in range.
+
+    python benchmarks/bench_archive.py --calls-per-day 1000
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.chdir(tempfile.mkdtemp(prefix="bench_archive_"))
+
+import main  # noqa: E402
+
+main.logger.setLevel("WARNING")
+
+SENTIMENTS = ["positive", "neutral", "negative"]
+OUTCOMES = ["booked", "declined", "no_match", "callback"]
+FIRST_DAY = date(2025, 1, 1)
+
+
+def synthetic_year(calls_per_day: int):
+    record_id = 0
+    for day in range(365):
+        stamp = (FIRST_DAY + timedelta(days=day)).isoformat()
+        for i in range(calls_per_day):
+            record_id += 1
+            yield {
+                "id": record_id, "timestamp": f"{stamp}T{i * 86400 // calls_per_day // 3600:02d}:00:00",
+                "booking_intent": "yes" if record_id % 3 else "no", "counter_offer": str(1800 + record_id % 400),
+                "agreed_rate": str(1900 + record_id % 300), "negotiation_attempts": str(record_id % 5),
+                "sentiment": SENTIMENTS[record_id % 3], "call_outcome": OUTCOMES[record_id % 4],
+                "raw_payload": json.dumps({"call_id": f"call-{record_id}"})
+            }
+
+
+def load_stores(calls_per_day: int):
+    csv_store = main.CSVStore("year.csv")
+    sqlite_store = main.SQLiteStore("year.db")
+    sqlite_store.open()
+    conn = sqlite_store.connection()
+    placeholders = ", ".join("?" for _ in main.STORED_FIELDS)
+    conn.execute("BEGIN")
+    with open(csv_store.path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=main.STORED_FIELDS)
+        writer.writeheader()
+        for record in synthetic_year(calls_per_day):
+            record.update(main.parse_numeric_fields(record))
+            writer.writerow(record)
+            conn.execute(f"INSERT INTO records VALUES ({placeholders})", [record[f] for f in main.STORED_FIELDS])
+    conn.execute("COMMIT")
+    return csv_store, sqlite_store
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return round((time.perf_counter() - start) * 1000, 1), result
+
+
+def pandas_daily_bookings(path: str, start: str, end: str):
+    import pandas as pd
+
+    df = pd.read_csv(path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    booked = df[(df['booking_intent'] == 'yes') & (df['timestamp'] >= start) & (df['timestamp'] < end)]
+    counts = booked.groupby(booked['timestamp'].dt.date).size()
+    return {str(day): int(n) for day, n in counts.items()}
+
+
+def sqlite_daily_bookings(store, start: str, end: str):
+    rows = store.connection().execute(
+        "SELECT substr(timestamp, 1, 10) AS day, COUNT(*) FROM records "
+        "WHERE booking_intent = 'yes' AND timestamp >= ? AND timestamp < ? GROUP BY day", (start, end)
+    )
+    return {row[0]: row[1] for row in rows}
+
+
+def archive_daily_bookings(archive, start: str, end: str):
+    counts = Counter()
+    for day, columns in archive.scan(["booking_intent"], start, end):
+        counts[day] += columns["booking_intent"].count("yes")
+    return dict(counts)
+
+
+def archive_bytes(root: str) -> int:
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files)
+
+
+def bench(calls_per_day: int):
+    csv_store, sqlite_store = load_stores(calls_per_day)
+    archive = main.RecordArchive(root="year_archive", source=sqlite_store.describe())
+    roll_ms, rows = timed(archive.roll, sqlite_store.read_new_records)
+    # Roll the same year again in small batches so compaction has work to do
+    segmented = main.RecordArchive(root="segmented_archive", source="segmented")
+    cursor = 0
+    while True:
+        records, _ = sqlite_store.read_new_records(cursor)
+        batch = records[:50000]
+        if not batch:
+            break
+        segmented.roll(lambda _cursor, batch=batch: (batch, batch[-1]["id"]))
+        cursor = batch[-1]["id"]
+    compact_ms, compacted = timed(segmented.compact)
+
+    last_week = ((FIRST_DAY + timedelta(days=358)).isoformat(), (FIRST_DAY + timedelta(days=365)).isoformat())
+    whole_year = (FIRST_DAY.isoformat(), (FIRST_DAY + timedelta(days=365)).isoformat())
+    results = {
+        "rows": rows, "csv_bytes": os.path.getsize(csv_store.path), "archive_bytes": archive_bytes("year_archive"),
+        "archive_roll_ms": roll_ms, "archive_compact_ms": compact_ms, "partitions_compacted": compacted
+    }
+    for label, (start, end) in (("last_week", last_week), ("whole_year", whole_year)):
+        archive_ms, expected = timed(archive_daily_bookings, archive, start, end)
+        sqlite_ms, from_sqlite = timed(sqlite_daily_bookings, sqlite_store, start, end)
+        assert from_sqlite == expected
+        results[label] = {"archive_ms": archive_ms, "sqlite_ms": sqlite_ms}
+        try:
+            pandas_ms, from_pandas = timed(pandas_daily_bookings, csv_store.path, start, end)
+            assert from_pandas == expected
+            results[label]["pandas_full_csv_ms"] = pandas_ms
+        except ImportError:
+            pass
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls-per-day", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(bench(args.calls_per_day), indent=2))
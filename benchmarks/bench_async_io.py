@@ -0,0 +1,134 @@
+"""Check that /search latency stays flat while webhooks are being ingested.
+
+Starts the API under uvicorn in a child process (one worker, like the fly
+machine) and samples /search latency on its own, while webhooks arrive at a
+paced rate, and while as many concurrent webhooks as the CPU allows are
+posted. Without Google credentials the Sheets flush jobs fail and back off,
+which still exercises the Sheets pool.
+
+    python benchmarks/bench_async_io.py --webhooks 1000 --concurrency 16 --rate 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_KEY = "supersecretapikey123"
+HEADERS = {"X-API-Key": API_KEY}
+
+
+def webhook_payload(i: int):
+    return {
+        "booking_intent": "yes" if i % 3 else "no", "counter_offer": str(1800 + i % 400),
+        "agreed_rate": str(1900 + i % 300), "negotiation_attempts": str(i % 5),
+        "sentiment": "positive", "call_outcome": "booked", "call_id": f"call-{i}"
+    }
+
+
+def percentiles(samples):
+    ordered = sorted(samples)
+    return {
+        "requests": len(ordered),
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2)
+    }
+
+
+async def sample_search(client: httpx.AsyncClient, stop: asyncio.Event, interval: float):
+    samples = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.get("/search", params={"origin": "chicago"}, headers=HEADERS)
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+        await asyncio.sleep(interval)
+    return samples
+
+
+async def post_webhooks(client: httpx.AsyncClient, count: int, concurrency: int, rate: float):
+    counter = iter(range(count))
+    start = time.perf_counter()
+
+    async def worker():
+        for i in counter:
+            if rate:
+                # Pace the senders so the whole stream arrives at the target rate
+                await asyncio.sleep(max(0.0, start + i / rate - time.perf_counter()))
+            response = await client.post("/webhook", json=webhook_payload(i))
+            assert response.status_code == 200, response.text
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return count / (time.perf_counter() - start)
+
+
+async def scenario(client: httpx.AsyncClient, webhooks: int, concurrency: int, rate: float, idle_seconds: float):
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_search(client, stop, 0.005))
+    if webhooks:
+        achieved = await post_webhooks(client, webhooks, concurrency, rate)
+    else:
+        await asyncio.sleep(idle_seconds)
+        achieved = 0.0
+    stop.set()
+    result = percentiles(await sampler)
+    result["webhooks_per_second"] = round(achieved)
+    return result
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=tempfile.mkdtemp(prefix="bench_async_io_"), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+async def bench(webhooks: int, concurrency: int, rate: float):
+    port = free_port()
+    server = start_server(port)
+    results = {"webhooks": webhooks, "concurrency": concurrency, "target_rate": rate}
+    try:
+        limits = httpx.Limits(max_connections=concurrency + 1)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            results["search_idle"] = await scenario(client, 0, concurrency, rate, 2.0)
+            results["search_during_ingest"] = await scenario(client, webhooks, concurrency, rate, 0)
+            results["search_during_saturated_ingest"] = await scenario(client, webhooks, concurrency, 0, 0)
+    finally:
+        server.terminate()
+        server.wait()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--webhooks", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=50.0, help="Paced webhooks per second")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(bench(args.webhooks, args.concurrency, args.rate)), indent=2))
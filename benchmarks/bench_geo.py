@@ -0,0 +1,77 @@
+"""Latency of geo-radius and lane-proximity queries on the LoadIndex.
+
+Loads are spread over every city in the bundled gazetteer; no network access
+is needed.
+
+    python benchmarks/bench_geo.py --loads 100000
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.chdir(tempfile.mkdtemp(prefix="bench_geo_"))
+
+import main  # noqa: E402
+
+
+def gazetteer_places():
+    with open(main.GAZETTEER_FILE, newline='', encoding='utf-8') as f:
+        return [f"{row['city']}, {row['state']}" for row in csv.DictReader(f)]
+
+
+def synthetic_loads(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    places = gazetteer_places()
+    return [{
+        "load_id": str(200000 + i), "origin": origin, "destination": destination,
+        "pickup_datetime": f"2025-08-{rng.randint(1, 28):02d}T08:00:00",
+        "delivery_datetime": "2025-09-01T17:00:00", "equipment_type": "Dry Van",
+        "loadboard_rate": rng.randint(600, 4000), "notes": "", "weight": 30000,
+        "commodity_type": "General", "num_of_pieces": 10, "miles": rng.randint(50, 2500),
+        "dimensions": "48x102"
+    } for i, (origin, destination) in enumerate(rng.sample(places, 2) for _ in range(count))]
+
+
+QUERIES = {
+    "near_chicago_150mi": {"pickup_point": main.gazetteer.geocode("Chicago, IL"), "pickup_radius": 150, "limit": 20},
+    "near_dallas_150mi_heading_south": {"pickup_point": main.gazetteer.geocode("Dallas, TX"), "pickup_radius": 150,
+                                        "heading": "south", "limit": 20},
+    "atlanta_to_ohio_lane": {"pickup_point": main.gazetteer.geocode("30303"), "pickup_radius": 100,
+                             "drop_point": main.gazetteer.geocode("Columbus, OH"), "drop_radius": 150, "limit": 20},
+}
+
+
+def run(count: int, repeat: int):
+    loads = synthetic_loads(count)
+    start = time.perf_counter()
+    index = main.LoadIndex(loads)
+    results = {"loads": count, "index_build_ms": round((time.perf_counter() - start) * 1000, 1), "queries": {}}
+    for name, params in QUERIES.items():
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            matches = index.search(**params)
+            samples.append((time.perf_counter() - start) * 1e6)
+        samples.sort()
+        results["queries"][name] = {
+            "results": len(matches), "p50_us": round(statistics.median(samples), 1),
+            "p99_us": round(samples[int(len(samples) * 0.99) - 1], 1)
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--loads", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+    print(json.dumps(run(args.loads, args.repeat), indent=2))
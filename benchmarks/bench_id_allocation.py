@@ -0,0 +1,88 @@
+"""Measure CSV store insert cost as the file grows and check id uniqueness across processes.
+
+    python benchmarks/bench_id_allocation.py --sizes 1000 10000 100000 --workers 4
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.chdir(tempfile.mkdtemp(prefix="bench_ids_"))
+
+import main  # noqa: E402
+
+main.logger.setLevel("WARNING")
+
+RECORD = {
+    "timestamp": "2025-08-03T10:30:00", "booking_intent": "yes", "counter_offer": "2000",
+    "agreed_rate": "2100", "negotiation_attempts": "2", "sentiment": "positive",
+    "call_outcome": "booked", "raw_payload": json.dumps({"call_id": "abc"})
+}
+
+
+def prefill(path: str, rows: int):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=main.RECORD_FIELDS)
+        writer.writeheader()
+        for i in range(1, rows + 1):
+            writer.writerow(dict(RECORD, id=i))
+
+
+def bench_inserts(size: int, inserts: int = 200):
+    prefill(main.CSV_FILE, size)
+    for suffix in (".seq", ".seq.lock"):
+        if os.path.exists(main.CSV_FILE + suffix):
+            os.remove(main.CSV_FILE + suffix)
+    store = main.CSVStore(main.CSV_FILE)
+    start = time.perf_counter()
+    store.open()
+    seed_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(inserts):
+        store.append(dict(RECORD))
+    per_insert = (time.perf_counter() - start) / inserts
+    return {"rows": size, "seed_ms": seed_seconds * 1000, "insert_us": per_insert * 1e6}
+
+
+def _worker(count: int, queue):
+    store = main.CSVStore(main.CSV_FILE)
+    queue.put([store.append(dict(RECORD))['id'] for _ in range(count)])
+
+
+def check_multi_process(workers: int, per_worker: int = 500):
+    prefill(main.CSV_FILE, 0)
+    for suffix in (".seq", ".seq.lock"):
+        if os.path.exists(main.CSV_FILE + suffix):
+            os.remove(main.CSV_FILE + suffix)
+    queue = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=_worker, args=(per_worker, queue)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    ids = [i for _ in procs for i in queue.get()]
+    for p in procs:
+        p.join()
+    with open(main.CSV_FILE, newline='', encoding='utf-8') as f:
+        file_ids = [int(r['id']) for r in csv.DictReader(f)]
+    return {
+        "workers": workers, "allocated": len(ids), "unique": len(set(ids)),
+        "rows_in_file": len(file_ids), "file_in_id_order": file_ids == sorted(file_ids)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    results = {
+        "inserts": [bench_inserts(size) for size in args.sizes],
+        "multi_process": check_multi_process(args.workers)
+    }
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,209 @@
+"""Stress the multi-worker write path and check that no record or id is lost or duplicated.
+
+Starts the API under uvicorn with several worker processes for each storage
+backend and posts webhooks from many concurrent clients. Most payloads carry
+a call_id, and some of those are sent again while the first delivery may
+still be in flight. The rest carry no key at all. Halfway through, one
+worker is killed with SIGKILL; uvicorn replaces it, and a final restart lets
+the ingest log recovery run. The script then reads the store directly and
+checks that:
+
+- ids are unique
+- every acknowledged record is stored under the id it was given
+- no call_id or keyless payload is stored twice
+
+It also reports throughput and group sizes. Pass --group-sizes 1 to see the
+cost of one fsync and one store transaction per webhook.
+
+    python benchmarks/bench_ingest_log.py --webhooks 5000 --workers 4 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.chdir(tempfile.mkdtemp(prefix="bench_ingest_log_"))
+
+import main  # noqa: E402
+
+main.logger.setLevel("WARNING")
+main.logging.getLogger("httpx").setLevel("WARNING")
+
+API_KEY = "supersecretapikey123"
+HEADERS = {"X-API-Key": API_KEY}
+
+
+def webhook_payloads(count: int, keyed_share: float, retry_share: float, seed: int = 21):
+    """Payloads in send order; retries repeat an earlier keyed payload a little later"""
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(count):
+        payload = {"booking_intent": "yes" if i % 3 else "no", "agreed_rate": str(1900 + i % 300),
+                   "sentiment": "positive", "call_outcome": "booked", "nonce": f"n-{i}"}
+        if rng.random() < keyed_share:
+            payload["call_id"] = f"call-{i}"
+        payloads.append(payload)
+        if "call_id" in payload and rng.random() < retry_share:
+            payloads.insert(rng.randint(max(0, len(payloads) - 20), len(payloads)), dict(payload))
+    return payloads
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workdir: str, backend: str, workers: int, group_size: int) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=ROOT, STORAGE_BACKEND=backend, INGEST_GROUP_MAX_RECORDS=str(group_size))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+def stop_server(server: subprocess.Popen):
+    server.send_signal(signal.SIGTERM)
+    server.wait(timeout=120)
+
+
+def worker_pids(server: subprocess.Popen):
+    """uvicorn's worker processes, leaving out multiprocessing's resource tracker"""
+    result = subprocess.run(["pgrep", "-P", str(server.pid), "-f", "spawn_main"], capture_output=True, text=True)
+    return [int(pid) for pid in result.stdout.split()]
+
+
+async def post_all(base_url: str, payloads, concurrency: int, kill_at: int, server: subprocess.Popen):
+    """Post every payload; returns (payload, response json) for each acknowledged delivery"""
+    acks, failures = [], Counter()
+    position = iter(range(len(payloads)))
+    killed = []
+
+    async def client_loop(client: httpx.AsyncClient):
+        for i in position:
+            if i == kill_at and not killed:
+                pids = worker_pids(server)
+                if pids:
+                    os.kill(pids[0], signal.SIGKILL)
+                    killed.append(pids[0])
+            try:
+                response = await client.post("/webhook", json=payloads[i])
+            except httpx.HTTPError as e:
+                failures[type(e).__name__] += 1
+                continue
+            if response.status_code == 200:
+                acks.append((payloads[i], response.json()))
+            else:
+                failures[str(response.status_code)] += 1
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+    return acks, failures, killed
+
+
+def read_store(workdir: str, backend: str):
+    if backend == "csv":
+        store = main.CSVStore(os.path.join(workdir, main.CSV_FILE))
+    else:
+        store = main.SQLiteStore(os.path.join(workdir, main.SQLITE_FILE))
+    return store.get_all_records()
+
+
+def verify(acks, records):
+    ids = [int(record["id"]) for record in records]
+    by_nonce = {}
+    nonce_counts, call_counts = Counter(), Counter()
+    for record in records:
+        payload = json.loads(record["raw_payload"])
+        nonce_counts[payload["nonce"]] += 1
+        if "call_id" in payload:
+            call_counts[payload["call_id"]] += 1
+        by_nonce[payload["nonce"]] = int(record["id"])
+    lost = [payload["nonce"] for payload, body in acks
+            if by_nonce.get(payload["nonce"]) != body["record_id"] and not body.get("duplicate")]
+    wrong_duplicate_ids = [payload["nonce"] for payload, body in acks
+                           if body.get("duplicate") and by_nonce.get(payload["nonce"]) != body["record_id"]]
+    return {
+        "stored": len(records),
+        "duplicate_ids": len(ids) - len(set(ids)),
+        "acknowledged_but_missing": len(lost),
+        "duplicate_answered_with_wrong_id": len(wrong_duplicate_ids),
+        "payloads_stored_twice": sum(1 for n in nonce_counts.values() if n > 1),
+        "call_ids_stored_twice": sum(1 for n in call_counts.values() if n > 1)
+    }
+
+
+def bench(backend: str, group_size: int, args):
+    payloads = webhook_payloads(args.webhooks, args.keyed_share, args.retry_share)
+    workdir = tempfile.mkdtemp(prefix=f"bench_ingest_log_{backend}_")
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    server = start_server(port, workdir, backend, args.workers, group_size)
+    try:
+        start = time.perf_counter()
+        kill_at = len(payloads) // 2 if args.kill_worker else -1
+        acks, failures, killed = asyncio.run(post_all(base_url, payloads, args.concurrency, kill_at, server))
+        seconds = time.perf_counter() - start
+        ingest = httpx.get(f"{base_url}/jobs/status", headers=HEADERS).json()["ingest"]
+    finally:
+        stop_server(server)
+    # Restart once so recovery picks up any log a killed worker left behind
+    server = start_server(port, workdir, backend, 1, group_size)
+    stop_server(server)
+
+    checks = verify(acks, read_store(workdir, backend))
+    return {
+        "sent": len(payloads),
+        "acknowledged": len(acks),
+        "failed": dict(failures),
+        "killed_worker": killed[0] if killed else None,
+        "seconds": round(seconds, 2),
+        "acknowledged_per_second": round(len(acks) / seconds),
+        "sample_worker_groups": {k: ingest[k] for k in ("groups", "records", "largest_group", "mean_group_size")},
+        "checks": checks,
+        "ok": all(checks[k] == 0 for k in checks if k != "stored")
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--webhooks", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--keyed-share", type=float, default=0.7, help="Fraction of payloads with a call_id")
+    parser.add_argument("--retry-share", type=float, default=0.1, help="Fraction of keyed payloads sent twice")
+    parser.add_argument("--group-sizes", type=int, nargs="+", default=[main.INGEST_GROUP_MAX_RECORDS])
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "csv"])
+    parser.add_argument("--no-kill", dest="kill_worker", action="store_false", help="Do not kill a worker mid-run")
+    args = parser.parse_args()
+
+    results = {"webhooks": args.webhooks, "workers": args.workers, "concurrency": args.concurrency}
+    for backend in args.backends:
+        for group_size in args.group_sizes:
+            results[f"{backend}_group_{group_size}"] = bench(backend, group_size, args)
+    print(json.dumps(results, indent=2))
+    if not all(result["ok"] for result in results.values() if isinstance(result, dict)):
+        sys.exit("Lost or duplicated records detected")
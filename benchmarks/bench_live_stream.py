@@ -0,0 +1,164 @@
+"""Fan out the /live stream to many subscribers while webhooks arrive.
+
+Starts the API under uvicorn and opens --subscribers concurrent SSE
+connections to /live. It posts --webhooks call payloads at a steady rate and
+records when each subscriber receives each "record" event. It reports:
+
+- delivery latency from sending a webhook to each subscriber seeing it
+  (p50/p99)
+- how many subscribers received every record
+- how many were dropped for falling behind
+- the server's CPU time per webhook, read from /proc
+
+It also checks that the stats frames agree with what was posted.
+
+    python benchmarks/bench_live_stream.py --subscribers 300 --webhooks 500 --rate 50
+"""
+import argparse
+import asyncio
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.chdir(tempfile.mkdtemp(prefix="bench_live_stream_"))
+
+import main  # noqa: E402
+
+main.logger.setLevel("WARNING")
+main.logging.getLogger("httpx").setLevel("WARNING")
+
+API_KEY = "supersecretapikey123"
+HEADERS = {"X-API-Key": API_KEY}
+SENTIMENTS = ["positive", "neutral", "negative"]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=ROOT, STORAGE_BACKEND="sqlite")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+def cpu_seconds(pid: int) -> float:
+    """User plus system CPU time of a process, from /proc"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def percentile(values, q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+
+async def subscriber(client: httpx.AsyncClient, arrivals: dict, stats: list, ready: asyncio.Event, ended: list):
+    async with client.stream("GET", "/live", headers=HEADERS) as response:
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: "):
+                if event == "record":
+                    arrivals.setdefault(json.loads(line[6:])["id"], []).append(time.perf_counter())
+                elif event == "stats":
+                    stats.append(json.loads(line[6:]))
+                    ready.set()
+    ended.append(True)
+
+
+async def run(base_url: str, args):
+    arrivals, sent = {}, {}
+    stats, ended = [], []
+    limits = httpx.Limits(max_connections=args.subscribers + 20)
+    async with httpx.AsyncClient(base_url=base_url, timeout=None, limits=limits) as client:
+        readies = [asyncio.Event() for _ in range(args.subscribers)]
+        tasks = [asyncio.create_task(subscriber(client, arrivals, stats, ready, ended)) for ready in readies]
+        await asyncio.wait_for(asyncio.gather(*(ready.wait() for ready in readies)), 60)
+
+        async def post(i: int):
+            payload = {"booking_intent": "yes" if i % 3 else "no", "agreed_rate": str(1900 + i % 300),
+                       "sentiment": SENTIMENTS[i % 3], "call_outcome": "booked"}
+            start = time.perf_counter()
+            response = await client.post("/webhook", json=payload)
+            sent[response.json()["record_id"]] = start
+
+        posts = []
+        for i in range(args.webhooks):
+            posts.append(asyncio.create_task(post(i)))
+            await asyncio.sleep(1 / args.rate)
+        await asyncio.gather(*posts)
+        await asyncio.sleep(args.drain_seconds)
+        status = (await client.get("/jobs/status", headers=HEADERS)).json()["live"]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    return sent, arrivals, stats, status, len(ended)
+
+
+def bench(args):
+    port = free_port()
+    server = start_server(port)
+    try:
+        cpu_before = cpu_seconds(server.pid)
+        start = time.perf_counter()
+        sent, arrivals, stats, status, ended = asyncio.run(run(f"http://127.0.0.1:{port}", args))
+        seconds = time.perf_counter() - start
+        cpu_used = cpu_seconds(server.pid) - cpu_before
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    latencies = [(arrival - sent[record_id]) * 1000
+                 for record_id, times in arrivals.items() if record_id in sent for arrival in times]
+    complete = sum(1 for record_id in sent if len(arrivals.get(record_id, [])) == args.subscribers)
+    last_stats = stats[-1]["5m"] if stats else {}
+    return {
+        "subscribers": args.subscribers,
+        "webhooks": len(sent),
+        "seconds": round(seconds, 2),
+        "records_delivered_to_every_subscriber": complete,
+        "deliveries": len(latencies),
+        "delivery_ms": {"p50": round(percentile(latencies, 0.5), 2), "p99": round(percentile(latencies, 0.99), 2)},
+        "subscribers_dropped": status["subscribers_dropped"],
+        "streams_ended_by_server": ended,
+        "server_cpu_ms_per_webhook": round(cpu_used * 1000 / max(1, len(sent)), 2),
+        "last_stats_5m_calls": last_stats.get("calls"),
+        "ok": complete == len(sent) and status["subscribers_dropped"] == 0
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--subscribers", type=int, default=300)
+    parser.add_argument("--webhooks", type=int, default=500)
+    parser.add_argument("--rate", type=float, default=50.0, help="Webhooks posted per second")
+    parser.add_argument("--drain-seconds", type=float, default=6.0,
+                        help="Wait after the last webhook so deliveries and a stats frame arrive")
+    args = parser.parse_args()
+    print(json.dumps(bench(args), indent=2))
@@ -0,0 +1,94 @@
+"""Reload time and memory footprint of the LoadBook.
+
+Writes a synthetic load book to JSON (and optionally CSV/SQLite), then times a
+full reload (read, validate against Load, build the index and swap it in),
+an incremental upsert and reports the memory held by the live index.
+
+    python benchmarks/bench_load_book.py --loads 500000 --formats json csv db
+"""
+import argparse
+import csv
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.chdir(tempfile.mkdtemp(prefix="bench_load_book_"))
+
+import main  # noqa: E402
+
+main.logger.setLevel("WARNING")
+
+
+def gazetteer_places():
+    with open(main.GAZETTEER_FILE, newline='', encoding='utf-8') as f:
+        return [f"{row['city']}, {row['state']}" for row in csv.DictReader(f)]
+
+
+def synthetic_loads(count: int, seed: int = 5):
+    rng = random.Random(seed)
+    places = gazetteer_places()
+    equipment = ["Dry Van", "Reefer", "Flatbed", "Step Deck"]
+    loads = []
+    for i in range(count):
+        origin, destination = rng.sample(places, 2)
+        loads.append({
+            "load_id": str(300000 + i), "origin": origin, "destination": destination,
+            "pickup_datetime": f"2025-08-{rng.randint(1, 28):02d}T{rng.randint(0, 23):02d}:00:00",
+            "delivery_datetime": f"2025-09-{rng.randint(1, 28):02d}T17:00:00",
+            "equipment_type": rng.choice(equipment), "loadboard_rate": float(rng.randint(600, 4000)),
+            "notes": "", "weight": rng.randint(5000, 45000), "commodity_type": "General",
+            "num_of_pieces": rng.randint(1, 30), "miles": rng.randint(50, 2500), "dimensions": "48x102"
+        })
+    return loads
+
+
+def write_source(path: str, rows):
+    source = main.create_load_source(path)
+    book = {row["load_id"]: row for row in rows}
+    source.apply(book, rows, [])
+
+
+def bench(path: str, rows):
+    write_source(path, rows)
+    book = main.LoadBook(path)
+    start = time.perf_counter()
+    book.reload()
+    reload_seconds = time.perf_counter() - start
+
+    # Measure memory on a separate book; tracemalloc slows allocation down too much to time with it on
+    gc.collect()
+    tracemalloc.start()
+    measured = main.LoadBook(path)
+    measured.reload()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del measured
+
+    updates = [dict(row, loadboard_rate=row["loadboard_rate"] + 50) for row in rows[:1000]]
+    start = time.perf_counter()
+    book.apply(updates, expire=[row["load_id"] for row in rows[1000:1100]])
+    upsert_seconds = time.perf_counter() - start
+    return {
+        "source": os.path.splitext(path)[1][1:], "loads": len(rows),
+        "reload_seconds": round(reload_seconds, 2), "index_build_seconds": round(book.last_reload_seconds, 2),
+        "upsert_1000_expire_100_seconds": round(upsert_seconds, 2),
+        "resident_mb": round(current / 2 ** 20, 1), "peak_mb": round(peak / 2 ** 20, 1),
+        "bytes_per_load": round(current / len(rows))
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--loads", type=int, default=500000)
+    parser.add_argument("--formats", nargs="+", default=["json"], choices=["json", "csv", "db"])
+    args = parser.parse_args()
+    rows = synthetic_loads(args.loads)
+    print(json.dumps([bench(f"loads.{fmt}", rows) for fmt in args.formats], indent=2))
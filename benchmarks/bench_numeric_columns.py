@@ -0,0 +1,150 @@
+"""Compare analytics over typed numeric columns with regex over the raw strings.
+
+Loads a SQLite store with synthetic calls whose rates are sometimes written
+as "$2,100.50" or "about 1,900", then times the rate and attempt aggregates
+two ways: extracting the first run of digits from the text columns (the old
+str.extract(r'(\\d+)') pass, in pure Python and in pandas) and reading the
+typed *_value columns parsed at ingest into compact float arrays. It also
+counts how many rows the regex gets wrong.
+
+    python benchmarks/bench_numeric_columns.py --rows 1000000
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from array import array
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.chdir(tempfile.mkdtemp(prefix="bench_numeric_columns_"))
+
+import main  # noqa: E402
+
+main.logger.setLevel("WARNING")
+
+OLD_PATTERN = re.compile(r'(\d+)')
+RATE_COLUMNS = ["counter_offer", "agreed_rate", "negotiation_attempts"]
+
+
+def rate_text(i: int, base: int) -> str:
+    value = base + i % 400
+    if i % 20 == 0:
+        return f"${value:,}.50"
+    if i % 33 == 0:
+        return f"about {value:,} per load"
+    return str(value)
+
+
+def load_store(rows: int) -> "main.SQLiteStore":
+    store = main.SQLiteStore("bench.db")
+    store.open()
+    conn = store.connection()
+    placeholders = ", ".join("?" for _ in main.STORED_FIELDS)
+    batch = []
+    conn.execute("BEGIN")
+    for i in range(1, rows + 1):
+        record = {
+            "id": i, "timestamp": f"2025-08-{i % 28 + 1:02d}T10:30:00", "booking_intent": "yes",
+            "counter_offer": rate_text(i, 1800), "agreed_rate": rate_text(i, 1900),
+            "negotiation_attempts": str(i % 5), "sentiment": "positive", "call_outcome": "booked",
+            "raw_payload": "{}"
+        }
+        record.update(main.parse_numeric_fields(record))
+        batch.append([record[f] for f in main.STORED_FIELDS])
+        if len(batch) == 10000:
+            conn.executemany(f"INSERT INTO records VALUES ({placeholders})", batch)
+            batch = []
+    conn.executemany(f"INSERT INTO records VALUES ({placeholders})", batch)
+    conn.execute("COMMIT")
+    return store
+
+
+def first_digits(value):
+    match = OLD_PATTERN.search(value) if value else None
+    return float(match.group(1)) if match else None
+
+
+def regex_pass(store):
+    """Old pass: regex over each text column, summing what it finds"""
+    sums = {column: 0.0 for column in RATE_COLUMNS}
+    for row in store.connection().execute(f"SELECT {', '.join(RATE_COLUMNS)} FROM records"):
+        for column in RATE_COLUMNS:
+            value = first_digits(row[column])
+            if value is not None:
+                sums[column] += value
+    return sums
+
+
+def typed_pass(store):
+    """New pass: typed columns into float arrays, then plain sums"""
+    columns = [main.NUMERIC_FIELDS[column] for column in RATE_COLUMNS]
+    arrays = {column: array('d') for column in RATE_COLUMNS}
+    conn = store.connection()
+    conn.row_factory = None
+    for row in conn.execute(f"SELECT {', '.join(columns)} FROM records"):
+        for column, value in zip(RATE_COLUMNS, row):
+            if value is not None:
+                arrays[column].append(value)
+    conn.row_factory = main.sqlite3.Row
+    return {column: sum(values) for column, values in arrays.items()}
+
+
+def pandas_passes(store):
+    import pandas as pd
+
+    typed_columns = [main.NUMERIC_FIELDS[column] for column in RATE_COLUMNS]
+    df = pd.read_sql_query(f"SELECT {', '.join(RATE_COLUMNS + typed_columns)} FROM records", store.connection())
+    start = time.perf_counter()
+    for column in RATE_COLUMNS:
+        df[column].astype(str).str.extract(r'(\d+)')[0].astype(float).mean()
+    regex_ms = (time.perf_counter() - start) * 1000
+    start = time.perf_counter()
+    for column in typed_columns:
+        df[column].mean()
+    typed_ms = (time.perf_counter() - start) * 1000
+    return regex_ms, typed_ms
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return (time.perf_counter() - start) * 1000, result
+
+
+def bench(rows: int):
+    store = load_store(rows)
+    regex_ms, regex_sums = timed(regex_pass, store)
+    typed_ms, typed_sums = timed(typed_pass, store)
+    wrong = store.connection().execute(
+        "SELECT COUNT(*) FROM records WHERE counter_offer LIKE '%,%' OR agreed_rate LIKE '%,%'"
+    ).fetchone()[0]
+    results = {
+        "rows": rows,
+        "regex_pass_ms": round(regex_ms, 1),
+        "typed_pass_ms": round(typed_ms, 1),
+        "speedup": round(regex_ms / typed_ms, 1),
+        "rows_misparsed_by_regex": wrong,
+        "agreed_rate_sum_regex": regex_sums["agreed_rate"],
+        "agreed_rate_sum_typed": typed_sums["agreed_rate"]
+    }
+    try:
+        pandas_regex_ms, pandas_typed_ms = pandas_passes(store)
+        results["pandas_regex_pass_ms"] = round(pandas_regex_ms, 1)
+        results["pandas_typed_pass_ms"] = round(pandas_typed_ms, 1)
+    except ImportError:
+        pass
+    manager_ms, _ = timed(lambda: main.AnalyticsAggregator(source="bench").catch_up(store.read_new_records))
+    results["aggregator_cold_rebuild_ms"] = round(manager_ms, 1)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1000000)
+    args = parser.parse_args()
+    print(json.dumps(bench(args.rows), indent=2))
@@ -0,0 +1,116 @@
+"""Measure /rates latency against a seeded lane index.
+
+Starts the API under uvicorn in a child process, ingests synthetic calls
+across a few hundred lanes through /webhook/batch, lets the lane index catch
+up, then times sequential /rates lookups over HTTP. Pass --max-p99-ms to make
+it exit non-zero when the voice agent's latency budget is exceeded.
+
+    python benchmarks/bench_rates.py --calls 50000 --lanes 300 --max-p99-ms 10
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_KEY = "supersecretapikey123"
+HEADERS = {"X-API-Key": API_KEY}
+CITIES = ["Chicago, IL", "Dallas, TX", "Atlanta, GA", "Miami, FL", "Denver, CO", "Phoenix, AZ", "Seattle, WA",
+          "Memphis, TN", "Columbus, OH", "Newark, NJ", "Kansas City, MO", "Salt Lake City, UT", "Charlotte, NC",
+          "Nashville, TN", "Houston, TX", "Reno, NV", "Boise, ID", "Omaha, NE"]
+EQUIPMENT = ["Dry Van", "Reefer", "Flatbed"]
+
+
+def lanes(count: int):
+    pairs = [(o, d) for o in CITIES for d in CITIES if o != d]
+    random.Random(7).shuffle(pairs)
+    return [(o, d, EQUIPMENT[i % len(EQUIPMENT)]) for i, (o, d) in enumerate(pairs[:count])]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=tempfile.mkdtemp(prefix="bench_rates_"), env=dict(os.environ, PYTHONPATH=ROOT),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+def bench(calls: int, lane_count: int, lookups: int):
+    lane_list = lanes(lane_count)
+    rng = random.Random(11)
+    payloads = []
+    for i in range(calls):
+        origin, destination, equipment = lane_list[i % len(lane_list)]
+        payloads.append({
+            "origin": origin, "destination": destination, "equipment_type": equipment,
+            "agreed_rate": str(1500 + rng.randint(0, 800)), "negotiation_attempts": str(rng.randint(0, 4)),
+            "booking_intent": "yes" if rng.random() < 0.6 else "no", "call_outcome": "booked"
+        })
+    
+    port = free_port()
+    server = start_server(port)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", headers=HEADERS, timeout=120) as client:
+            assert client.post("/webhook/batch", json=payloads).status_code == 200
+            start = time.perf_counter()
+            client.get("/stats")
+            catch_up_seconds = time.perf_counter() - start
+            
+            samples = []
+            for i in range(lookups):
+                origin, destination, equipment = lane_list[i % len(lane_list)]
+                params = {"origin": origin, "destination": destination, "equipment_type": equipment}
+                start = time.perf_counter()
+                response = client.get("/rates", params=params)
+                samples.append(time.perf_counter() - start)
+                assert response.status_code == 200, response.text
+    finally:
+        server.terminate()
+        server.wait()
+    
+    ordered = sorted(samples)
+    return {
+        "calls": calls,
+        "lanes": lane_count,
+        "index_catch_up_seconds": round(catch_up_seconds, 3),
+        "lookups": lookups,
+        "p50_ms": round(statistics.median(ordered) * 1000, 2),
+        "p99_ms": round(ordered[int(len(ordered) * 0.99)] * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=50000)
+    parser.add_argument("--lanes", type=int, default=300)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--max-p99-ms", type=float, default=None)
+    args = parser.parse_args()
+    results = bench(args.calls, args.lanes, args.lookups)
+    print(json.dumps(results, indent=2))
+    if args.max_p99_ms is not None and results["p99_ms"] > args.max_p99_ms:
+        sys.exit(f"/rates p99 {results['p99_ms']}ms exceeds {args.max_p99_ms}ms")
@@ -0,0 +1,144 @@
+"""Compare the memory held by bulk record reads: a dict per row versus compact records.
+
+Fills the SQLite and CSV stores with synthetic calls carrying a realistic
+raw_payload, then reads the whole history back two ways and measures with
+tracemalloc how many bytes each record keeps alive:
+
+- the old dict-per-row read (csv.DictReader rows, or dict(sqlite3.Row)),
+  with every field a separate string and raw_payload held in full
+- get_all_records, which now returns slotted CompactRecords with interned
+  categorical values and raw_payload left on disk
+
+It also times both reads, a read that includes raw_payload up front, and
+fetching raw_payload lazily for a sample of records.
+
+    python benchmarks/bench_record_memory.py --rows 200000
+"""
+import argparse
+import csv
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.chdir(tempfile.mkdtemp(prefix="bench_record_memory_"))
+
+import main  # noqa: E402
+
+main.logger.setLevel("WARNING")
+
+SENTIMENTS = ["positive", "neutral", "negative"]
+OUTCOMES = ["booked", "declined", "no_match", "callback"]
+CITIES = ["Chicago, IL", "Dallas, TX", "Atlanta, GA", "Denver, CO", "Newark, NJ"]
+
+
+def synthetic_calls(rows: int):
+    for i in range(1, rows + 1):
+        payload = {
+            "call_id": f"call-{i}", "load_id": f"L{i % 5000:05d}", "origin": CITIES[i % 5],
+            "destination": CITIES[(i + 2) % 5], "equipment_type": "Dry Van", "carrier_mc": f"MC{100000 + i}",
+            "transcript_summary": "Carrier asked about detention and agreed after one counter offer."
+        }
+        record = {
+            "id": i, "timestamp": f"2025-08-{i % 28 + 1:02d}T{i % 24:02d}:15:00",
+            "booking_intent": "yes" if i % 3 else "no", "counter_offer": str(1800 + i % 400),
+            "agreed_rate": str(1900 + i % 300), "negotiation_attempts": str(i % 5),
+            "sentiment": SENTIMENTS[i % 3], "call_outcome": OUTCOMES[i % 4], "raw_payload": json.dumps(payload)
+        }
+        record.update(main.parse_numeric_fields(record))
+        yield record
+
+
+def load_stores(rows: int):
+    csv_store = main.CSVStore("calls.csv")
+    sqlite_store = main.SQLiteStore("calls.db")
+    sqlite_store.open()
+    conn = sqlite_store.connection()
+    placeholders = ", ".join("?" for _ in main.STORED_FIELDS)
+    conn.execute("BEGIN")
+    with open(csv_store.path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=main.STORED_FIELDS)
+        writer.writeheader()
+        for record in synthetic_calls(rows):
+            writer.writerow(record)
+            conn.execute(f"INSERT INTO records VALUES ({placeholders})", [record[f] for f in main.STORED_FIELDS])
+    conn.execute("COMMIT")
+    return {"sqlite": sqlite_store, "csv": csv_store}
+
+
+def dict_rows(store):
+    """Old read: one dict of field strings per row, raw_payload included"""
+    if isinstance(store, main.CSVStore):
+        with open(store.path, 'r', newline='', encoding='utf-8') as f:
+            return list(store._read_rows(f))
+    return [store._record(row) for row in store.connection().execute("SELECT * FROM records ORDER BY id")]
+
+
+def retained_bytes(read):
+    """Bytes still allocated once read() has returned, and the peak while it ran"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    records = read()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return records, current - before, peak - before
+
+
+def timed(read):
+    gc.collect()
+    start = time.perf_counter()
+    records = read()
+    return round((time.perf_counter() - start) * 1000, 1), records
+
+
+def bench(store, rows: int, samples: int):
+    results = {}
+    variants = {
+        "dict_per_row": lambda: dict_rows(store),
+        "compact": store.get_all_records,
+        "compact_with_payload": lambda: store.get_all_records(with_payload=True)
+    }
+    for label, read in variants.items():
+        records, held, peak = retained_bytes(read)
+        assert len(records) == rows
+        del records
+        read_ms, records = timed(read)
+        results[label] = {
+            "bytes_per_record": round(held / rows), "peak_bytes_per_record": round(peak / rows),
+            "read_ms": read_ms
+        }
+        if label == "compact":
+            sentiments = {id(record["sentiment"]) for record in records}
+            results[label]["distinct_sentiment_objects"] = len(sentiments)
+            picks = random.Random(7).sample(records, min(samples, rows))
+            start = time.perf_counter()
+            assert all(json.loads(record["raw_payload"])["call_id"] for record in picks)
+            results[label]["lazy_payload_us"] = round((time.perf_counter() - start) * 1e6 / len(picks), 1)
+        del records
+    results["memory_ratio"] = round(
+        results["dict_per_row"]["bytes_per_record"] / results["compact"]["bytes_per_record"], 1
+    )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--payload-samples", type=int, default=1000,
+                        help="Records whose raw_payload is fetched lazily")
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "csv"])
+    args = parser.parse_args()
+
+    stores = load_stores(args.rows)
+    results = {"rows": args.rows}
+    for backend in args.backends:
+        results[backend] = bench(stores[backend], args.rows, args.payload_samples)
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,137 @@
+"""Compare /search, /stats and /dashboard latency with the response cache on and off.
+
+Starts the API under uvicorn in a child process with a synthetic load book
+and call history, once with RESPONSE_CACHE_SIZE=0 and once with the default
+cache, and times a mix of repeated queries like the ones the dashboard and
+the voice agent send. Also reports the first /stats after a new webhook,
+which must miss because the store version changed.
+
+    python benchmarks/bench_response_cache.py --loads 50000 --records 50000
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_KEY = "supersecretapikey123"
+HEADERS = {"X-API-Key": API_KEY}
+
+CITIES = [
+    "Chicago, IL", "Dallas, TX", "Queens, NY", "Orlando, FL", "Atlanta, GA", "Denver, CO",
+    "Phoenix, AZ", "Memphis, TN", "Columbus, OH", "Seattle, WA", "Reno, NV", "Omaha, NE"
+]
+EQUIPMENT = ["Dry Van", "Reefer", "Flatbed"]
+QUERIES = [
+    "/search?origin=chicago&sort_by=loadboard_rate&order=desc&limit=50",
+    "/search?origin_state=TX&equipment_type=Reefer&limit=50",
+    "/search?pickup_near=Chicago, IL&pickup_radius=150&limit=50",
+    "/stats",
+    "/stats?start=2025-08-01&end=2025-08-08",
+    "/dashboard?limit=100&call_outcome=booked"
+]
+
+
+def synthetic_loads(count: int, seed: int = 3):
+    rng = random.Random(seed)
+    loads = []
+    for i in range(count):
+        origin, destination = rng.sample(CITIES, 2)
+        day = rng.randint(1, 28)
+        loads.append({
+            "load_id": str(100000 + i), "origin": origin, "destination": destination,
+            "pickup_datetime": f"2025-08-{day:02d}T08:00:00", "delivery_datetime": f"2025-09-{day:02d}T08:00:00",
+            "equipment_type": rng.choice(EQUIPMENT), "loadboard_rate": rng.randint(600, 4000),
+            "notes": "", "weight": rng.randint(5000, 45000), "commodity_type": "General",
+            "num_of_pieces": rng.randint(1, 30), "miles": rng.randint(50, 2500), "dimensions": "48x102"
+        })
+    return loads
+
+
+def webhook_payload(i: int):
+    return {
+        "booking_intent": "yes" if i % 3 else "no", "agreed_rate": str(1900 + i % 300),
+        "negotiation_attempts": str(i % 5), "sentiment": "positive",
+        "call_outcome": "booked" if i % 2 else "declined", "call_id": f"bench-{i}"
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workdir: str, cache_size: int) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=ROOT, RESPONSE_CACHE_SIZE=str(cache_size))
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+def latency_ms(client: httpx.Client, path: str, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get(path)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, response.text
+    samples.sort()
+    return {"p50_ms": round(statistics.median(samples), 2), "p99_ms": round(samples[int(len(samples) * 0.99) - 1], 2)}
+
+
+def bench_mode(loads: int, records: int, repeat: int, cache_size: int):
+    workdir = tempfile.mkdtemp(prefix="bench_response_cache_")
+    with open(os.path.join(workdir, "loads.json"), "w") as f:
+        json.dump(synthetic_loads(loads), f)
+    port = free_port()
+    server = start_server(port, workdir, cache_size)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", headers=HEADERS, timeout=600) as client:
+            response = client.post("/webhook/batch", json=[webhook_payload(i) for i in range(records)])
+            assert response.status_code == 200, response.text
+            for path in QUERIES:
+                client.get(path)  # Warm the analytics and archive before timing
+            results = {path: latency_ms(client, path, repeat) for path in QUERIES}
+            client.post("/webhook", json=webhook_payload(records))
+            start = time.perf_counter()
+            client.get("/stats")
+            results["first_stats_after_write_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            results["cache"] = client.get("/jobs/status").json()["response_cache"]
+    finally:
+        server.terminate()
+        server.wait()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--loads", type=int, default=50000)
+    parser.add_argument("--records", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    results = {"loads": args.loads, "records": args.records}
+    results["uncached"] = bench_mode(args.loads, args.records, args.repeat, 0)
+    results["cached"] = bench_mode(args.loads, args.records, args.repeat, 1024)
+    results["p50_speedup"] = {
+        path: round(results["uncached"][path]["p50_ms"] / results["cached"][path]["p50_ms"], 1) for path in QUERIES
+    }
+    print(json.dumps(results, indent=2))
@@ -0,0 +1,98 @@
+"""Per-query latency of the LoadIndex versus the original list-comprehension search.
+
+    python benchmarks/bench_search.py --loads 100000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.chdir(tempfile.mkdtemp(prefix="bench_search_"))
+
+import main  # noqa: E402
+
+CITIES = [
+    "Chicago, IL", "Dallas, TX", "Queens, NY", "Orlando, FL", "Atlanta, GA", "Denver, CO",
+    "Phoenix, AZ", "Memphis, TN", "Columbus, OH", "Seattle, WA", "Reno, NV", "Omaha, NE",
+    "Houston, TX", "Austin, TX", "Miami, FL", "Newark, NJ", "Boise, ID", "Fresno, CA",
+    "Laredo, TX", "Savannah, GA", "Nashville, TN", "Kansas City, MO", "St. Louis, MO", "Tulsa, OK"
+]
+EQUIPMENT = ["Dry Van", "Reefer", "Flatbed", "Step Deck", "Power Only"]
+
+
+def synthetic_loads(count: int, seed: int = 7):
+    rng = random.Random(seed)
+    loads = []
+    for i in range(count):
+        origin, destination = rng.sample(CITIES, 2)
+        day, hour = rng.randint(1, 28), rng.randint(0, 23)
+        loads.append({
+            "load_id": str(100000 + i), "origin": origin, "destination": destination,
+            "pickup_datetime": f"2025-08-{day:02d}T{hour:02d}:00:00",
+            "delivery_datetime": f"2025-09-{day:02d}T{hour:02d}:00:00",
+            "equipment_type": rng.choice(EQUIPMENT), "loadboard_rate": rng.randint(600, 4000),
+            "notes": "", "weight": rng.randint(5000, 45000), "commodity_type": "General",
+            "num_of_pieces": rng.randint(1, 30), "miles": rng.randint(50, 2500), "dimensions": "48x102"
+        })
+    return loads
+
+
+def list_search(loads, origin=None, destination=None, load_id=None):
+    """The original /search implementation"""
+    results = loads
+    if load_id:
+        results = [l for l in results if l["load_id"] == load_id]
+    if origin:
+        results = [l for l in results if origin.lower() in l["origin"].lower()]
+    if destination:
+        results = [l for l in results if destination.lower() in l["destination"].lower()]
+    return results
+
+
+def latency_us(func, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return {"p50_us": round(statistics.median(samples), 1), "p99_us": round(samples[int(len(samples) * 0.99) - 1], 1)}
+
+
+QUERIES = {
+    "load_id": {"load_id": "150000"},
+    "origin_substring": {"origin": "chicago"},
+    "lane_substring": {"origin": "chicago", "destination": "dallas"},
+}
+
+
+def run(count: int, repeat: int):
+    loads = synthetic_loads(count)
+    start = time.perf_counter()
+    index = main.LoadIndex(loads)
+    results = {"loads": count, "index_build_ms": round((time.perf_counter() - start) * 1000, 1), "queries": {}}
+    for name, params in QUERIES.items():
+        assert index.search(**params) == list_search(loads, **params)
+        results["queries"][name] = {
+            "list": latency_us(lambda: list_search(loads, **params), repeat),
+            "index": latency_us(lambda: index.search(**params), repeat)
+        }
+    structured = {"origin_state": "tx", "equipment_type": "reefer", "min_rate": 2500,
+                  "sort_by": "pickup_datetime", "limit": 20}
+    results["queries"]["structured_lane_sorted"] = {"index": latency_us(lambda: index.search(**structured), repeat)}
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--loads", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(run(args.loads, args.repeat), indent=2))
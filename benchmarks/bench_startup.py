@@ -0,0 +1,112 @@
+"""Measure cold-start cost: importing main and the first /search response.
+
+Each run uses a fresh interpreter in an empty working directory, like a fly
+machine waking from auto-stop. The script reports the median import time,
+which of the heavy analytics and Sheets modules an import pulls in, and the
+time from launching uvicorn until /health and the first /search succeed.
+Pass the --max-* thresholds to make it exit non-zero in CI on a regression.
+
+    python benchmarks/bench_startup.py --runs 5 --max-import-seconds 1.0
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_KEY = "supersecretapikey123"
+HEAVY_MODULES = ["pandas", "matplotlib", "seaborn", "gspread", "google.auth"]
+
+IMPORT_PROBE = f"""
+import json, sys, time
+start = time.perf_counter()
+import main
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def child_env():
+    return dict(os.environ, PYTHONPATH=ROOT)
+
+
+def measure_import():
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE], cwd=tempfile.mkdtemp(prefix="bench_startup_"),
+        env=child_env(), capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_for(url: str, headers, deadline: float) -> float:
+    while time.perf_counter() < deadline:
+        try:
+            if httpx.get(url, headers=headers).status_code == 200:
+                return time.perf_counter()
+        except httpx.HTTPError:
+            time.sleep(0.01)
+    raise RuntimeError(f"No response from {url}")
+
+
+def measure_first_response():
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=tempfile.mkdtemp(prefix="bench_startup_"), env=child_env(),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = start + 60
+        health = wait_for(f"http://127.0.0.1:{port}/health", None, deadline)
+        search = wait_for(f"http://127.0.0.1:{port}/search?origin=chicago", {"X-API-Key": API_KEY}, deadline)
+    finally:
+        server.terminate()
+        server.wait()
+    return {"health_seconds": health - start, "search_seconds": search - start}
+
+
+def bench(runs: int):
+    imports = [measure_import() for _ in range(runs)]
+    responses = [measure_first_response() for _ in range(runs)]
+    return {
+        "runs": runs,
+        "import_seconds": round(statistics.median(r["seconds"] for r in imports), 3),
+        "heavy_modules_loaded": sorted({m for r in imports for m in r["loaded"]}),
+        "first_health_seconds": round(statistics.median(r["health_seconds"] for r in responses), 3),
+        "first_search_seconds": round(statistics.median(r["search_seconds"] for r in responses), 3)
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-seconds", type=float, default=None)
+    parser.add_argument("--max-first-search-seconds", type=float, default=None)
+    args = parser.parse_args()
+    results = bench(args.runs)
+    print(json.dumps(results, indent=2))
+
+    failures = []
+    if results["heavy_modules_loaded"]:
+        failures.append(f"import main loaded {', '.join(results['heavy_modules_loaded'])}")
+    if args.max_import_seconds is not None and results["import_seconds"] > args.max_import_seconds:
+        failures.append(f"import took {results['import_seconds']}s (limit {args.max_import_seconds}s)")
+    if args.max_first_search_seconds is not None and results["first_search_seconds"] > args.max_first_search_seconds:
+        failures.append(f"first /search took {results['first_search_seconds']}s "
+                        f"(limit {args.max_first_search_seconds}s)")
+    if failures:
+        sys.exit("; ".join(failures))
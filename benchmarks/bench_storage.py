@@ -0,0 +1,109 @@
+"""Compare insert and query throughput of the CSV and SQLite record stores.
+
+For every history size both stores are bulk-loaded with synthetic calls, then
+the script times single-record inserts (the /webhook path), a filtered query
+(booked calls in a one-week window) and an incremental tail read.
+
+    python benchmarks/bench_storage.py --sizes 10000 100000 1000000
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.chdir(tempfile.mkdtemp(prefix="bench_storage_"))
+
+import main  # noqa: E402
+
+main.logger.setLevel("WARNING")
+
+SENTIMENTS = ["positive", "neutral", "negative"]
+OUTCOMES = ["booked", "declined", "no_match", "callback"]
+
+
+def synthetic_record(i: int):
+    return {
+        "id": i, "timestamp": f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}T{i % 24:02d}:00:00",
+        "booking_intent": "yes" if i % 3 else "no", "counter_offer": str(1800 + i % 400),
+        "agreed_rate": str(1900 + i % 300), "negotiation_attempts": str(i % 5),
+        "sentiment": SENTIMENTS[i % 3], "call_outcome": OUTCOMES[i % 4],
+        "raw_payload": json.dumps({"call_id": f"call-{i}", "carrier_mc": str(100000 + i)})
+    }
+
+
+def load_csv(size: int) -> "main.CSVStore":
+    path = f"history_{size}.csv"
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=main.RECORD_FIELDS)
+        writer.writeheader()
+        writer.writerows(synthetic_record(i) for i in range(1, size + 1))
+    store = main.CSVStore(path)
+    store.open()
+    return store
+
+
+def load_sqlite(size: int) -> "main.SQLiteStore":
+    store = main.SQLiteStore(f"history_{size}.db")
+    store.open()
+    conn = store.connection()
+    placeholders = ", ".join("?" for _ in main.RECORD_FIELDS)
+    conn.execute("BEGIN")
+    conn.executemany(
+        f"INSERT INTO records ({', '.join(main.RECORD_FIELDS)}) VALUES ({placeholders})",
+        ([r[f] for f in main.RECORD_FIELDS] for r in map(synthetic_record, range(1, size + 1)))
+    )
+    conn.execute("COMMIT")
+    return store
+
+
+def booked_in_window_csv(store):
+    with open(store.path, newline='', encoding='utf-8') as f:
+        return sum(1 for r in csv.DictReader(f)
+                   if r['call_outcome'] == 'booked' and '2025-03-01' <= r['timestamp'] < '2025-03-08')
+
+
+def booked_in_window_sqlite(store):
+    return store.connection().execute(
+        "SELECT COUNT(*) FROM records WHERE call_outcome = 'booked' AND timestamp >= ? AND timestamp < ?",
+        ("2025-03-01", "2025-03-08")
+    ).fetchone()[0]
+
+
+def ops_per_second(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return repeat / (time.perf_counter() - start)
+
+
+def bench(size: int, inserts: int):
+    results = {"rows": size}
+    for name, loader, query in (("csv", load_csv, booked_in_window_csv),
+                                ("sqlite", load_sqlite, booked_in_window_sqlite)):
+        start = time.perf_counter()
+        store = loader(size)
+        load_seconds = time.perf_counter() - start
+        cursor = store.read_new_records(0)[1]
+        insert_rate = ops_per_second(lambda: store.append(synthetic_record(0)), inserts)
+        repeat = 200 if name == "sqlite" else max(1, 100000 // size)
+        results[name] = {
+            "bulk_load_seconds": round(load_seconds, 3),
+            "inserts_per_second": round(insert_rate),
+            "filtered_queries_per_second": round(ops_per_second(lambda: query(store), repeat), 2),
+            "tail_reads_per_second": round(ops_per_second(lambda: store.read_new_records(cursor), 20), 2)
+        }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--inserts", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps([bench(size, args.inserts) for size in args.sizes], indent=2))
@@ -0,0 +1,430 @@
+"""Reproducible benchmark suite for the API's hot paths, with JSON output for comparing commits.
+
+For each size (load book entries and stored calls, 1k to 1M) and storage
+backend it builds a synthetic load book and webhook history in a fresh
+directory and times the DataManager methods behind the request path:
+single and bulk record appends, Sheets buffering and flushing against the
+in-memory FakeClient, dashboard queries, cold and incremental analytics,
+archive rolls and range summaries, the Analytics sheet update and chart
+rendering. It also times LoadBook reloads and LoadIndex searches. It then
+starts the API under uvicorn with the same fake Sheets backend and drives a
+mixed /search and /webhook load for a fixed duration.
+
+Everything is seeded, so two runs on the same machine differ only by noise;
+--rounds keeps the best of several runs, and a fixed calibration workload
+factors out the machine's speed. Write a baseline on one commit and compare
+against it on another; the comparison exits non-zero when a latency of at
+least --min-ms or a throughput regresses by more than --max-regression:
+
+    python benchmarks/bench_suite.py --sizes 1000 10000 100000 1000000 --rounds 3 --output base.json
+    python benchmarks/bench_suite.py --sizes 1000 10000 100000 1000000 --rounds 3 --compare base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+START_DIR = os.getcwd()
+sys.path.insert(0, ROOT)
+sys.path.insert(0, BENCH_DIR)
+
+os.chdir(tempfile.mkdtemp(prefix="bench_suite_"))
+
+import main  # noqa: E402
+from fake_gspread import FakeClient  # noqa: E402
+
+main.logger.setLevel("WARNING")
+main.logging.getLogger("httpx").setLevel("WARNING")
+
+API_KEY = "supersecretapikey123"
+HEADERS = {"X-API-Key": API_KEY}
+CITIES = [
+    "Chicago, IL", "Dallas, TX", "Queens, NY", "Orlando, FL", "Atlanta, GA", "Denver, CO",
+    "Phoenix, AZ", "Memphis, TN", "Columbus, OH", "Seattle, WA", "Reno, NV", "Omaha, NE",
+    "Houston, TX", "Austin, TX", "Miami, FL", "Newark, NJ", "Boise, ID", "Fresno, CA",
+    "Laredo, TX", "Savannah, GA", "Nashville, TN", "Kansas City, MO", "St. Louis, MO", "Tulsa, OK"
+]
+EQUIPMENT = ["Dry Van", "Reefer", "Flatbed", "Step Deck", "Power Only"]
+SENTIMENTS = ["positive", "neutral", "negative"]
+OUTCOMES = ["booked", "declined", "no_match", "callback"]
+FIRST_DAY = datetime(2025, 6, 1)
+HISTORY_DAYS = 90
+SEARCHES = [
+    {"origin": "chicago"},
+    {"origin": "chicago", "destination": "dallas"},
+    {"origin_state": "TX", "equipment_type": "Reefer", "sort_by": "loadboard_rate", "order": "desc", "limit": 50},
+    {"pickup_near": "Chicago, IL", "pickup_radius": 150, "limit": 50},
+    {"min_rate": 2000, "max_rate": 2500, "sort_by": "pickup_datetime", "limit": 50}
+]
+
+# Server launched for the HTTP scenario: the real app, with Sheets pointed at the in-memory fake
+SERVER = """
+import sys
+sys.path[:0] = [{root!r}, {bench_dir!r}]
+import uvicorn
+import main
+from fake_gspread import FakeClient
+main.data_manager.google_client = FakeClient()
+uvicorn.run(main.app, host="127.0.0.1", port={port}, log_level="warning")
+"""
+
+
+def synthetic_loads(count: int, seed: int = 13):
+    rng = random.Random(seed)
+    loads = []
+    for i in range(count):
+        origin, destination = rng.sample(CITIES, 2)
+        day, hour = rng.randint(1, 28), rng.randint(0, 23)
+        loads.append({
+            "load_id": str(100000 + i), "origin": origin, "destination": destination,
+            "pickup_datetime": f"2025-08-{day:02d}T{hour:02d}:00:00",
+            "delivery_datetime": f"2025-09-{day:02d}T{hour:02d}:00:00",
+            "equipment_type": rng.choice(EQUIPMENT), "loadboard_rate": rng.randint(600, 4000),
+            "notes": "", "weight": rng.randint(5000, 45000), "commodity_type": "General",
+            "num_of_pieces": rng.randint(1, 30), "miles": rng.randint(50, 2500), "dimensions": "48x102"
+        })
+    return loads
+
+
+def webhook_payload(i: int, prefix: str = "call"):
+    return {
+        "booking_intent": "yes" if i % 3 else "no", "counter_offer": f"${1800 + i % 400:,}",
+        "agreed_rate": str(1900 + i % 300), "negotiation_attempts": str(i % 5),
+        "sentiment": SENTIMENTS[i % 3], "call_outcome": OUTCOMES[i % 4],
+        "origin": CITIES[i % len(CITIES)], "destination": CITIES[(i * 7 + 1) % len(CITIES)],
+        "call_id": f"{prefix}-{i}"
+    }
+
+
+def history_record(i: int, count: int):
+    """Stored record i of a history spread evenly over HISTORY_DAYS days"""
+    stamp = FIRST_DAY + timedelta(seconds=i * HISTORY_DAYS * 86400 // count)
+    return main.webhook_record(webhook_payload(i, "history"), stamp.isoformat())
+
+
+def elapsed_ms(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return round((time.perf_counter() - start) * 1000, 2), result
+
+
+def summarize_ms(samples):
+    ordered = sorted(samples)
+    return {
+        "p50_ms": round(statistics.median(ordered) * 1000, 3),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1000, 3)
+    }
+
+
+def sample(func, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return summarize_ms(samples)
+
+
+def bench_load_book(size: int):
+    with open("loads.json", "w") as f:
+        json.dump(synthetic_loads(size), f)
+    book = main.LoadBook("loads.json")
+    reload_ms, _ = elapsed_ms(book.reload)
+    results = {"reload_ms": reload_ms}
+    for i, query in enumerate(SEARCHES):
+        filters = dict(query)
+        if "pickup_near" in filters:
+            filters["pickup_point"] = main.gazetteer.geocode(filters.pop("pickup_near"))
+        if "order" in filters:
+            filters["descending"] = filters.pop("order") == "desc"
+        results[f"search_{i}"] = sample(lambda: book.index.search(**filters), 50)
+    return results
+
+
+def fill_history(manager: "main.DataManager", size: int, batch_size: int = 10000):
+    """Store the synthetic history through save_records; returns records per second"""
+    start = time.perf_counter()
+    for first in range(0, size, batch_size):
+        records = [history_record(i, size) for i in range(first, min(size, first + batch_size))]
+        manager.save_records(records, [None] * len(records))
+    return round(size / (time.perf_counter() - start))
+
+
+def bench_manager(size: int, backend: str):
+    main.STORAGE_BACKEND = backend
+    os.makedirs(main.CHARTS_DIR, exist_ok=True)
+    manager = main.DataManager()
+    manager.google_client = FakeClient()
+    results = {"save_records_per_second": fill_history(manager, size)}
+    try:
+        counter = iter(range(size, size + 10 ** 9))
+        now = datetime.utcnow().isoformat()
+
+        def new_record():
+            return main.webhook_record(webhook_payload(next(counter)), now)
+
+        results["save_record"] = sample(lambda: manager.save_record(new_record()), 200)
+        results["save_record_once"] = sample(
+            lambda: manager.save_record_once(new_record(), f"key-{next(counter)}"), 200
+        )
+
+        sheets_records = [manager.save_record(new_record()) for _ in range(1000)]
+        start = time.perf_counter()
+        for record in sheets_records:
+            if manager.save_to_google_sheets(record):
+                manager.flush_google_sheets()
+        manager.flush_google_sheets()
+        results["sheets_buffer_and_flush_1000_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+        results["query_records_page"] = sample(
+            lambda: list(manager.query_records(limit=101, call_outcome="booked")), 20
+        )
+        week_start = (FIRST_DAY + timedelta(days=HISTORY_DAYS - 7)).date().isoformat()
+        week_end = (FIRST_DAY + timedelta(days=HISTORY_DAYS)).date().isoformat()
+        results["query_records_last_week_page"] = sample(
+            lambda: list(manager.query_records(limit=101, start=week_start, end=week_end)), 20
+        )
+
+        results["refresh_analytics_cold_ms"], _ = elapsed_ms(manager.refresh_analytics)
+        for _ in range(100):
+            manager.save_record(new_record())
+        results["refresh_analytics_100_new_ms"], _ = elapsed_ms(manager.refresh_analytics)
+
+        results["roll_archive_cold_ms"], _ = elapsed_ms(manager.roll_archive)
+        results["archive_summary_last_week"] = sample(lambda: manager.archive_summary(week_start, week_end), 20)
+        results["update_google_sheets_analytics_ms"], _ = elapsed_ms(manager.update_google_sheets_analytics)
+
+        try:
+            results["generate_charts_ms"], rendered = elapsed_ms(asyncio.run, manager.generate_charts_async())
+            if not rendered:
+                del results["generate_charts_ms"]
+        except ImportError:
+            pass
+    finally:
+        manager.shutdown_executors()
+    return results
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, workdir: str, backend: str) -> subprocess.Popen:
+    env = dict(os.environ, STORAGE_BACKEND=backend)
+    server = subprocess.Popen(
+        [sys.executable, "-c", SERVER.format(root=ROOT, bench_dir=BENCH_DIR, port=port)],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 300
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+async def mixed_traffic(base_url: str, seconds: float, concurrency: int, webhook_share: float):
+    """Closed-loop load: each worker sends a /webhook or a /search, waits for it, and repeats"""
+    rng = random.Random(17)
+    samples = {"search": [], "webhook": []}
+    errors = {"search": 0, "webhook": 0}
+    counter = iter(range(10 ** 9))
+    deadline = time.perf_counter() + seconds
+
+    async def worker(client: httpx.AsyncClient):
+        while time.perf_counter() < deadline:
+            kind = "webhook" if rng.random() < webhook_share else "search"
+            start = time.perf_counter()
+            if kind == "webhook":
+                response = await client.post("/webhook", json=webhook_payload(next(counter), "http"))
+            else:
+                response = await client.get("/search", params=rng.choice(SEARCHES[:2]), headers=HEADERS)
+            samples[kind].append(time.perf_counter() - start)
+            if response.status_code != 200:
+                errors[kind] += 1
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+
+    results = {}
+    for kind in samples:
+        if samples[kind]:
+            results[kind] = dict(summarize_ms(samples[kind]), requests=len(samples[kind]), errors=errors[kind],
+                                 requests_per_second=round(len(samples[kind]) / seconds, 1))
+    return results
+
+
+def bench_http(size: int, backend: str, seconds: float, concurrency: int, webhook_share: float):
+    workdir = tempfile.mkdtemp(prefix="bench_suite_http_")
+    with open(os.path.join(workdir, "loads.json"), "w") as f:
+        json.dump(synthetic_loads(size), f)
+    port = free_port()
+    server = start_server(port, workdir, backend)
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        history = [webhook_payload(i, "history") for i in range(size)]
+        for first in range(0, size, main.WEBHOOK_BATCH_MAX_RECORDS):
+            batch = history[first:first + main.WEBHOOK_BATCH_MAX_RECORDS]
+            response = httpx.post(f"{base_url}/webhook/batch", json=batch, headers=HEADERS, timeout=600)
+            assert response.status_code == 200, response.text
+        return asyncio.run(mixed_traffic(base_url, seconds, concurrency, webhook_share))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run_suite(args):
+    results = {}
+    for size in args.sizes:
+        case = {}
+        os.chdir(tempfile.mkdtemp(prefix=f"bench_suite_{size}_"))
+        case["load_book"] = bench_load_book(size)
+        for backend in args.backends:
+            os.chdir(tempfile.mkdtemp(prefix=f"bench_suite_{size}_{backend}_"))
+            case[f"data_manager_{backend}"] = bench_manager(size, backend)
+        if not args.skip_http:
+            case["http_mixed"] = bench_http(size, args.backends[0], args.http_seconds, args.concurrency,
+                                            args.webhook_share)
+        results[str(size)] = case
+        print(f"size {size} done", file=sys.stderr)
+    return results
+
+
+def best_of(first, second):
+    """Merge two runs metric by metric, keeping the fastest timing and the highest throughput"""
+    merged = {}
+    for key, value in first.items():
+        other = second.get(key)
+        if isinstance(value, dict):
+            merged[key] = best_of(value, other or {})
+        elif other is None or not isinstance(value, (int, float)):
+            merged[key] = value
+        elif key.endswith("_per_second"):
+            merged[key] = max(value, other)
+        elif key.endswith("_ms"):
+            merged[key] = min(value, other)
+        else:
+            merged[key] = value
+    return merged
+
+
+def calibration_ms():
+    """Fastest of several runs of a fixed pure-Python workload, to factor machine speed out of comparisons"""
+    payloads = [webhook_payload(i) for i in range(20000)]
+    runs = []
+    for _ in range(5):
+        start = time.perf_counter()
+        sorted(json.loads(json.dumps(payloads)), key=lambda p: (p["agreed_rate"], p["call_id"]))
+        runs.append((time.perf_counter() - start) * 1000)
+    return round(min(runs), 2)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(tree, prefix=""):
+    for key, value in tree.items():
+        name = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            yield from flatten(value, name)
+        elif isinstance(value, (int, float)):
+            yield name, value
+
+
+def compare(baseline, current, max_regression: float, min_ms: float):
+    """Slowdown ratios, adjusted for machine speed, for the metrics in both runs, and those that regressed.
+
+    p99s and timings under min_ms in the baseline are reported but never
+    fail the comparison; they are too noisy between runs to gate on.
+    """
+    speed = current["calibration_ms"] / baseline["calibration_ms"]
+    old = dict(flatten(baseline["results"]))
+    ratios, regressions = {}, []
+    for name, value in flatten(current["results"]):
+        before = old.get(name)
+        if not before or not value:
+            continue
+        if name.endswith("_ms"):
+            ratio = value / before / speed
+            gated = before >= min_ms and not name.endswith("p99_ms")
+        elif name.endswith("_per_second"):
+            ratio = before / value / speed
+            gated = True
+        else:
+            continue
+        ratios[name] = round(ratio, 2)
+        if gated and ratio > 1 + max_regression:
+            regressions.append(name)
+    return ratios, regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "csv"])
+    parser.add_argument("--http-seconds", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--webhook-share", type=float, default=0.2, help="Fraction of HTTP requests that are webhooks")
+    parser.add_argument("--skip-http", action="store_true")
+    parser.add_argument("--rounds", type=int, default=1,
+                        help="Run the suite this many times and keep each metric's best result")
+    parser.add_argument("--output", help="Also write the results to this file")
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="Fail the comparison when a metric is this much slower (0.25 = 25%%)")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="Only gate on timings at least this long")
+    args = parser.parse_args()
+    output = os.path.join(START_DIR, args.output) if args.output else None
+    baseline_path = os.path.join(START_DIR, args.compare) if args.compare else None
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "started_at": datetime.utcnow().isoformat(),
+        "calibration_ms": calibration_ms(),
+        "config": {"sizes": args.sizes, "backends": args.backends, "rounds": args.rounds,
+                   "http_seconds": args.http_seconds, "concurrency": args.concurrency,
+                   "webhook_share": args.webhook_share},
+        "results": run_suite(args)
+    }
+    for _ in range(args.rounds - 1):
+        report["results"] = best_of(report["results"], run_suite(args))
+    failures = []
+    if baseline_path:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+        ratios, failures = compare(baseline, report, args.max_regression, args.min_ms)
+        report["comparison"] = {"baseline_commit": baseline.get("commit"),
+                                "machine_speed_ratio": round(report["calibration_ms"] / baseline["calibration_ms"], 2),
+                                "slowdown_ratios": ratios, "regressions": failures}
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    if failures:
+        sys.exit(f"{len(failures)} metrics regressed by more than {args.max_regression:.0%}: {', '.join(failures)}")
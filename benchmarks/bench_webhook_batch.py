@@ -0,0 +1,108 @@
+"""Compare bulk ingestion through /webhook/batch with one /webhook per call.
+
+Starts the API under uvicorn in a child process for each storage backend and
+posts the same synthetic call payloads as a JSON array, as an NDJSON stream,
+and one request at a time. Reports records per second for each path; the
+single-request path is sampled on a smaller count and extrapolated.
+
+    python benchmarks/bench_webhook_batch.py --records 100000 --single 2000
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+API_KEY = "supersecretapikey123"
+HEADERS = {"X-API-Key": API_KEY}
+
+
+def webhook_payload(i: int, prefix: str):
+    return {
+        "booking_intent": "yes" if i % 3 else "no", "counter_offer": str(1800 + i % 400),
+        "agreed_rate": str(1900 + i % 300), "negotiation_attempts": str(i % 5),
+        "sentiment": "positive", "call_outcome": "booked", "call_id": f"{prefix}-{i}"
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int, backend: str) -> subprocess.Popen:
+    env = dict(os.environ, PYTHONPATH=ROOT, STORAGE_BACKEND=backend)
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=tempfile.mkdtemp(prefix="bench_webhook_batch_"), env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200:
+                return server
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+def post_batch(client: httpx.Client, payloads, ndjson: bool):
+    if ndjson:
+        body = "\n".join(json.dumps(p) for p in payloads)
+        headers = dict(HEADERS, **{"Content-Type": "application/x-ndjson"})
+    else:
+        body = json.dumps(payloads)
+        headers = dict(HEADERS, **{"Content-Type": "application/json"})
+    start = time.perf_counter()
+    response = client.post("/webhook/batch", content=body, headers=headers)
+    seconds = time.perf_counter() - start
+    assert response.status_code == 200, response.text
+    assert response.json()["accepted"] == len(payloads), response.json()
+    return {"records": len(payloads), "seconds": round(seconds, 3), "records_per_second": round(len(payloads) / seconds)}
+
+
+def post_single(client: httpx.Client, payloads):
+    start = time.perf_counter()
+    for payload in payloads:
+        response = client.post("/webhook", json=payload)
+        assert response.status_code == 200, response.text
+    seconds = time.perf_counter() - start
+    return {"records": len(payloads), "seconds": round(seconds, 3), "records_per_second": round(len(payloads) / seconds)}
+
+
+def bench_backend(backend: str, records: int, single: int):
+    port = free_port()
+    server = start_server(port, backend)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=600) as client:
+            results = {
+                "batch_json": post_batch(client, [webhook_payload(i, "json") for i in range(records)], False),
+                "batch_ndjson": post_batch(client, [webhook_payload(i, "ndjson") for i in range(records)], True),
+                "single": post_single(client, [webhook_payload(i, "single") for i in range(single)])
+            }
+    finally:
+        server.terminate()
+        server.wait()
+    results["speedup"] = round(results["batch_json"]["records_per_second"] / results["single"]["records_per_second"], 1)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--records", type=int, default=100000)
+    parser.add_argument("--single", type=int, default=2000, help="Calls sent through /webhook one at a time")
+    parser.add_argument("--backends", nargs="+", default=["sqlite", "csv"])
+    args = parser.parse_args()
+    results = {"records": args.records}
+    for backend in args.backends:
+        results[backend] = bench_backend(backend, args.records, args.single)
+    print(json.dumps(results, indent=2))
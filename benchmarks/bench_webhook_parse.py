@@ -0,0 +1,112 @@
+"""Measure per-request CPU and allocations of the /webhook body handling.
+
+Runs the body-to-record steps of the webhook handler in a loop, outside the
+server, for a typical call payload and one carrying a long transcript:
+
+- before: json.loads of the body (what request.json() did), the whole
+  payload formatted into an INFO log line, and json.dumps back into
+  raw_payload
+- after: one decode_json pass (orjson when installed), the sampled and
+  truncated log line, and the body bytes stored verbatim as raw_payload
+
+Logging goes to an in-memory handler at INFO, as in production. CPU time is
+process time per request; allocations are the tracemalloc peak of one request
+and the bytes still held by the record it builds.
+
+    python benchmarks/bench_webhook_parse.py --requests 20000
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+os.chdir(tempfile.mkdtemp(prefix="bench_webhook_parse_"))
+
+import main  # noqa: E402
+
+main.logger.handlers = [logging.StreamHandler(io.StringIO())]
+main.logger.propagate = False
+main.logger.setLevel("INFO")
+
+
+def call_payload(transcript_words: int) -> bytes:
+    payload = {
+        "call_id": "call-8f2c1d", "booking_intent": "yes", "counter_offer": "2,150", "agreed_rate": "2100",
+        "negotiation_attempts": "2", "sentiment": "positive", "call_outcome": "booked", "load_id": "L01234",
+        "origin": "Chicago, IL", "destination": "Dallas, TX", "equipment_type": "Dry Van", "carrier_mc": "MC123456",
+        "extracted": {"carrier_name": "Blue Line Freight", "contact": "dispatch@example.com", "eta_hours": 6.5}
+    }
+    if transcript_words:
+        payload["transcript"] = " ".join(f"word{i % 97}" for i in range(transcript_words))
+    return json.dumps(payload).encode()
+
+
+def before(body: bytes):
+    payload = json.loads(body)
+    main.logger.info(f"Received webhook payload: {payload}")
+    main.idempotency_key({}, payload)
+    return main.webhook_record(payload, "2025-08-01T10:00:00")
+
+
+def after(body: bytes):
+    payload = main.decode_json(body)
+    main.log_webhook_payload(body)
+    main.idempotency_key({}, payload)
+    return main.webhook_record(payload, "2025-08-01T10:00:00", main.raw_payload_text(body, payload))
+
+
+def cpu_us(handle, body: bytes, requests: int) -> float:
+    start = time.process_time()
+    for _ in range(requests):
+        handle(body)
+    return (time.process_time() - start) * 1e6 / requests
+
+
+def allocations(handle, body: bytes, samples: int = 200):
+    """Mean tracemalloc peak of one request, and the bytes its stored record keeps"""
+    peaks, retained = 0, 0
+    tracemalloc.start()
+    for _ in range(samples):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        record = handle(body)
+        current, peak = tracemalloc.get_traced_memory()
+        peaks += peak - base
+        retained += current - base
+        del record
+    tracemalloc.stop()
+    return round(peaks / samples), round(retained / samples)
+
+
+def bench(body: bytes, requests: int):
+    results = {"body_bytes": len(body)}
+    for label, handle in (("before", before), ("after", after)):
+        handle(body)
+        peak, retained = allocations(handle, body)
+        results[label] = {"cpu_us_per_request": round(cpu_us(handle, body, requests), 2),
+                          "peak_alloc_bytes": peak, "record_bytes": retained}
+    results["cpu_speedup"] = round(results["before"]["cpu_us_per_request"] / results["after"]["cpu_us_per_request"], 1)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--transcript-words", type=int, default=3000, help="Size of the large payload's transcript")
+    args = parser.parse_args()
+
+    results = {
+        "decoder": "orjson" if main.orjson is not None else "json",
+        "log_sample_rate": main.WEBHOOK_LOG_SAMPLE_RATE,
+        "typical": bench(call_payload(0), args.requests),
+        "with_transcript": bench(call_payload(args.transcript_words), max(1, args.requests // 10))
+    }
+    print(json.dumps(results, indent=2))
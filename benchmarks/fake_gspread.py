@@ -0,0 +1,98 @@
+"""In-memory stand-in for the gspread client used by the benchmarks.
+
+FakeClient mimics the small part of the gspread API that DataManager uses
+(open_by_key, worksheet, add_worksheet, append_row(s), update, resize, clear) and
+counts every call, so Sheets traffic can be measured without network access.
+"""
+import gspread
+
+
+class FakeResponse:
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.text = f"HTTP {status_code}"
+
+    def json(self):
+        return {"error": {"code": self.status_code, "message": self.text, "status": "FAKE"}}
+
+
+class FakeWorksheet:
+    def __init__(self, client, title: str, rows: int = 1000, cols: int = 26):
+        self.client = client
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self.rows = []
+
+    def _call(self, name: str):
+        self.client.calls[name] = self.client.calls.get(name, 0) + 1
+        if self.client.fail_next:
+            status = self.client.fail_next.pop(0)
+            raise gspread.exceptions.APIError(FakeResponse(status))
+
+    def append_row(self, values, **kwargs):
+        self._call("append_row")
+        self.rows.append(list(values))
+
+    def append_rows(self, values, **kwargs):
+        self._call("append_rows")
+        self.rows.extend(list(v) for v in values)
+
+    def update(self, values=None, range_name=None, **kwargs):
+        self._call("update")
+        self.rows = [list(v) for v in values or []]
+
+    def resize(self, rows=None, cols=None):
+        self._call("resize")
+        self.row_count = rows or self.row_count
+        self.col_count = cols or self.col_count
+
+    def batch_clear(self, ranges):
+        self._call("batch_clear")
+        self.rows = []
+
+    def clear(self):
+        self._call("clear")
+        self.rows = []
+
+    def get_all_values(self):
+        self._call("get_all_values")
+        return [list(r) for r in self.rows]
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, key: str):
+        self.client = client
+        self.id = key
+        self.title = f"Fake spreadsheet {key}"
+        self.worksheets = {}
+
+    def worksheet(self, title: str):
+        self.client.calls["worksheet"] = self.client.calls.get("worksheet", 0) + 1
+        if title not in self.worksheets:
+            raise gspread.WorksheetNotFound(title)
+        return self.worksheets[title]
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 20, **kwargs):
+        self.client.calls["add_worksheet"] = self.client.calls.get("add_worksheet", 0) + 1
+        self.worksheets[title] = FakeWorksheet(self.client, title, rows, cols)
+        return self.worksheets[title]
+
+
+class FakeClient:
+    """Fake gspread client; queue HTTP status codes in fail_next to inject API errors"""
+
+    def __init__(self):
+        self.calls = {}
+        self.fail_next = []
+        self.spreadsheets = {}
+
+    def open_by_key(self, key: str):
+        self.calls["open_by_key"] = self.calls.get("open_by_key", 0) + 1
+        if key not in self.spreadsheets:
+            self.spreadsheets[key] = FakeSpreadsheet(self, key)
+        return self.spreadsheets[key]
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
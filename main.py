@@ -1,20 +1,49 @@
 
 from fastapi import FastAPI, Query, HTTPException, Request, Depends
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter, ValidationError
 from typing import List, Optional, Dict, Any
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime
-from fastapi.responses import JSONResponse
+from datetime import datetime, timezone
+from array import array
+from collections import Counter, OrderedDict, deque
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from contextlib import asynccontextmanager, contextmanager
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial, wraps
+import asyncio
+import bisect
 import csv
+import hashlib
+import io
+import itertools
+import math
 import os
 import json
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-import gspread
-from google.oauth2.service_account import Credentials
-from google.auth.transport.requests import Request as GoogleRequest
+import multiprocessing
+import queue
+import random
+import re
+import signal
+import socket
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import uuid
 import logging
+# matplotlib, seaborn, gspread and google-auth are imported where they are used,
+# so cold starts serving /search and /health never load the analytics stack
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines
+    fcntl = None
+
+try:
+    import orjson  # Optional; webhook bodies are decoded with it when installed
+except ImportError:
+    orjson = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -25,22 +54,391 @@ API_KEY = "supersecretapikey123"
 
 # File paths
 CSV_FILE = "webhook_data.csv"
+SQLITE_FILE = "webhook_data.db"
 CHARTS_DIR = "charts"
+# Load book source: a .json, .csv or .db/.sqlite file
+LOAD_BOOK_SOURCE = os.getenv("LOAD_BOOK_SOURCE", "loads.json")
+LOAD_BOOK_POLL_INTERVAL = 10.0
+GAZETTEER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "gazetteer.csv")
+JOB_SPOOL_DIR = "job_spool"
+
+# Record storage backend: "sqlite" (default) or "csv"
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "sqlite")
+
+# Write-ahead ingest log: each worker logs a group of appends with one fsync, then stores it in one transaction
+INGEST_LOG_DIR = "ingest_log"
+INGEST_GROUP_MAX_RECORDS = int(os.getenv("INGEST_GROUP_MAX_RECORDS", "1000"))
+# A worker's log is truncated once everything in it is stored and it has grown past this size
+INGEST_LOG_MAX_BYTES = 16 * 1024 * 1024
+# How often live workers look for logs left behind by workers that died
+INGEST_RECOVERY_INTERVAL = 60.0
+
+RECORD_FIELDS = [
+    "id", "timestamp", "booking_intent", "counter_offer", "agreed_rate",
+    "negotiation_attempts", "sentiment", "call_outcome", "raw_payload"
+]
+
+# Free-form rate and attempt fields are also stored parsed, in these typed columns
+NUMERIC_FIELDS = {
+    "counter_offer": "counter_offer_value",
+    "agreed_rate": "agreed_rate_value",
+    "negotiation_attempts": "negotiation_attempts_value"
+}
+# Worst parse outcome across the numeric fields wins; a record with none of them is "empty"
+NUMERIC_STATUSES = ("invalid", "partial", "ok")
+STORED_FIELDS = RECORD_FIELDS + list(NUMERIC_FIELDS.values()) + ["numeric_status"]
+# Bulk reads hold everything but raw_payload in slots; these few-valued strings are interned
+COMPACT_FIELDS = [field for field in STORED_FIELDS if field != "raw_payload"]
+CATEGORICAL_FIELDS = frozenset(("booking_intent", "sentiment", "call_outcome", "numeric_status"))
+
+# Geo search: grid cell size in degrees and default radius in miles
+GEO_CELL_DEGREES = 1.0
+GEO_DEFAULT_RADIUS_MILES = 100.0
+
+# Dashboard pagination
+DASHBOARD_DEFAULT_LIMIT = 100
+DASHBOARD_MAX_LIMIT = 1000
+EXPORT_BATCH_SIZE = 500
+
+# Background job pipeline configuration
+JOB_QUEUE_MAXSIZE = 1000
+JOB_WORKERS = 2
+JOB_MAX_ATTEMPTS = 5
+JOB_RETRY_BASE_DELAY = 2.0
+
+# Executors that keep blocking work off the event loop
+STORE_IO_WORKERS = 4
+SHEETS_WORKERS = 2
+RENDER_WORKERS = 1
+# Niceness added to the render processes so request handling wins the shared CPU
+RENDER_NICENESS = 10
+
+# Chart rendering: at most one render per debounce window, output variants
+# (dpi per size) and a retention policy for the files kept in charts/
+CHART_DEBOUNCE_SECONDS = 30.0
+CHART_VARIANTS = {"full": 300, "thumbnail": 40}
+CHART_FORMATS = ("png", "svg")
+CHART_DEFAULT_OUTPUTS = [("full", "png"), ("thumbnail", "png")]
+CHART_KEEP_RENDERS = 10
+CHART_MAX_BYTES = 100 * 1024 * 1024
 
 # Google Sheets Configuration
 GOOGLE_SHEETS_URL = "https://docs.google.com/spreadsheets/d/1Z2V3vJMgfDi71eYxU2-7iC0Yj8eE-vNseIssjiNUxA0/edit?usp=sharing"
 SPREADSHEET_ID = "1Z2V3vJMgfDi71eYxU2-7iC0Yj8eE-vNseIssjiNUxA0"
 GOOGLE_CREDENTIALS_FILE = "google-credentials.json"
+SHEETS_SYNC_STATE_FILE = "sheets_sync_state.json"
+ANALYTICS_SNAPSHOT_FILE = "analytics_snapshot.json"
+ARCHIVE_DIR = "archive"
+LANE_RATES_SNAPSHOT_FILE = "lane_rates_snapshot.json"
+
+# Number of recent (counter offer, agreed rate) pairs kept for the rate chart
+ANALYTICS_RATE_SAMPLE_SIZE = 2000
+# Records read per batch when the analytics and lane-rate aggregates catch up with the store
+ANALYTICS_CATCH_UP_BATCH = 5000
+# The analytics and lane-rate snapshots are rewritten once this many records were folded in or this many
+# seconds have passed with new records, and on shutdown; a restart replays whatever came after
+ANALYTICS_SNAPSHOT_RECORDS = 1000
+ANALYTICS_SNAPSHOT_INTERVAL = 300.0
+# Analytics report: conversion funnel stages, and the bucket width in dollars of the agreed-minus-counter histogram
+FUNNEL_STAGES = ("calls", "negotiated", "agreed", "booked")
+RATE_DELTA_BUCKET = 50
+
+# Recent calls per lane behind the /rates statistics
+LANE_RATE_WINDOW = 500
+
+# /live stream: rolling windows in seconds, kept in a ring of buckets this many seconds wide
+LIVE_WINDOWS = {"5m": 300, "1h": 3600, "24h": 86400}
+LIVE_BUCKET_SECONDS = 10
+# Seconds between window stats frames, and frames a subscriber may fall behind before it is dropped
+LIVE_STATS_INTERVAL = 5.0
+LIVE_SUBSCRIBER_QUEUE = 256
+LIVE_MAX_SUBSCRIBERS = int(os.getenv("LIVE_MAX_SUBSCRIBERS", "1000"))
+# Seconds a stream stays open before the server ends it, so a shutdown never waits on streams for longer;
+# clients reconnect after LIVE_RETRY_MS and resume from the last LIVE_REPLAY_RECORDS record frames
+LIVE_STREAM_SECONDS = 300.0
+LIVE_RETRY_MS = 1000
+LIVE_REPLAY_RECORDS = 1000
+# Record fields sent to subscribers; raw_payload stays out of the stream
+LIVE_RECORD_FIELDS = ("id", "timestamp", "booking_intent", "counter_offer", "agreed_rate", "agreed_rate_value",
+                      "negotiation_attempts", "sentiment", "call_outcome")
+
+# Columnar archive: records stay in the in-memory hot partition until a day ends or it grows too large
+ARCHIVE_ROLL_INTERVAL = 60.0
+ARCHIVE_HOT_MAX_ROWS = 50000
+ARCHIVE_COMPACT_INTERVAL = 3600.0
+# Today's partition is compacted early once it has this many segments
+ARCHIVE_MAX_SEGMENTS = 16
 
-# Create charts directory if it doesn't exist
+# Google Sheets batching configuration
+SHEETS_BATCH_SIZE = 50
+SHEETS_MAX_BUFFER = 5000
+SHEETS_FLUSH_INTERVAL = 5.0
+SHEETS_MAX_RETRIES = 5
+SHEETS_RETRY_BASE_DELAY = 1.0
+SHEETS_RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Webhook idempotency: retried deliveries with a known key return the original record
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+# Payload fields that identify a call, checked in order when no header is sent
+IDEMPOTENCY_PAYLOAD_FIELDS = ("call_id", "callId", "run_id", "session_id")
+IDEMPOTENCY_TTL_SECONDS = 24 * 3600
+IDEMPOTENCY_CACHE_SIZE = 10000
+IDEMPOTENCY_PURGE_INTERVAL = 3600.0
+
+# Largest number of call payloads accepted by one /webhook/batch request
+WEBHOOK_BATCH_MAX_RECORDS = 100000
+# Largest request bodies accepted, in bytes; anything bigger gets a 413 before it is read in full
+WEBHOOK_MAX_BODY_BYTES = int(os.getenv("WEBHOOK_MAX_BODY_BYTES", str(256 * 1024)))
+WEBHOOK_BATCH_MAX_BODY_BYTES = int(os.getenv("WEBHOOK_BATCH_MAX_BODY_BYTES", str(64 * 1024 * 1024)))
+# Share of webhook bodies logged at INFO (all of them at DEBUG), each cut to this many characters
+WEBHOOK_LOG_SAMPLE_RATE = float(os.getenv("WEBHOOK_LOG_SAMPLE_RATE", "0.01"))
+WEBHOOK_LOG_MAX_CHARS = 512
+
+# Response cache for /search, /dashboard and /stats; entries are keyed by data version, so writes invalidate them
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))  # 0 disables the in-process tier
+RESPONSE_CACHE_TTL_SECONDS = 30.0
+# Optional shared tier for several workers or machines: redis://host:6379/0 or sqlite:///path/to/cache.db
+RESPONSE_CACHE_URL = os.getenv("RESPONSE_CACHE_URL", "")
+
+# Histogram buckets (seconds) for request and stage latency metrics
+METRICS_LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Create charts and job spool directories if they don't exist
 os.makedirs(CHARTS_DIR, exist_ok=True)
+os.makedirs(JOB_SPOOL_DIR, exist_ok=True)
+
+def escape_label(value: Any) -> str:
+    """Escape a label value for the Prometheus text format"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def format_labels(labels, extra: Optional[tuple] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{escape_label(v)}"' for k, v in pairs) + "}"
+
+class Metrics:
+    """Minimal in-process Prometheus registry: labelled counters, histograms and gauges.
+
+    Counters and histograms are updated from request handlers and worker
+    threads under one lock. Gauges are callbacks evaluated at scrape time, so
+    queue depths and record counts cost nothing between scrapes.
+    """
+
+    def __init__(self, buckets: tuple = METRICS_LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.help: Dict[str, tuple] = {}
+        self.counters: Dict[str, Dict[tuple, float]] = {}
+        self.histograms: Dict[str, Dict[tuple, List[float]]] = {}
+        self.gauges: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def describe(self, name: str, kind: str, help_text: str):
+        self.help[name] = (kind, help_text)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.histograms.setdefault(name, {})
+            # One slot per bucket plus +Inf, then the sum and the count
+            state = series.get(key)
+            if state is None:
+                state = series[key] = [0] * (len(self.buckets) + 3)
+            state[bisect.bisect_left(self.buckets, value)] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def timer(self, name: str, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def gauge(self, name: str, help_text: str, callback, label: Optional[str] = None, kind: str = "gauge"):
+        """Register a scrape-time callback returning a number, or a {label value: number} dict"""
+        self.describe(name, kind, help_text)
+        self.gauges[name] = (callback, label)
+
+    def render(self) -> str:
+        """Format every metric in the Prometheus text exposition format"""
+        with self._lock:
+            counters = {name: dict(series) for name, series in self.counters.items()}
+            histograms = {name: {k: list(v) for k, v in series.items()} for name, series in self.histograms.items()}
+        
+        lines = []
+        def header(name: str, default_kind: str):
+            kind, help_text = self.help.get(name, (default_kind, name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+        
+        for name, series in sorted(counters.items()):
+            header(name, "counter")
+            for labels, value in sorted(series.items()):
+                lines.append(f"{name}{format_labels(labels)} {value:g}")
+        
+        for name, series in sorted(histograms.items()):
+            header(name, "histogram")
+            for labels, state in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), state):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{format_labels(labels, ('le', bound))} {cumulative}")
+                lines.append(f"{name}_sum{format_labels(labels)} {state[-2]:.6f}")
+                lines.append(f"{name}_count{format_labels(labels)} {state[-1]}")
+        
+        for name, (callback, label) in sorted(self.gauges.items()):
+            try:
+                value = callback()
+            except Exception as e:
+                logger.error(f"Error collecting metric {name}: {str(e)}")
+                continue
+            header(name, "gauge")
+            if isinstance(value, dict):
+                for label_value, v in sorted(value.items()):
+                    lines.append(f"{name}{format_labels([(label, label_value)])} {v:g}")
+            else:
+                lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+metrics = Metrics()
+metrics.describe("http_request_duration_seconds", "histogram", "Request latency by method, route and status")
+metrics.describe("stage_duration_seconds", "histogram", "Latency of internal processing stages")
+metrics.describe("stage_errors_total", "counter", "Stage calls that raised or reported failure")
+metrics.describe("sheets_api_calls_total", "counter", "Google Sheets API calls by method")
+metrics.describe("sheets_api_retries_total", "counter", "Google Sheets API calls retried after a 429/5xx")
+metrics.describe("sheets_api_errors_total", "counter", "Google Sheets API calls that failed for good")
+metrics.describe("webhook_duplicates_total", "counter", "Retried webhook deliveries answered with the original record")
+metrics.describe("response_cache_requests_total", "counter", "Response cache lookups by namespace and result")
+
+def timed_stage(stage: str):
+    """Decorator recording a method's latency as stage_duration_seconds{stage=...}.
+
+    Works on sync and async functions; a False return value or an exception
+    also counts as a stage error.
+    """
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            async def async_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception:
+                    metrics.inc("stage_errors_total", stage=stage)
+                    raise
+                finally:
+                    metrics.observe("stage_duration_seconds", time.perf_counter() - start, stage=stage)
+                if result is False:
+                    metrics.inc("stage_errors_total", stage=stage)
+                return result
+            wrapper = async_wrapper
+        else:
+            def sync_wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    result = func(*args, **kwargs)
+                except Exception:
+                    metrics.inc("stage_errors_total", stage=stage)
+                    raise
+                finally:
+                    metrics.observe("stage_duration_seconds", time.perf_counter() - start, stage=stage)
+                if result is False:
+                    metrics.inc("stage_errors_total", stage=stage)
+                return result
+            wrapper = sync_wrapper
+        return wraps(func)(wrapper)
+    return decorator
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per method, route template and status"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter()
+        status = 500
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; label by its template to bound cardinality
+            route = getattr(scope.get("route"), "path", "unmatched")
+            metrics.observe("http_request_duration_seconds", time.perf_counter() - start,
+                            method=scope["method"], route=route, status=str(status))
 
 def verify_api_key(request: Request):
     key = request.headers.get("X-API-Key")
     if key != API_KEY:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-app = FastAPI(title="Brokerage Load Search API with Google Sheets Integration")
+def chain_shutdown_signals(on_signal) -> Dict[int, Any]:
+    """Call on_signal on SIGINT/SIGTERM, then the handler that was installed before (the server's own).
+
+    Returns the replaced handlers for restore_signal_handlers. Handlers can
+    only be installed from the main thread; elsewhere (e.g. under a test
+    client) nothing is installed.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return {}
+    previous = {}
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        previous[signum] = signal.getsignal(signum)
+
+        def handler(signum, frame, chained=previous[signum]):
+            on_signal()
+            if callable(chained):
+                chained(signum, frame)
+            elif chained == signal.SIG_DFL:
+                # Nothing to chain to: let the default action end the process
+                signal.signal(signum, signal.SIG_DFL)
+                signal.raise_signal(signum)
+
+        signal.signal(signum, handler)
+    return previous
+
+def restore_signal_handlers(previous: Dict[int, Any]):
+    for signum, handler in previous.items():
+        signal.signal(signum, handler if handler is not None else signal.SIG_DFL)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background job workers on startup and stop them on shutdown"""
+    await asyncio.to_thread(load_book.reload)
+    await asyncio.to_thread(data_manager.store.open)
+    await asyncio.to_thread(data_manager.recover_ingest_log)
+    await asyncio.to_thread(data_manager.sheets_writer.resync)
+    await asyncio.to_thread(data_manager.refresh_analytics)
+    await data_manager.live.start()
+    previous_handlers = chain_shutdown_signals(data_manager.live.close_soon)
+    await job_queue.start()
+    try:
+        yield
+    finally:
+        restore_signal_handlers(previous_handlers)
+        await job_queue.stop()
+        await data_manager.live.stop()
+        await asyncio.to_thread(data_manager.ingest_writer.close)
+        await asyncio.to_thread(data_manager.save_analytics_snapshots, force=True)
+        data_manager.shutdown_executors()
+
+app = FastAPI(title="Brokerage Load Search API with Google Sheets Integration", lifespan=lifespan)
 
 # Allow HappyRobot to call this API
 app.add_middleware(
@@ -50,6 +448,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Sample in-memory load database
 loads = [
@@ -99,33 +498,3270 @@ class Load(BaseModel):
     num_of_pieces: int
     miles: int
     dimensions: str
+    deadhead_miles: Optional[float] = None
+
+def split_location(location: str) -> tuple:
+    """Split "Chicago, IL" into normalized ("chicago", "il") tokens"""
+    city, _, state = location.rpartition(",")
+    if not city:
+        return location.strip().lower(), ""
+    return city.strip().lower(), state.strip().lower()
+
+def pickup_bound(value: Optional[str], end_of_day: bool = False) -> Optional[str]:
+    """Normalize a pickup bound to the ISO form pickup_datetime is stored in.
+
+    The index compares ISO strings, so "2025-08-05" as an inclusive upper
+    bound would sort before every pickup that day; it is widened to the last
+    instant of the day. Values that do not parse are compared as given.
+    """
+    if not value:
+        return value
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return value
+    if end_of_day and "T" not in value and " " not in value.strip():
+        parsed = parsed.replace(hour=23, minute=59, second=59, microsecond=999999)
+    return parsed.isoformat()
+
+EARTH_RADIUS_MILES = 3958.8
+
+def haversine_miles(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance between two points in miles"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_MILES * math.asin(math.sqrt(a))
+
+def bearing_degrees(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Initial compass bearing from the first point to the second (0 = north)"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dlambda = math.radians(lon2 - lon1)
+    x = math.sin(dlambda) * math.cos(phi2)
+    y = math.cos(phi1) * math.sin(phi2) - math.sin(phi1) * math.cos(phi2) * math.cos(dlambda)
+    return (math.degrees(math.atan2(x, y)) + 360) % 360
+
+HEADINGS = {"north": 0.0, "east": 90.0, "south": 180.0, "west": 270.0}
+
+class Gazetteer:
+    """Offline city/ZIP lookup backed by the bundled gazetteer.csv"""
+
+    def __init__(self, path: str = GAZETTEER_FILE):
+        self.by_place: Dict[str, tuple] = {}
+        self.by_city: Dict[str, tuple] = {}
+        self.by_zip: Dict[str, tuple] = {}
+        if not os.path.exists(path):
+            logger.error(f"Gazetteer file not found: {path}")
+            return
+        
+        with open(path, 'r', newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                point = (float(row['latitude']), float(row['longitude']))
+                city, state = row['city'].strip().lower(), row['state'].strip().lower()
+                self.by_place[f"{city}, {state}"] = point
+                # The first entry wins for city names that exist in several states
+                self.by_city.setdefault(city, point)
+                self.by_zip[row['zip'].strip()] = point
+
+    def geocode(self, location: str) -> Optional[tuple]:
+        """Resolve "City, ST", a bare city name or a ZIP code to (lat, lon)"""
+        text = location.strip()
+        if text.isdigit():
+            return self.by_zip.get(text.zfill(5))
+        city, state = split_location(text)
+        if state:
+            return self.by_place.get(f"{city}, {state}")
+        return self.by_city.get(city)
+
+gazetteer = Gazetteer()
+
+class LoadIndex:
+    """Read-only search index over a list of loads.
+
+    Origins and destinations are lowercased once at build time and grouped by
+    distinct value, so the backward-compatible substring filters only scan the
+    distinct locations rather than every load. Exact lookups (load_id,
+    equipment_type, city and state tokens) use hash indexes, and
+    pickup_datetime, loadboard_rate and miles have sorted indexes for range
+    filters and ordering.
+
+    Origins and destinations are geocoded against the gazetteer at build time
+    and bucketed into a lat/lon grid keyed by distinct point, so radius queries
+    only compute distances for the handful of points in nearby cells.
+    """
+
+    SORTABLE_FIELDS = ("pickup_datetime", "loadboard_rate", "miles")
+
+    def __init__(self, loads: List[Dict[str, Any]], version: str = ""):
+        self.loads = loads
+        self.version = version  # Keys cached /search responses over this index
+        self.by_load_id: Dict[str, int] = {}
+        self.by_equipment: Dict[str, set] = {}
+        self.by_location: Dict[str, Dict[str, set]] = {"origin": {}, "destination": {}}
+        self.by_city: Dict[str, Dict[str, set]] = {"origin": {}, "destination": {}}
+        self.by_state: Dict[str, Dict[str, set]] = {"origin": {}, "destination": {}}
+        self.sorted_values: Dict[str, List[Any]] = {}
+        self.sorted_positions: Dict[str, List[int]] = {}
+        self.points: Dict[str, List[Optional[tuple]]] = {"origin": [], "destination": []}
+        self.grid: Dict[str, Dict[tuple, Dict[tuple, List[int]]]] = {"origin": {}, "destination": {}}
+        self.bearings: List[Optional[float]] = []
+        
+        for pos, load in enumerate(loads):
+            for side in ("origin", "destination"):
+                point = gazetteer.geocode(load[side])
+                self.points[side].append(point)
+                if point is not None:
+                    cell = self._cell(*point)
+                    self.grid[side].setdefault(cell, {}).setdefault(point, []).append(pos)
+            origin_point, destination_point = self.points["origin"][pos], self.points["destination"][pos]
+            self.bearings.append(bearing_degrees(*origin_point, *destination_point)
+                                 if origin_point and destination_point else None)
+
+            # load_ids are unique in the load book; a later duplicate wins
+            self.by_load_id[str(load["load_id"])] = pos
+            self.by_equipment.setdefault(load["equipment_type"].lower(), set()).add(pos)
+            for side in ("origin", "destination"):
+                city, state = split_location(load[side])
+                self.by_location[side].setdefault(load[side].lower(), set()).add(pos)
+                self.by_city[side].setdefault(city, set()).add(pos)
+                self.by_state[side].setdefault(state, set()).add(pos)
+        
+        for field in self.SORTABLE_FIELDS:
+            order = sorted(range(len(loads)), key=lambda pos: loads[pos][field])
+            self.sorted_positions[field] = order
+            self.sorted_values[field] = [loads[pos][field] for pos in order]
+
+    def __len__(self) -> int:
+        return len(self.loads)
+
+    def _substring(self, side: str, text: str) -> set:
+        needle = text.lower()
+        matches = set()
+        for location, positions in self.by_location[side].items():
+            if needle in location:
+                matches.update(positions)
+        return matches
+
+    @staticmethod
+    def _cell(lat: float, lon: float) -> tuple:
+        return (math.floor(lat / GEO_CELL_DEGREES), math.floor(lon / GEO_CELL_DEGREES))
+
+    def _near(self, side: str, point: tuple, radius: float) -> Dict[tuple, float]:
+        """Distances to every indexed point on this side within radius miles"""
+        lat, lon = point
+        lat_span = radius / 69.0
+        lon_span = radius / max(69.0 * math.cos(math.radians(lat)), 1.0)
+        min_cell = self._cell(lat - lat_span, lon - lon_span)
+        max_cell = self._cell(lat + lat_span, lon + lon_span)
+        grid = self.grid[side]
+        distances = {}
+        for cell_lat in range(min_cell[0], max_cell[0] + 1):
+            for cell_lon in range(min_cell[1], max_cell[1] + 1):
+                for candidate in grid.get((cell_lat, cell_lon), {}):
+                    distance = haversine_miles(lat, lon, *candidate)
+                    if distance <= radius:
+                        distances[candidate] = distance
+        return distances
+
+    def _positions_at(self, side: str, points) -> set:
+        matches = set()
+        for point in points:
+            matches.update(self.grid[side][self._cell(*point)][point])
+        return matches
+
+    def _range_bounds(self, field: str, low: Any, high: Any) -> tuple:
+        values = self.sorted_values[field]
+        lo = bisect.bisect_left(values, low) if low is not None else 0
+        hi = bisect.bisect_right(values, high) if high is not None else len(values)
+        return lo, hi
+
+    def search(self, load_id: Optional[str] = None, origin: Optional[str] = None,
+               destination: Optional[str] = None, equipment_type: Optional[str] = None,
+               origin_city: Optional[str] = None, origin_state: Optional[str] = None,
+               destination_city: Optional[str] = None, destination_state: Optional[str] = None,
+               min_rate: Optional[float] = None, max_rate: Optional[float] = None,
+               min_miles: Optional[int] = None, max_miles: Optional[int] = None,
+               pickup_from: Optional[str] = None, pickup_to: Optional[str] = None,
+               pickup_point: Optional[tuple] = None, pickup_radius: float = GEO_DEFAULT_RADIUS_MILES,
+               drop_point: Optional[tuple] = None, drop_radius: float = GEO_DEFAULT_RADIUS_MILES,
+               heading: Optional[str] = None, sort_by: Optional[str] = None, descending: bool = False,
+               limit: Optional[int] = None, offset: int = 0) -> List[Dict[str, Any]]:
+        """Return matching loads.
+
+        Results are in board order, or ranked by deadhead distance when a pickup
+        point is given, unless sort_by is set.
+        """
+        empty = set()
+        candidate_sets = []
+        if load_id:
+            candidate_sets.append({self.by_load_id[load_id]} if load_id in self.by_load_id else empty)
+        if equipment_type:
+            candidate_sets.append(self.by_equipment.get(equipment_type.lower(), empty))
+        for side, city, state in (("origin", origin_city, origin_state),
+                                  ("destination", destination_city, destination_state)):
+            if city:
+                candidate_sets.append(self.by_city[side].get(city.strip().lower(), empty))
+            if state:
+                candidate_sets.append(self.by_state[side].get(state.strip().lower(), empty))
+        if origin:
+            candidate_sets.append(self._substring("origin", origin))
+        if destination:
+            candidate_sets.append(self._substring("destination", destination))
+        if drop_point is not None:
+            candidate_sets.append(self._positions_at("destination", self._near("destination", drop_point, drop_radius)))
+        
+        pickup_from, pickup_to = pickup_bound(pickup_from), pickup_bound(pickup_to, end_of_day=True)
+        ranges = []
+        for field, low, high in (("loadboard_rate", min_rate, max_rate), ("miles", min_miles, max_miles),
+                                 ("pickup_datetime", pickup_from, pickup_to)):
+            if low is not None or high is not None:
+                ranges.append((field, low, high, self._range_bounds(field, low, high)))
+        ranges.sort(key=lambda r: r[3][1] - r[3][0])
+        
+        candidates = None
+        if candidate_sets:
+            candidate_sets.sort(key=len)
+            candidates = candidate_sets[0].intersection(*candidate_sets[1:])
+        if ranges and (candidates is None or len(candidates) > ranges[0][3][1] - ranges[0][3][0]):
+            # The narrowest range is more selective than the hash lookups
+            field, _, _, (lo, hi) = ranges.pop(0)
+            in_range = set(self.sorted_positions[field][lo:hi])
+            candidates = in_range if candidates is None else candidates & in_range
+        for field, low, high, _ in ranges:
+            candidates = {
+                pos for pos in candidates
+                if (low is None or self.loads[pos][field] >= low) and (high is None or self.loads[pos][field] <= high)
+            }
+        
+        def keep(pos):
+            if candidates is not None and pos not in candidates:
+                return False
+            if heading:
+                bearing = self.bearings[pos]
+                return bearing is not None and abs((bearing - HEADINGS[heading] + 180) % 360 - 180) <= 45
+            return True
+        
+        end = offset + limit if limit is not None else None
+        if pickup_point is not None:
+            deadheads = self._near("origin", pickup_point, pickup_radius)
+            if not sort_by:
+                # Walk pickup points nearest-first so only the loads we return are touched
+                ranked = (
+                    (pos, distance)
+                    for point, distance in sorted(deadheads.items(), key=lambda item: item[1])
+                    for pos in self.grid["origin"][self._cell(*point)][point] if keep(pos)
+                )
+                return [
+                    dict(self.loads[pos], deadhead_miles=round(distance, 1))
+                    for pos, distance in itertools.islice(ranked, offset, end)
+                ]
+            near_pickup = self._positions_at("origin", deadheads)
+            candidates = near_pickup if candidates is None else candidates & near_pickup
+        
+        if heading and candidates is None:
+            positions = (pos for pos in range(len(self.loads)) if keep(pos))
+            if sort_by:
+                positions = sorted(positions, key=lambda pos: self.loads[pos][sort_by], reverse=descending)
+            return [self.loads[pos] for pos in itertools.islice(positions, offset, end)]
+        if heading:
+            candidates = {pos for pos in candidates if keep(pos)}
+        
+        if sort_by and candidates is not None and len(candidates) * 8 < len(self.loads):
+            # Few candidates: sorting them directly beats walking the whole sorted index
+            positions = sorted(candidates, key=lambda pos: self.loads[pos][sort_by], reverse=descending)
+        elif sort_by:
+            order = self.sorted_positions[sort_by]
+            if descending:
+                order = reversed(order)
+            positions = (pos for pos in order if candidates is None or pos in candidates)
+        elif candidates is None:
+            positions = range(len(self.loads))
+        else:
+            positions = sorted(candidates)
+        
+        return [self.loads[pos] for pos in itertools.islice(positions, offset, end)]
+
+LOAD_FIELDS = [
+    "load_id", "origin", "destination", "pickup_datetime", "delivery_datetime", "equipment_type",
+    "loadboard_rate", "notes", "weight", "commodity_type", "num_of_pieces", "miles", "dimensions"
+]
+
+def validate_loads(rows: List[Dict[str, Any]]) -> tuple:
+    """Validate raw rows against the Load model, returning (loads, rejected)"""
+    valid, rejected = [], []
+    for i, row in enumerate(rows):
+        try:
+            load = Load(**row)
+        except Exception as e:
+            rejected.append({"index": i, "load_id": row.get("load_id") if isinstance(row, dict) else None,
+                             "error": str(e)})
+            continue
+        # Interning shares the many repeated city, equipment and date strings across loads
+        valid.append({
+            field: sys.intern(value) if isinstance(value, str) else value
+            for field, value in load.model_dump(exclude={"deadhead_miles"}).items()
+        })
+    return valid, rejected
+
+class JSONLoadSource:
+    """Load book stored as a JSON array (or {"loads": [...]}) in a file"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def read(self) -> List[Dict[str, Any]]:
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data.get("loads", []) if isinstance(data, dict) else data
+
+    def apply(self, book: Dict[str, Dict[str, Any]], upserted: List[Dict[str, Any]], expired: List[str]):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(list(book.values()), f)
+        os.replace(tmp_path, self.path)
+
+class CSVLoadSource:
+    """Load book stored as a CSV file with one column per Load field"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def read(self) -> List[Dict[str, Any]]:
+        with open(self.path, 'r', newline='', encoding='utf-8') as f:
+            return list(csv.DictReader(f))
+
+    def apply(self, book: Dict[str, Dict[str, Any]], upserted: List[Dict[str, Any]], expired: List[str]):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=LOAD_FIELDS)
+            writer.writeheader()
+            writer.writerows(book.values())
+        os.replace(tmp_path, self.path)
+
+class SQLiteLoadSource:
+    """Load book stored in a "loads" table of a local SQLite database"""
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        columns = ", ".join(f"{field} TEXT" if field != "load_id" else "load_id TEXT PRIMARY KEY"
+                            for field in LOAD_FIELDS)
+        conn.execute(f"CREATE TABLE IF NOT EXISTS loads ({columns})")
+        return conn
+
+    def read(self) -> List[Dict[str, Any]]:
+        conn = self._connect()
+        try:
+            return [dict(row) for row in conn.execute("SELECT * FROM loads ORDER BY rowid")]
+        finally:
+            conn.close()
+
+    def apply(self, book: Dict[str, Dict[str, Any]], upserted: List[Dict[str, Any]], expired: List[str]):
+        placeholders = ", ".join("?" for _ in LOAD_FIELDS)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(f"INSERT OR REPLACE INTO loads ({', '.join(LOAD_FIELDS)}) VALUES ({placeholders})",
+                                 [[load[field] for field in LOAD_FIELDS] for load in upserted])
+                conn.executemany("DELETE FROM loads WHERE load_id = ?", [(load_id,) for load_id in expired])
+        finally:
+            conn.close()
+
+def create_load_source(path: str):
+    """Pick the load book source implementation from the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        return JSONLoadSource(path)
+    if extension == ".csv":
+        return CSVLoadSource(path)
+    if extension in (".db", ".sqlite", ".sqlite3"):
+        return SQLiteLoadSource(path)
+    raise ValueError(f"Unsupported load book source: {path}")
+
+class LoadBook:
+    """The live load inventory behind /search.
+
+    Loads are read from a JSON, CSV or SQLite source, validated against the
+    Load model and indexed off to the side; the finished LoadIndex is then
+    swapped in with a single reference assignment, so in-flight searches keep
+    using the index they started with. Upserts and expiries by load_id are
+    written back to the source, and the source file is polled for external
+    changes.
+    """
+
+    def __init__(self, source_path: str = LOAD_BOOK_SOURCE, initial_loads: Optional[List[Dict[str, Any]]] = None):
+        self.source_path = source_path
+        self.source = create_load_source(source_path)
+        self.book: Dict[str, Dict[str, Any]] = {str(l["load_id"]): l for l in initial_loads or []}
+        self._generations = itertools.count(1)
+        self.index = LoadIndex(list(self.book.values()), self._next_version())
+        self.loaded_mtime: Optional[float] = None
+        self.last_reload_seconds = 0.0
+        self.last_rejected: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _source_mtime(self) -> Optional[float]:
+        try:
+            return os.path.getmtime(self.source_path)
+        except OSError:
+            return None
+
+    def source_changed(self) -> bool:
+        """Whether the source file was modified since it was last read or written"""
+        mtime = self._source_mtime()
+        return mtime is not None and mtime != self.loaded_mtime
+
+    def _next_version(self) -> str:
+        """Version for a new index, so cached /search responses never outlive the loads they came from.
+
+        A shared response cache needs a content digest that every worker and
+        machine agrees on; an in-process one only needs a fresh value per swap,
+        which is much cheaper than hashing a large book.
+        """
+        if RESPONSE_CACHE_URL:
+            return hashlib.sha1(json.dumps(list(self.book.values()), default=str).encode()).hexdigest()
+        return f"{os.getpid()}-{next(self._generations)}"
+
+    def _swap(self):
+        start = time.perf_counter()
+        index = LoadIndex(list(self.book.values()), self._next_version())
+        self.index = index
+        self.last_reload_seconds = time.perf_counter() - start
+
+    def reload(self) -> bool:
+        """Re-read the whole source and atomically replace the index"""
+        with self._lock:
+            mtime = self._source_mtime()
+            if mtime is None:
+                logger.info(f"Load book source {self.source_path} not found, keeping {len(self.book)} loads")
+                return False
+            
+            try:
+                rows = self.source.read()
+            except Exception as e:
+                logger.error(f"Error reading load book {self.source_path}: {str(e)}")
+                return False
+            
+            valid, rejected = validate_loads(rows)
+            self.book = {load["load_id"]: load for load in valid}
+            self._swap()
+            self.loaded_mtime = mtime
+            self.last_rejected = rejected
+        
+        if rejected:
+            logger.warning(f"Skipped {len(rejected)} invalid loads from {self.source_path}")
+        logger.info(f"Loaded {len(self.book)} loads from {self.source_path} in {self.last_reload_seconds:.2f}s")
+        return True
+
+    def apply(self, rows: Optional[List[Dict[str, Any]]] = None, expire: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Upsert loads and expire load_ids, persist them and swap in a new index"""
+        valid, rejected = validate_loads(rows or [])
+        with self._lock:
+            expired = [str(load_id) for load_id in expire or [] if str(load_id) in self.book]
+            for load_id in expired:
+                del self.book[load_id]
+            for load in valid:
+                self.book[load["load_id"]] = load
+            if valid or expired:
+                self.source.apply(self.book, valid, expired)
+                self.loaded_mtime = self._source_mtime()
+                self._swap()
+        
+        logger.info(f"Load book updated: {len(valid)} upserted, {len(expired)} expired, {len(rejected)} rejected")
+        return {"upserted": len(valid), "expired": len(expired), "rejected": rejected, "total_loads": len(self.book)}
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "source": self.source_path,
+            "loads": len(self.index),
+            "version": self.index.version[:12],
+            "last_reload_seconds": round(self.last_reload_seconds, 3),
+            "rejected_on_last_reload": len(self.last_rejected)
+        }
+
+# Live load book; starts from the sample loads until the source is read at startup
+load_book = LoadBook(LOAD_BOOK_SOURCE, initial_loads=loads)
+
+class WebhookData(BaseModel):
+    timestamp: str
+    booking_intent: Optional[str]
+    counter_offer: Optional[str]
+    agreed_rate: Optional[str]
+    negotiation_attempts: Optional[str]
+    sentiment: Optional[str]
+    call_outcome: Optional[str]
+    raw_payload: Optional[Dict[str, Any]]
+
+# "$2,100.50", "2100", "2.1k USD": the whole value is one number, optionally with a currency mark
+CLEAN_NUMBER_PATTERN = re.compile(
+    r'^(?:usd|us\$|\$)?\s*([-+]?(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?|[-+]?\.\d+)\s*(k)?\s*(?:usd|dollars?)?$',
+    re.IGNORECASE
+)
+# Otherwise the first number in the text is used, e.g. "about 2,100 per load"
+NUMBER_PATTERN = re.compile(r'(?:\d{1,3}(?:,\d{3})+(?!\d)|\d+)(?:\.\d+)?')
+
+def finite_number(number: Any, status: str) -> tuple:
+    """(float, status), or (None, "invalid") for NaN, infinities and values beyond float range"""
+    try:
+        number = float(number)
+    except OverflowError:
+        return None, "invalid"
+    return (number, status) if math.isfinite(number) else (None, "invalid")
+
+def parse_number(value: Any) -> tuple:
+    """Parse a free-form numeric value once; returns (number, status).
+
+    Status is "ok" for a clean number, "partial" when it was taken from
+    surrounding text, "invalid" when there is no usable number (including
+    NaN and anything too large for a float) and "empty".
+    """
+    if value is None:
+        return None, "empty"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return finite_number(value, "ok")
+    text = str(value).strip()
+    if not text:
+        return None, "empty"
+    match = CLEAN_NUMBER_PATTERN.match(text)
+    if match:
+        number, status = finite_number(match.group(1).replace(",", ""), "ok")
+        if number is not None and match.group(2):
+            return finite_number(number * 1000, status)
+        return number, status
+    match = NUMBER_PATTERN.search(text)
+    if match:
+        return finite_number(match.group(0).replace(",", ""), "partial")
+    return None, "invalid"
+
+def parse_numeric_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Typed columns for a record's rate and attempt fields plus its overall numeric_status"""
+    columns, statuses = {}, set()
+    for field, column in NUMERIC_FIELDS.items():
+        value, status = parse_number(data.get(field))
+        if field == "negotiation_attempts" and value is not None:
+            if not value.is_integer():
+                status = "partial"
+            value = int(value)
+        columns[column] = value
+        statuses.add(status)
+    columns["numeric_status"] = next((s for s in NUMERIC_STATUSES if s in statuses), "empty")
+    return columns
+
+def typed_numeric_fields(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Restore typed columns read back as text, parsing rows stored before the columns existed"""
+    if not record.get("numeric_status"):
+        record.update(parse_numeric_fields(record))
+        return record
+    for column in NUMERIC_FIELDS.values():
+        value = record.get(column)
+        record[column] = float(value) if value not in (None, "") else None
+    attempts = record["negotiation_attempts_value"]
+    record["negotiation_attempts_value"] = int(attempts) if attempts is not None else None
+    return record
+
+class CompactRecord:
+    """Read-only record from a bulk store read, without a dict of strings per row.
+
+    Fields live in slots and the categorical values are interned, so every
+    row shares one copy of "positive" or "booked". raw_payload is not held:
+    it is read back from the store by row reference when it is asked for,
+    unless the read was made with the payload included. Supports the mapping
+    methods the analytics code uses; dict(record) gives the plain form.
+    """
+
+    __slots__ = tuple(COMPACT_FIELDS) + ("_payload", "_store", "_ref")
+
+    _fields = frozenset(STORED_FIELDS)
+
+    def __init__(self, values, payload: Optional[str] = None, store=None, ref=None):
+        for field, value in zip(COMPACT_FIELDS, values):
+            setattr(self, field, value)
+        for field in CATEGORICAL_FIELDS:
+            value = getattr(self, field)
+            if type(value) is str:
+                setattr(self, field, sys.intern(value))
+        self._payload = payload
+        self._store = store
+        self._ref = ref
+
+    @property
+    def raw_payload(self) -> Optional[str]:
+        if self._payload is not None or self._store is None:
+            return self._payload
+        return self._store.load_raw_payload(self._ref)
+
+    def __getitem__(self, field: str):
+        if field not in self._fields:
+            raise KeyError(field)
+        return getattr(self, field)
+
+    def get(self, field: str, default=None):
+        return getattr(self, field) if field in self._fields else default
+
+    def __contains__(self, field) -> bool:
+        return field in self._fields
+
+    def __iter__(self):
+        return iter(STORED_FIELDS)
+
+    def __len__(self) -> int:
+        return len(STORED_FIELDS)
+
+    def keys(self) -> List[str]:
+        return list(STORED_FIELDS)
+
+    def items(self):
+        return [(field, getattr(self, field)) for field in STORED_FIELDS]
+
+    def __repr__(self) -> str:
+        return f"CompactRecord(id={self.id!r}, timestamp={self.timestamp!r})"
+
+class IdAllocator:
+    """Hands out record ids from a counter instead of rescanning the CSV.
+
+    The counter lives in memory and in a sidecar file next to the data file.
+    Allocation takes a thread lock plus an exclusive file lock, so concurrent
+    requests and multiple uvicorn workers never receive the same id. On first
+    use the counter is seeded from the sidecar file or, failing that, from the
+    last row of the data file.
+    """
+
+    TAIL_BYTES = 64 * 1024
+
+    def __init__(self, data_file: str, counter_file: Optional[str] = None):
+        self.data_file = data_file
+        self.counter_file = counter_file or f"{data_file}.seq"
+        self.lock_file = f"{self.counter_file}.lock"
+        self.current: Optional[int] = None
+        self._thread_lock = threading.RLock()
+        self._lock_depth = 0
+        self._lock_fd = None
+
+    @contextmanager
+    def lock(self):
+        """Hold the allocator lock across threads and processes"""
+        with self._thread_lock:
+            if self._lock_depth == 0 and fcntl is not None:
+                self._lock_fd = open(self.lock_file, 'a')
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0 and self._lock_fd is not None:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                    self._lock_fd.close()
+                    self._lock_fd = None
+
+    def _read_counter(self) -> Optional[int]:
+        try:
+            with open(self.counter_file, 'r', encoding='utf-8') as f:
+                return int(f.read().strip())
+        except (OSError, ValueError):
+            return None
+
+    def _write_counter(self, value: int):
+        tmp_path = f"{self.counter_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(str(value))
+        os.replace(tmp_path, self.counter_file)
+
+    def _last_id_from_data_file(self) -> int:
+        """Read the id of the last row from the tail of the data file"""
+        if not os.path.exists(self.data_file):
+            return 0
+        
+        with open(self.data_file, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            f.seek(max(0, size - self.TAIL_BYTES))
+            tail = f.read().decode('utf-8', errors='ignore')
+        
+        for line in reversed(tail.splitlines()):
+            if not line.strip():
+                continue
+            try:
+                return int(next(csv.reader([line]))[0])
+            except (ValueError, IndexError, StopIteration):
+                break
+        
+        # Header only, or a last row we could not parse: fall back to one full scan
+        with open(self.data_file, 'r', newline='', encoding='utf-8') as f:
+            return max((int(r['id']) for r in csv.DictReader(f) if r.get('id', '').isdigit()), default=0)
+
+    def seed(self) -> int:
+        """Load the counter from the sidecar file or the data file tail"""
+        with self.lock():
+            stored = self._read_counter()
+            self.current = max(stored or 0, self._last_id_from_data_file())
+            if stored != self.current:
+                self._write_counter(self.current)
+            logger.info(f"Seeded record id counter at {self.current}")
+            return self.current
+
+    def allocate(self, count: int = 1) -> int:
+        """Reserve count consecutive ids and return the first one"""
+        with self.lock():
+            if self.current is None:
+                self.seed()
+            elif fcntl is not None:
+                # Another worker process may have advanced the shared counter
+                self.current = max(self.current, self._read_counter() or 0)
+            first = self.current + 1
+            self.current += count
+            self._write_counter(self.current)
+            return first
+
+class CSVStore:
+    """Append-only CSV record store (the original storage format)"""
+
+    name = "csv"
+    RAW_PAYLOAD_COLUMN = STORED_FIELDS.index("raw_payload")
+
+    def __init__(self, path: str = CSV_FILE):
+        self.path = path
+        self.id_allocator = IdAllocator(path)
+        # Idempotency keys live in a sidecar file of "key,record_id,created_at" lines
+        self.keys_path = f"{path}.keys"
+        self.keys: Dict[str, tuple] = {}
+        self._keys_offset = 0
+
+    def describe(self) -> str:
+        return f"{self.name}:{os.path.abspath(self.path)}"
+
+    def open(self):
+        self.id_allocator.seed()
+        with self.id_allocator.lock():
+            self._read_new_keys()
+
+    def _read_new_keys(self):
+        """Pick up keys appended to the sidecar file, including by other workers (caller holds the lock)"""
+        if not os.path.exists(self.keys_path):
+            self.keys, self._keys_offset = {}, 0
+            return
+        with open(self.keys_path, 'r', newline='', encoding='utf-8') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < self._keys_offset:
+                # Rewritten by a purge in another worker
+                self.keys, self._keys_offset = {}, 0
+            f.seek(self._keys_offset)
+            for row in csv.reader(f):
+                if len(row) == 3:
+                    self.keys[row[0]] = (int(row[1]), float(row[2]))
+            self._keys_offset = f.tell()
+
+    def append_once(self, data: Dict[str, Any], key: str, ttl: float) -> tuple:
+        """Append unless the idempotency key was seen within ttl; returns (record, created)"""
+        now = time.time()
+        with self.id_allocator.lock():
+            self._read_new_keys()
+            seen = self.keys.get(key)
+            if seen is not None and seen[1] >= now - ttl:
+                return {"id": seen[0]}, False
+            record = self.append(data)
+            with open(self.keys_path, 'a', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerow([key, record['id'], now])
+            self._read_new_keys()
+        return record, True
+
+    def purge_keys(self, before: float) -> int:
+        """Drop idempotency keys created before a timestamp"""
+        with self.id_allocator.lock():
+            self._read_new_keys()
+            expired = [k for k, (_, created_at) in self.keys.items() if created_at < before]
+            if not expired:
+                return 0
+            for k in expired:
+                del self.keys[k]
+            tmp_path = f"{self.keys_path}.tmp"
+            with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerows([k, record_id, created_at] for k, (record_id, created_at) in self.keys.items())
+            os.replace(tmp_path, self.keys_path)
+            self._keys_offset = os.path.getsize(self.keys_path)
+        return len(expired)
+
+    def _write_rows(self, rows: List[Dict[str, Any]]):
+        """Append rows in one write, adding the header to a new file (caller holds the lock)"""
+        file_exists = os.path.isfile(self.path) and os.path.getsize(self.path) > 0
+        for data in rows:
+            data.update(parse_numeric_fields(data))
+        
+        with open(self.path, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=STORED_FIELDS)
+            if not file_exists:
+                writer.writeheader()
+            writer.writerows(rows)
+
+    def append(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        # Hold the allocator lock across the append so rows land in id order
+        with self.id_allocator.lock():
+            record_id = self.id_allocator.allocate()
+            data['id'] = record_id
+            self._write_rows([data])
+        
+        logger.info(f"Saved record {record_id} to CSV")
+        return data
+
+    def append_many(self, records: List[Dict[str, Any]], keys: List[Optional[str]], ttl: float) -> List[tuple]:
+        """Append a batch with one id allocation and one write; returns (record, created) per input.
+
+        Records whose idempotency key was already stored, or repeated earlier in
+        the batch, are returned with the original id instead.
+        """
+        now = time.time()
+        with self.id_allocator.lock():
+            self._read_new_keys()
+            # (record, created) per input; a duplicate holds the record that owns its id
+            outcomes, new_rows, owners = [], [], {}
+            for data, key in zip(records, keys):
+                if key is not None:
+                    stored = self.keys.get(key)
+                    if key in owners:
+                        outcomes.append((owners[key], False))
+                        continue
+                    if stored is not None and stored[1] >= now - ttl:
+                        outcomes.append(({"id": stored[0]}, False))
+                        continue
+                    owners[key] = data
+                new_rows.append((data, key))
+                outcomes.append((data, True))
+            
+            if new_rows:
+                first_id = self.id_allocator.allocate(len(new_rows))
+                for offset, (data, _) in enumerate(new_rows):
+                    data['id'] = first_id + offset
+                self._write_rows([data for data, _ in new_rows])
+                key_rows = [[key, data['id'], now] for data, key in new_rows if key is not None]
+                if key_rows:
+                    with open(self.keys_path, 'a', newline='', encoding='utf-8') as f:
+                        csv.writer(f).writerows(key_rows)
+                self._read_new_keys()
+        
+        results = [(record, True) if created else ({"id": record['id']}, False) for record, created in outcomes]
+        logger.info(f"Saved {len(new_rows)} records to CSV in one batch")
+        return results
+
+    def _read_rows(self, lines):
+        """Parse CSV lines into typed records.
+
+        Files started before the typed columns existed keep their shorter
+        header, so columns are always read by position and old rows are parsed.
+        """
+        for record in csv.DictReader(lines, fieldnames=STORED_FIELDS):
+            if record['id'] != 'id':
+                yield typed_numeric_fields(record)
+
+    def _compact(self, row: List[str], offset: int, with_payload: bool) -> CompactRecord:
+        record = typed_numeric_fields(dict(zip(STORED_FIELDS, row)))
+        values = [record.get(field) for field in COMPACT_FIELDS]
+        if with_payload:
+            return CompactRecord(values, record.get('raw_payload'))
+        return CompactRecord(values, store=self, ref=offset)
+
+    def load_raw_payload(self, offset: int) -> Optional[str]:
+        """Read one row's raw_payload back from the byte offset the row starts at"""
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            row = next(csv.reader(line.decode('utf-8') for line in f), [])
+        return row[self.RAW_PAYLOAD_COLUMN] if len(row) > self.RAW_PAYLOAD_COLUMN else None
+
+    def get_all_records(self, with_payload: bool = False) -> List[CompactRecord]:
+        return self.read_new_records(0, with_payload)[0]
+
+    def records_after_id(self, record_id: int, with_payload: bool = False) -> List[CompactRecord]:
+        return [r for r in self.get_all_records(with_payload) if int(r.get('id', 0)) > record_id]
+
+    def version(self) -> str:
+        """Changes whenever a record is appended"""
+        return str(os.path.getsize(self.path)) if os.path.exists(self.path) else "0"
+
+    def query_records(self, after_id: int = 0, limit: Optional[int] = None, start: Optional[str] = None,
+                      end: Optional[str] = None, **equals):
+        """Yield records in id order matching the filters, one at a time"""
+        if not os.path.exists(self.path):
+            return
+        
+        matched = 0
+        with open(self.path, 'r', newline='', encoding='utf-8') as f:
+            for record in self._read_rows(f):
+                if int(record.get('id') or 0) <= after_id:
+                    continue
+                if not record_matches(record, start, end, equals):
+                    continue
+                yield record
+                matched += 1
+                if limit is not None and matched >= limit:
+                    return
+
+    def read_new_records(self, cursor: int = 0, with_payload: bool = False, limit: Optional[int] = None):
+        """Read records appended after a byte offset in the CSV file.
+
+        Returns compact records, at most limit of them, and the offset to
+        resume from. The file is streamed row by row and only complete lines
+        are consumed, so a row that is still being written is picked up next
+        time. Each record remembers the offset of its row to read raw_payload
+        back from, unless with_payload asks for it up front.
+        """
+        if not os.path.exists(self.path):
+            return [], 0
+        
+        records = []
+        with open(self.path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() < cursor:
+                # The file was replaced or truncated; tell the caller to start over
+                return [], 0
+            f.seek(cursor)
+            position = row_start = cursor
+            exhausted = False
+
+            def complete_lines():
+                nonlocal position, exhausted
+                for line in f:
+                    if not line.endswith(b'\n'):
+                        break
+                    position += len(line)
+                    yield line.decode('utf-8')
+                exhausted = True
+
+            for row in csv.reader(complete_lines()):
+                if exhausted:
+                    # The reader only hands back a row after running out of lines when a quoted
+                    # field (e.g. a multi-line raw_payload) is still being written
+                    break
+                if row and row[0] != 'id':
+                    records.append(self._compact(row, row_start, with_payload))
+                row_start = position
+                if limit is not None and len(records) >= limit:
+                    break
+        return records, row_start
+
+class SQLiteStore:
+    """SQLite record store in WAL mode.
+
+    WAL lets any number of readers run alongside the single writer. Each thread
+    gets its own connection; writes are serialized in-process by a lock and
+    across processes by SQLite itself (with a busy timeout). Record ids come
+    from the INTEGER PRIMARY KEY, so no separate allocator is needed.
+    """
+
+    name = "sqlite"
+    INDEXED_FIELDS = ["timestamp", "call_outcome", "booking_intent", "sentiment"]
+    TYPED_COLUMNS = {
+        "counter_offer_value": "REAL",
+        "agreed_rate_value": "REAL",
+        "negotiation_attempts_value": "INTEGER",
+        "numeric_status": "TEXT"
+    }
+    RAW_PAYLOAD_INDEX = STORED_FIELDS.index("raw_payload") - 1
+    BACKFILL_BATCH_SIZE = 5000
+
+    def __init__(self, path: str = SQLITE_FILE):
+        self.path = path
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._opened = False
+
+    def describe(self) -> str:
+        return f"{self.name}:{os.path.abspath(self.path)}"
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def open(self):
+        """Create the schema and migrate an existing CSV file on first start"""
+        if self._opened:
+            return
+        conn = self.connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                id INTEGER PRIMARY KEY,
+                timestamp TEXT,
+                booking_intent TEXT,
+                counter_offer TEXT,
+                agreed_rate TEXT,
+                negotiation_attempts TEXT,
+                sentiment TEXT,
+                call_outcome TEXT,
+                raw_payload TEXT,
+                counter_offer_value REAL,
+                agreed_rate_value REAL,
+                negotiation_attempts_value INTEGER,
+                numeric_status TEXT
+            )
+        """)
+        existing = {row["name"] for row in conn.execute("PRAGMA table_info(records)")}
+        for column, column_type in self.TYPED_COLUMNS.items():
+            if column not in existing:
+                try:
+                    conn.execute(f"ALTER TABLE records ADD COLUMN {column} {column_type}")
+                except sqlite3.OperationalError as e:
+                    # Another worker added it first
+                    if "duplicate column" not in str(e):
+                        raise
+        for field in self.INDEXED_FIELDS:
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_records_{field} ON records ({field})")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                key TEXT PRIMARY KEY,
+                record_id INTEGER NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_idempotency_keys_created_at ON idempotency_keys (created_at)")
+        self._opened = True
+        migrate_csv_to_sqlite(CSV_FILE, self)
+        self.backfill_numeric_fields()
+
+    def backfill_numeric_fields(self) -> int:
+        """Parse the typed columns for rows stored before they existed"""
+        conn = self.connection()
+        updated = 0
+        while True:
+            rows = conn.execute(
+                "SELECT id, counter_offer, agreed_rate, negotiation_attempts FROM records "
+                "WHERE numeric_status IS NULL LIMIT ?", (self.BACKFILL_BATCH_SIZE,)
+            ).fetchall()
+            if not rows:
+                break
+            updates = []
+            for row in rows:
+                columns = parse_numeric_fields(dict(row))
+                updates.append([columns[c] for c in self.TYPED_COLUMNS] + [row["id"]])
+            assignments = ", ".join(f"{c} = ?" for c in self.TYPED_COLUMNS)
+            with self._write_lock:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    conn.executemany(f"UPDATE records SET {assignments} WHERE id = ?", updates)
+                    conn.execute("COMMIT")
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+            updated += len(rows)
+        if updated:
+            logger.info(f"Backfilled typed numeric columns for {updated} records")
+        return updated
+
+    @staticmethod
+    def _record(row: sqlite3.Row) -> Dict[str, Any]:
+        record = dict(row)
+        # Rows inserted around the store (e.g. by hand) are parsed on read until the next backfill
+        return record if record["numeric_status"] is not None else typed_numeric_fields(record)
+
+    def _row_values(self, data: Dict[str, Any]) -> List[Any]:
+        data.update(parse_numeric_fields(data))
+        values = [data.get(field) for field in STORED_FIELDS[1:]]
+        raw_payload = values[self.RAW_PAYLOAD_INDEX]
+        if raw_payload is not None and not isinstance(raw_payload, str):
+            values[self.RAW_PAYLOAD_INDEX] = json.dumps(raw_payload)
+        return values
+
+    def _insert(self, conn: sqlite3.Connection, data: Dict[str, Any]) -> int:
+        placeholders = ", ".join("?" for _ in STORED_FIELDS[1:])
+        cursor = conn.execute(
+            f"INSERT INTO records ({', '.join(STORED_FIELDS[1:])}) VALUES ({placeholders})",
+            self._row_values(data)
+        )
+        return cursor.lastrowid
+
+    def append(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        self.open()
+        with self._write_lock:
+            data['id'] = self._insert(self.connection(), data)
+        logger.info(f"Saved record {data['id']} to SQLite")
+        return data
+
+    def append_once(self, data: Dict[str, Any], key: str, ttl: float) -> tuple:
+        """Append unless the idempotency key was seen within ttl; returns (record, created).
+
+        The key check, the insert and the key row share one IMMEDIATE
+        transaction, so concurrent deliveries from any worker store one record.
+        """
+        self.open()
+        conn = self.connection()
+        now = time.time()
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT record_id FROM idempotency_keys WHERE key = ? AND created_at >= ?",
+                                   (key, now - ttl)).fetchone()
+                if row is not None:
+                    conn.execute("ROLLBACK")
+                    return {"id": row["record_id"]}, False
+                data['id'] = self._insert(conn, data)
+                conn.execute("INSERT OR REPLACE INTO idempotency_keys (key, record_id, created_at) VALUES (?, ?, ?)",
+                             (key, data['id'], now))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        logger.info(f"Saved record {data['id']} to SQLite")
+        return data, True
+
+    def append_many(self, records: List[Dict[str, Any]], keys: List[Optional[str]], ttl: float) -> List[tuple]:
+        """Insert a batch in one transaction; returns (record, created) per input.
+
+        Ids are allocated in one step from MAX(id) inside the IMMEDIATE
+        transaction. Records whose idempotency key was already stored, or
+        repeated earlier in the batch, are returned with the original id.
+        """
+        self.open()
+        conn = self.connection()
+        now = time.time()
+        wanted = list({key for key in keys if key is not None})
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing = {}
+                for start in range(0, len(wanted), 500):
+                    chunk = wanted[start:start + 500]
+                    rows = conn.execute(
+                        f"SELECT key, record_id FROM idempotency_keys WHERE created_at >= ? "
+                        f"AND key IN ({', '.join('?' for _ in chunk)})", [now - ttl] + chunk
+                    )
+                    existing.update((row["key"], row["record_id"]) for row in rows)
+                
+                next_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM records").fetchone()[0] + 1
+                results, record_rows, key_rows = [], [], []
+                for data, key in zip(records, keys):
+                    if key is not None and key in existing:
+                        results.append(({"id": existing[key]}, False))
+                        continue
+                    data['id'] = next_id
+                    next_id += 1
+                    record_rows.append([data['id']] + self._row_values(data))
+                    if key is not None:
+                        existing[key] = data['id']
+                        key_rows.append((key, data['id'], now))
+                    results.append((data, True))
+                
+                placeholders = ", ".join("?" for _ in STORED_FIELDS)
+                conn.executemany(f"INSERT INTO records ({', '.join(STORED_FIELDS)}) VALUES ({placeholders})",
+                                 record_rows)
+                conn.executemany("INSERT OR REPLACE INTO idempotency_keys (key, record_id, created_at) VALUES (?, ?, ?)",
+                                 key_rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        logger.info(f"Saved {len(record_rows)} records to SQLite in one transaction")
+        return results
+
+    def purge_keys(self, before: float) -> int:
+        """Drop idempotency keys created before a timestamp"""
+        self.open()
+        with self._write_lock:
+            cursor = self.connection().execute("DELETE FROM idempotency_keys WHERE created_at < ?", (before,))
+        return cursor.rowcount
+
+    def get_meta(self, key: str) -> Optional[str]:
+        self.open()
+        row = self.connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def count(self) -> int:
+        self.open()
+        return self.connection().execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    @staticmethod
+    def _compact(row: tuple, payload: Optional[str], store) -> CompactRecord:
+        if row[-1] is None:
+            # Parsed on read until the next backfill, as in _record
+            record = typed_numeric_fields(dict(zip(COMPACT_FIELDS, row)))
+            row = [record.get(field) for field in COMPACT_FIELDS]
+        return CompactRecord(row, payload, store, row[0])
+
+    def load_raw_payload(self, record_id: int) -> Optional[str]:
+        """Fetch one record's raw_payload by id"""
+        row = self.connection().execute("SELECT raw_payload FROM records WHERE id = ?", (record_id,)).fetchone()
+        return row["raw_payload"] if row else None
+
+    def get_all_records(self, with_payload: bool = False) -> List[CompactRecord]:
+        return self.records_after_id(0, with_payload)
+
+    def records_after_id(self, record_id: int, with_payload: bool = False,
+                         limit: Optional[int] = None) -> List[CompactRecord]:
+        """Compact records with an id above record_id, the first limit of them when given;
+        raw_payload is left in the table unless asked for"""
+        self.open()
+        columns = COMPACT_FIELDS + ["raw_payload"] if with_payload else COMPACT_FIELDS
+        cursor = self.connection().cursor()
+        cursor.row_factory = None
+        rows = cursor.execute(f"SELECT {', '.join(columns)} FROM records WHERE id > ? ORDER BY id LIMIT ?",
+                              (record_id, -1 if limit is None else limit))
+        if with_payload:
+            return [self._compact(row[:-1], row[-1], None) for row in rows]
+        return [self._compact(row, None, self) for row in rows]
+
+    def version(self) -> str:
+        """Changes whenever a record is appended (records are never updated in place)"""
+        self.open()
+        return str(self.connection().execute("SELECT COALESCE(MAX(id), 0) FROM records").fetchone()[0])
+
+    def query_records(self, after_id: int = 0, limit: Optional[int] = None, start: Optional[str] = None,
+                      end: Optional[str] = None, **equals):
+        """Yield records in id order matching the filters.
+
+        Rows are fetched in keyset-paginated batches, so memory stays bounded
+        and each batch can run on whichever thread resumes the generator.
+        """
+        self.open()
+        clauses, params = [], []
+        if start:
+            clauses.append("timestamp >= ?")
+            params.append(start)
+        if end:
+            clauses.append("timestamp < ?")
+            params.append(end)
+        for field, value in equals.items():
+            if value is not None:
+                clauses.append(f"{field} = ?")
+                params.append(value)
+        where = "".join(f" AND {c}" for c in clauses)
+        
+        remaining = limit
+        while remaining is None or remaining > 0:
+            batch_size = EXPORT_BATCH_SIZE if remaining is None else min(EXPORT_BATCH_SIZE, remaining)
+            rows = self.connection().execute(
+                f"SELECT * FROM records WHERE id > ?{where} ORDER BY id LIMIT ?",
+                [after_id] + params + [batch_size]
+            ).fetchall()
+            for row in rows:
+                yield self._record(row)
+            if len(rows) < batch_size:
+                return
+            after_id = rows[-1]["id"]
+            if remaining is not None:
+                remaining -= len(rows)
+
+    def read_new_records(self, cursor: int = 0, with_payload: bool = False, limit: Optional[int] = None):
+        """Read up to limit records with an id above the cursor; the cursor is the last id read"""
+        records = self.records_after_id(cursor, with_payload, limit)
+        if not records:
+            last_id = self.connection().execute("SELECT COALESCE(MAX(id), 0) FROM records").fetchone()[0]
+            # An emptied table means the caller should start over
+            return [], min(cursor, last_id)
+        return records, records[-1]['id']
+
+def record_matches(record: Dict[str, Any], start: Optional[str], end: Optional[str],
+                   equals: Dict[str, Any]) -> bool:
+    """Apply the dashboard time-range and equality filters to a record"""
+    timestamp = record.get('timestamp') or ''
+    if start and timestamp < start:
+        return False
+    if end and timestamp >= end:
+        return False
+    return all(value is None or record.get(field) == value for field, value in equals.items())
+
+def migrate_csv_to_sqlite(csv_file: str, store: "SQLiteStore") -> int:
+    """Copy an existing CSV store into SQLite once, keeping record ids"""
+    if store.get_meta("migrated_from_csv") is not None or not os.path.exists(csv_file):
+        return 0
+    if os.path.getsize(csv_file) == 0:
+        return 0
+    
+    with open(csv_file, 'r', newline='', encoding='utf-8') as f:
+        rows = [
+            [int(r['id'])] + store._row_values(r)
+            for r in csv.DictReader(f) if str(r.get('id', '')).isdigit()
+        ]
+    
+    placeholders = ", ".join("?" for _ in STORED_FIELDS)
+    conn = store.connection()
+    with store._write_lock:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated_from_csv'").fetchone():
+                # Another worker finished the migration first
+                conn.execute("ROLLBACK")
+                return 0
+            conn.executemany(
+                f"INSERT OR IGNORE INTO records ({', '.join(STORED_FIELDS)}) VALUES ({placeholders})", rows
+            )
+            conn.execute("INSERT INTO meta (key, value) VALUES (?, ?)",
+                         ("migrated_from_csv", os.path.abspath(csv_file)))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    
+    logger.info(f"Migrated {len(rows)} records from {csv_file} to SQLite")
+    return len(rows)
+
+def create_store(backend: str):
+    """Create the record store for a backend name"""
+    if backend == "csv":
+        return CSVStore(CSV_FILE)
+    if backend == "sqlite":
+        return SQLiteStore(SQLITE_FILE)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+class IngestLog:
+    """Per-worker write-ahead log of records on their way into the store.
+
+    Each worker process appends to its own segment and holds an exclusive
+    flock on it for as long as it lives; that lease makes it the segment's
+    only writer. A group of records is written and fsynced once before it is
+    committed to the store, and a commit (or abort) marker follows. If a
+    worker dies in between, another worker finds its segment unlocked and
+    replays the unfinished groups. Every logged record carries an idempotency
+    key, so a group that did reach the store is not stored twice.
+    """
+
+    def __init__(self, directory: str = INGEST_LOG_DIR):
+        self.directory = directory
+        self.owner = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.path = os.path.join(directory, f"{self.owner}.log")
+        self.groups = itertools.count(1)
+        self.recovered = 0
+        self._file = None
+
+    @staticmethod
+    def _is_linked(f, path: str) -> bool:
+        """Whether path still names the open file f"""
+        try:
+            return os.fstat(f.fileno()).st_ino == os.stat(path).st_ino
+        except FileNotFoundError:
+            return False
+
+    def _open(self):
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            while True:
+                f = open(self.path, 'ab')
+                if fcntl is None:
+                    break
+                fcntl.flock(f, fcntl.LOCK_EX)
+                if self._is_linked(f, self.path):
+                    break
+                # Before the lease was taken, another worker's recover() saw the new, unlocked segment
+                # as a dead worker's and removed it; start again on a fresh one
+                f.close()
+            self._file = f
+        return self._file
+
+    def append(self, entries: List[tuple]) -> int:
+        """Durably log (key, record) entries as one group; returns the group number"""
+        group = next(self.groups)
+        size = len(entries)
+        f = self._open()
+        f.write(b"".join(
+            json.dumps({"group": group, "size": size, "key": key, "record": record}).encode() + b"\n"
+            for key, record in entries
+        ))
+        f.flush()
+        os.fsync(f.fileno())
+        return group
+
+    def finish(self, group: int, committed: bool = True):
+        """Mark a group as stored (or abandoned); a fully finished, large log is truncated"""
+        f = self._open()
+        f.write(json.dumps({"committed" if committed else "aborted": group}).encode() + b"\n")
+        f.flush()
+        # Groups finish in order on the writer thread, so nothing in the file is still pending
+        if f.tell() > INGEST_LOG_MAX_BYTES:
+            f.truncate(0)
+
+    def close(self):
+        """Release the lease and drop the segment; only call once every group has finished"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            os.remove(self.path)
+
+    @staticmethod
+    def _pending_groups(f) -> List[List[tuple]]:
+        groups: Dict[int, List[tuple]] = {}
+        sizes: Dict[int, int] = {}
+        finished = set()
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # Torn write from a crash; its group was never acknowledged
+            if "group" in entry:
+                groups.setdefault(entry["group"], []).append((entry["key"], entry["record"]))
+                sizes[entry["group"]] = entry["size"]
+            else:
+                finished.add(entry.get("committed", entry.get("aborted")))
+        return [entries for group, entries in sorted(groups.items())
+                if group not in finished and len(entries) == sizes[group]]
+
+    def recover(self, commit) -> int:
+        """Replay unfinished groups from the segments of workers that are gone; returns records replayed"""
+        if fcntl is None or not os.path.isdir(self.directory):
+            # Without flock a live worker's segment cannot be told from a dead one's
+            return 0
+        
+        replayed = 0
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if not name.endswith(".log") or path == self.path:
+                continue
+            try:
+                f = open(path, 'rb')
+            except FileNotFoundError:
+                continue  # Recovered by another worker
+            with f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # Its worker is alive and holds the lease
+                if not self._is_linked(f, path):
+                    continue  # Removed by another recover, and maybe re-created by a worker since
+                for entries in self._pending_groups(f):
+                    commit(entries)
+                    replayed += len(entries)
+                os.remove(path)
+        self.recovered += replayed
+        return replayed
+
+class IngestWriter:
+    """Group commit for every append made by this worker.
+
+    Requests hand their records to a single writer thread, which takes
+    everything queued while the previous group was being written, logs it with
+    one fsync and stores it with one append_many call. Under load one fsync
+    and one store transaction cover many webhooks, while a lone webhook is
+    written straight away. Across workers, the store's own lock (BEGIN
+    IMMEDIATE or the id allocator's flock) serializes the groups.
+    """
+
+    def __init__(self, store, log: IngestLog, max_records: int = INGEST_GROUP_MAX_RECORDS, on_commit=None):
+        self.store = store
+        self.log = log
+        self.max_records = max_records
+        # Called from the writer thread with the records each group newly stored
+        self.on_commit = on_commit
+        self.queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self.groups = 0
+        self.records = 0
+        self.largest_group = 0
+        self._keys = itertools.count(1)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, records: List[Dict[str, Any]], keys: List[Optional[str]]) -> Future:
+        """Queue records for the next group; the future resolves to (record, created) per record"""
+        future: Future = Future()
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ingest-writer", daemon=True)
+                self._thread.start()
+        self.queue.put((records, keys, future))
+        return future
+
+    def write(self, records: List[Dict[str, Any]], keys: List[Optional[str]]) -> List[tuple]:
+        """Blocking submit"""
+        return self.submit(records, keys).result()
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is None:
+                return
+            batch, count = [item], len(item[0])
+            while count < self.max_records:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+                count += len(item[0])
+            try:
+                self._commit(batch)
+            except Exception as e:
+                logger.error(f"Ingest group commit failed: {str(e)}")
+                for _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    @timed_stage("ingest_group_commit")
+    def _commit(self, batch: List[tuple]):
+        records = [record for records, _, _ in batch for record in records]
+        # Records without a delivery key get one, so a replay after a crash cannot store them twice
+        keys = [key if key is not None else f"ingest:{self.log.owner}:{next(self._keys)}"
+                for _, keys, _ in batch for key in keys]
+        group = self.log.append(list(zip(keys, records)))
+        try:
+            results = self.store.append_many(records, keys, IDEMPOTENCY_TTL_SECONDS)
+        except Exception:
+            self.log.finish(group, committed=False)
+            raise
+        self.log.finish(group)
+        
+        self.groups += 1
+        self.records += len(records)
+        self.largest_group = max(self.largest_group, len(records))
+        offset = 0
+        for records, _, future in batch:
+            future.set_result(results[offset:offset + len(records)])
+            offset += len(records)
+        if self.on_commit is not None:
+            try:
+                self.on_commit([record for record, created in results if created])
+            except Exception as e:
+                logger.error(f"Ingest commit listener failed: {str(e)}")
+
+    def close(self):
+        """Finish the queued groups, stop the writer thread and drop this worker's log"""
+        with self._start_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self.queue.put(None)
+            thread.join()
+        self.log.close()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "log": self.log.path,
+            "groups": self.groups,
+            "records": self.records,
+            "largest_group": self.largest_group,
+            "mean_group_size": round(self.records / self.groups, 1) if self.groups else 0,
+            "queued": self.queue.qsize(),
+            "recovered": self.log.recovered
+        }
+
+def idempotency_key(headers, payload: Dict[str, Any]) -> Optional[str]:
+    """Derive a delivery key from the Idempotency-Key header or the payload's call id"""
+    header = headers.get(IDEMPOTENCY_HEADER)
+    if header:
+        source = f"header:{header}"
+    else:
+        call_id = next((payload[f] for f in IDEMPOTENCY_PAYLOAD_FIELDS
+                        if isinstance(payload, dict) and payload.get(f) not in (None, "")), None)
+        if call_id is None:
+            return None
+        source = f"call:{call_id}"
+    return hashlib.sha256(source.encode()).hexdigest()
+
+class IdempotencyCache:
+    """Bounded, TTL-limited LRU of recently seen idempotency keys.
+
+    It answers retried deliveries without touching the store; keys that have
+    been evicted are still found in the store's key table, which is the
+    source of truth.
+    """
+
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL_SECONDS, max_entries: int = IDEMPOTENCY_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[int]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            record_id, created_at = entry
+            if created_at < time.time() - self.ttl:
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return record_id
+
+    def put(self, key: str, record_id: int, created_at: Optional[float] = None):
+        with self._lock:
+            self.entries[key] = (record_id, created_at or time.time())
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+class SQLiteCacheBackend:
+    """Shared response cache in a local SQLite file.
+
+    Lets several uvicorn workers on one machine share hits without running a
+    cache server; it also stands in for Redis in tests.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB, expires_at REAL)")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self.connection().execute("SELECT value FROM cache WHERE key = ? AND expires_at > ?",
+                                        (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        conn = self.connection()
+        now = time.time()
+        conn.execute("INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)", (key, value, now + ttl))
+        if random.random() < 0.01:
+            conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+
+class RedisCacheBackend:
+    """Shared response cache in Redis, for several fly machines"""
+
+    def __init__(self, url: str):
+        import redis  # Only needed when RESPONSE_CACHE_URL points at Redis
+        
+        self.client = redis.Redis.from_url(url, socket_timeout=0.05)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self.client.set(key, value, px=int(ttl * 1000))
+
+def create_cache_backend(url: str):
+    """Shared cache backend for a RESPONSE_CACHE_URL, or None for an in-process cache only"""
+    if not url:
+        return None
+    if url.startswith(("redis://", "rediss://")):
+        return RedisCacheBackend(url)
+    if url.startswith("sqlite:///"):
+        return SQLiteCacheBackend(url[len("sqlite:///"):])
+    raise ValueError(f"Unsupported response cache URL: {url}")
+
+class ResponseCache:
+    """Serialized responses keyed by namespace, data version and normalized parameters.
+
+    An in-process LRU with a TTL answers most hits; an optional shared
+    backend lets other workers and machines reuse a response. The data
+    version (load book generation, store version) is part of every key, so a
+    write is never served stale, and the first lookup under a new version
+    drops the namespace's older local entries.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL_SECONDS,
+                 shared=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        self.entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self.versions: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def params_key(params: Dict[str, Any]) -> str:
+        """Order-independent key over the parameters that are set"""
+        normalized = sorted((name, value) for name, value in params.items() if value is not None)
+        return hashlib.sha1(json.dumps(normalized, default=str).encode()).hexdigest()
+
+    def _observe_version(self, namespace: str, version: str):
+        """Drop a namespace's local entries once its data has changed (caller holds the lock)"""
+        if self.versions.get(namespace) == version:
+            return
+        self.versions[namespace] = version
+        for key in [key for key in self.entries if key[0] == namespace and key[1] != version]:
+            del self.entries[key]
+
+    def get(self, namespace: str, version: str, params: Dict[str, Any]) -> Optional[bytes]:
+        key = (namespace, version, self.params_key(params))
+        with self._lock:
+            self._observe_version(namespace, version)
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] >= time.time():
+                self.entries.move_to_end(key)
+                metrics.inc("response_cache_requests_total", namespace=namespace, result="hit")
+                return entry[0]
+        
+        if self.shared is not None:
+            try:
+                body = self.shared.get(":".join(key))
+            except Exception as e:
+                logger.error(f"Shared response cache read failed: {str(e)}")
+                body = None
+            if body is not None:
+                self._store(key, body)
+                metrics.inc("response_cache_requests_total", namespace=namespace, result="shared_hit")
+                return body
+        metrics.inc("response_cache_requests_total", namespace=namespace, result="miss")
+        return None
+
+    async def get_async(self, namespace: str, version: str, params: Dict[str, Any]) -> Optional[bytes]:
+        """get, moved off the event loop when a shared backend may do network or disk I/O"""
+        if self.shared is None:
+            return self.get(namespace, version, params)
+        return await asyncio.to_thread(self.get, namespace, version, params)
+
+    def _store(self, key: tuple, body: bytes):
+        with self._lock:
+            self._observe_version(key[0], key[1])
+            if self.versions[key[0]] != key[1]:
+                return
+            self.entries[key] = (body, time.time() + self.ttl)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def put(self, namespace: str, version: str, params: Dict[str, Any], body: bytes):
+        key = (namespace, version, self.params_key(params))
+        self._store(key, body)
+        if self.shared is not None:
+            try:
+                self.shared.set(":".join(key), body, self.ttl)
+            except Exception as e:
+                logger.error(f"Shared response cache write failed: {str(e)}")
+
+    async def put_async(self, namespace: str, version: str, params: Dict[str, Any], body: bytes):
+        if self.shared is None:
+            self.put(namespace, version, params, body)
+            return
+        await asyncio.to_thread(self.put, namespace, version, params, body)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "shared_backend": type(self.shared).__name__ if self.shared is not None else None
+            }
+
+# Shared by /search, /dashboard and /stats
+response_cache = ResponseCache(shared=create_cache_backend(RESPONSE_CACHE_URL))
+
+# Cached in place of a body for searches with no results
+SEARCH_NOT_FOUND = b"null"
+search_results_adapter = TypeAdapter(List[Load])
+
+WEBHOOK_FIELDS = ["booking_intent", "counter_offer", "agreed_rate", "negotiation_attempts", "sentiment", "call_outcome"]
+webhook_batch_adapter = TypeAdapter(List[WebhookData])
+
+def decode_json(body: bytes) -> Any:
+    """Parse a JSON body once, with orjson when it is installed.
+
+    Anything orjson refuses but the standard library accepts (integers past
+    64 bits, NaN) still parses, so the decoder never changes what is accepted.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(body)
+
+def raw_payload_text(body: bytes, payload: Any) -> str:
+    """The body as received, stored verbatim; re-encoded only if it is not UTF-8"""
+    try:
+        return body.decode('utf-8')
+    except UnicodeDecodeError:
+        return json.dumps(payload)
+
+def log_webhook_payload(body: bytes):
+    """Log a sample of webhook bodies at INFO, or all of them at DEBUG, cut to WEBHOOK_LOG_MAX_CHARS"""
+    if not logger.isEnabledFor(logging.DEBUG) and random.random() >= WEBHOOK_LOG_SAMPLE_RATE:
+        return
+    text = body[:WEBHOOK_LOG_MAX_CHARS].decode('utf-8', 'replace')
+    if len(body) > WEBHOOK_LOG_MAX_CHARS:
+        text = f"{text}... ({len(body)} bytes)"
+    logger.info(f"Received webhook payload: {text}")
+
+def webhook_record(payload: Dict[str, Any], timestamp: str, raw_payload: Optional[str] = None) -> Dict[str, Any]:
+    """Build the stored record for one call payload, keeping raw_payload as received when given"""
+    data = {"timestamp": timestamp}
+    data.update((field, payload.get(field, "")) for field in WEBHOOK_FIELDS)
+    data["raw_payload"] = raw_payload if raw_payload is not None else json.dumps(payload)
+    return data
+
+def parse_webhook_batch(body: bytes, ndjson: bool) -> tuple:
+    """Decode a JSON array, a {"records": [...]} object or NDJSON lines into payloads.
+
+    Returns the payloads and, for NDJSON, each line's text to store verbatim
+    (None for arrays, whose items are re-encoded).
+    """
+    if ndjson:
+        lines = [line for line in body.splitlines() if line.strip()]
+        payloads = [decode_json(line) for line in lines]
+        return payloads, [raw_payload_text(line, payload) for line, payload in zip(lines, payloads)]
+    payloads = decode_json(body)
+    if isinstance(payloads, dict):
+        payloads = payloads.get("records")
+    if not isinstance(payloads, list):
+        raise ValueError("Expected a JSON array of call payloads or an object with a 'records' array")
+    return payloads, None
+
+def normalize_timestamp(value: Any) -> str:
+    """Parse a client-supplied ISO 8601 timestamp into naive UTC ISO text, the form the server stamps"""
+    if not isinstance(value, str):
+        raise ValueError("expected an ISO 8601 string")
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.isoformat()
+
+def validate_webhook_batch(payloads: List[Any], received_at: str,
+                           raw_payloads: Optional[List[str]] = None) -> tuple:
+    """Validate payloads against WebhookData in one pass; returns ([(index, record)], rejected)"""
+    candidates = []
+    errors: Dict[int, str] = {}
+    for index, payload in enumerate(payloads):
+        if not isinstance(payload, dict):
+            candidates.append(payload)
+            continue
+        # Timestamps key daily and hourly buckets and range filters, so only well-formed ones are kept
+        timestamp = received_at
+        if payload.get("timestamp"):
+            try:
+                timestamp = normalize_timestamp(payload["timestamp"])
+            except ValueError as e:
+                errors[index] = f"timestamp: {str(e)}"
+        # raw_payload is the payload itself, already known to be a dict; skip re-validating a copy of it
+        candidate = {"timestamp": timestamp, "raw_payload": None}
+        for field in WEBHOOK_FIELDS:
+            value = payload.get(field, "")
+            # Numeric scalars are stored as text, like the CSV columns they end up in
+            is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+            candidate[field] = str(value) if is_number else value
+        candidates.append(candidate)
+
+    try:
+        webhook_batch_adapter.validate_python(candidates)
+    except ValidationError as e:
+        for error in e.errors():
+            index, field = error["loc"][0], ".".join(str(part) for part in error["loc"][1:])
+            errors.setdefault(index, f"{field}: {error['msg']}" if field else error["msg"])
+
+    records, rejected = [], []
+    for index, candidate in enumerate(candidates):
+        if index in errors:
+            rejected.append({"index": index, "error": errors[index]})
+            continue
+        candidate["raw_payload"] = raw_payloads[index] if raw_payloads else json.dumps(payloads[index])
+        records.append((index, candidate))
+    return records, rejected
+
+class AnalyticsAggregator:
+    """Running counters, sums and histograms over the stored webhook records.
+
+    Each record is folded in once, in O(1), and the aggregates are persisted
+    to a snapshot together with the storage cursor they cover, so startup only
+    replays records written after the last snapshot.
+    """
+
+    # Bumped when the aggregates change meaning or grow; older snapshots are rebuilt
+    SNAPSHOT_VERSION = 3
+
+    def __init__(self, snapshot_file: str = ANALYTICS_SNAPSHOT_FILE, source: str = ""):
+        self.snapshot_file = snapshot_file
+        self.source = source
+        self._lock = threading.Lock()
+        self.skipped = 0
+        self.reset()
+        self.load_snapshot()
+
+    def reset(self):
+        self.cursor = 0
+        self.total = 0
+        self.booking_intent = Counter()
+        self.sentiment = Counter()
+        self.call_outcome = Counter()
+        self.negotiation_sum = 0.0
+        self.negotiation_count = 0
+        self.negotiation_histogram = Counter()
+        self.daily_bookings = Counter()
+        self.recent_rates = deque(maxlen=ANALYTICS_RATE_SAMPLE_SIZE)
+        # Report aggregates: funnel stage counts per outcome, outcomes per sentiment,
+        # agreed rate minus counter offer, and calls and bookings per hour of day
+        self.funnel: Dict[str, Counter] = {}
+        self.sentiment_outcome: Dict[str, Counter] = {}
+        self.rate_delta_histogram = Counter()
+        self.rate_delta_sum = 0.0
+        self.rate_delta_count = 0
+        self.hourly_calls = Counter()
+        self.hourly_bookings = Counter()
+
+    def ingest(self, record: Dict[str, Any]):
+        """Fold a single record into the aggregates"""
+        self.total += 1
+        for counter, field in ((self.booking_intent, 'booking_intent'),
+                               (self.sentiment, 'sentiment'),
+                               (self.call_outcome, 'call_outcome')):
+            value = record.get(field)
+            if value:
+                counter[value] += 1
+        
+        # Stores return the numeric fields already parsed, so no per-pass regex
+        attempts = record.get('negotiation_attempts_value')
+        if attempts is not None and math.isfinite(attempts):
+            self.negotiation_sum += attempts
+            self.negotiation_count += 1
+            self.negotiation_histogram[str(int(attempts))] += 1
+        
+        booked = record.get('booking_intent') == 'yes'
+        if booked:
+            self.daily_bookings[str(record.get('timestamp', ''))[:10]] += 1
+        
+        counter_offer = record.get('counter_offer_value')
+        agreed_rate = record.get('agreed_rate_value')
+        # Rows stored before non-finite numbers were rejected can still hold inf or NaN
+        if counter_offer is not None and agreed_rate is not None and math.isfinite(agreed_rate - counter_offer):
+            self.recent_rates.append((counter_offer, agreed_rate))
+            delta = agreed_rate - counter_offer
+            self.rate_delta_histogram[str(math.floor(delta / RATE_DELTA_BUCKET) * RATE_DELTA_BUCKET)] += 1
+            self.rate_delta_sum += delta
+            self.rate_delta_count += 1
+        
+        outcome = record.get('call_outcome') or 'unknown'
+        stages = self.funnel.setdefault(outcome, Counter())
+        stages['calls'] += 1
+        if (attempts or 0) > 0 or counter_offer is not None:
+            stages['negotiated'] += 1
+        if agreed_rate is not None:
+            stages['agreed'] += 1
+        if booked:
+            stages['booked'] += 1
+        self.sentiment_outcome.setdefault(record.get('sentiment') or 'unknown', Counter())[outcome] += 1
+        
+        hour = str(record.get('timestamp') or '')[11:13]
+        if hour.isdigit():
+            self.hourly_calls[hour] += 1
+            if booked:
+                self.hourly_bookings[hour] += 1
+
+    def catch_up(self, read_new_records, batch_size: int = ANALYTICS_CATCH_UP_BATCH):
+        """Ingest every record stored after the current cursor.
+
+        Records are read batch_size at a time and the cursor moves after each
+        batch, so a cold start never holds the whole history in memory and
+        readers get the lock between batches.
+        """
+        while True:
+            with self._lock:
+                records, cursor = read_new_records(self.cursor, limit=batch_size)
+                if cursor < self.cursor:
+                    # Storage was reset underneath us; rebuild from scratch
+                    self.reset()
+                    records, cursor = read_new_records(0, limit=batch_size)
+                for record in records:
+                    try:
+                        self.ingest(record)
+                    except Exception as e:
+                        # One bad row must not pin the cursor and fail every later refresh
+                        self.skipped += 1
+                        logger.error(f"Skipping record {record.get('id')} in analytics: {str(e)}")
+                self.cursor = cursor
+            if len(records) < batch_size:
+                return
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            average = self.negotiation_sum / self.negotiation_count if self.negotiation_count else 0
+            return {
+                "total_records": self.total,
+                "successful_bookings": self.booking_intent.get('yes', 0),
+                "positive_sentiment": self.sentiment.get('positive', 0),
+                "average_negotiation_attempts": round(average, 2),
+                "booking_intent_counts": dict(self.booking_intent.most_common()),
+                "sentiment_counts": dict(self.sentiment.most_common()),
+                "call_outcome_counts": dict(self.call_outcome.most_common()),
+                "negotiation_attempts_histogram": dict(sorted(self.negotiation_histogram.items(), key=lambda kv: int(kv[0]))),
+                "daily_bookings": dict(sorted(self.daily_bookings.items()))
+            }
+
+    def report(self) -> Dict[str, Any]:
+        """The analytics report: headline numbers, conversion funnel by outcome, sentiment by
+        outcome, the agreed-rate-minus-counter-offer distribution and hourly call volume"""
+        summary = self.summary()
+        with self._lock:
+            outcomes = sorted(self.funnel, key=lambda outcome: -self.funnel[outcome]['calls'])
+            overall = Counter()
+            by_outcome = {}
+            for outcome in outcomes:
+                stages = self.funnel[outcome]
+                overall.update(stages)
+                by_outcome[outcome] = {stage: stages[stage] for stage in FUNNEL_STAGES}
+                by_outcome[outcome]["booking_rate"] = round(stages['booked'] / stages['calls'], 4)
+            sentiments = sorted(self.sentiment_outcome, key=lambda s: -sum(self.sentiment_outcome[s].values()))
+            histogram = sorted(self.rate_delta_histogram.items(), key=lambda kv: int(kv[0]))
+            hours = [f"{hour:02d}" for hour in range(24)]
+            return {
+                "generated_at": datetime.utcnow().isoformat(),
+                "summary": {
+                    key: summary[key] for key in ("total_records", "successful_bookings", "positive_sentiment",
+                                                  "average_negotiation_attempts")
+                },
+                "funnel": {
+                    "stages": list(FUNNEL_STAGES),
+                    "overall": {stage: overall[stage] for stage in FUNNEL_STAGES},
+                    "by_outcome": by_outcome
+                },
+                "sentiment_by_outcome": {
+                    "outcomes": outcomes,
+                    "counts": {s: {o: self.sentiment_outcome[s][o] for o in outcomes} for s in sentiments}
+                },
+                "rate_delta": {
+                    "bucket_width": RATE_DELTA_BUCKET,
+                    "count": self.rate_delta_count,
+                    "mean": round(self.rate_delta_sum / self.rate_delta_count, 2) if self.rate_delta_count else None,
+                    "histogram": dict(histogram)
+                },
+                "hourly_volume": {
+                    hour: {"calls": self.hourly_calls[hour], "bookings": self.hourly_bookings[hour]} for hour in hours
+                }
+            }
+
+    def rate_pairs(self) -> List[tuple]:
+        with self._lock:
+            return list(self.recent_rates)
+
+    def save_snapshot(self):
+        with self._lock:
+            snapshot = {
+                "version": self.SNAPSHOT_VERSION,
+                "source": self.source,
+                "cursor": self.cursor,
+                "total": self.total,
+                "booking_intent": self.booking_intent,
+                "sentiment": self.sentiment,
+                "call_outcome": self.call_outcome,
+                "negotiation_sum": self.negotiation_sum,
+                "negotiation_count": self.negotiation_count,
+                "negotiation_histogram": self.negotiation_histogram,
+                "daily_bookings": self.daily_bookings,
+                "recent_rates": list(self.recent_rates),
+                "funnel": self.funnel,
+                "sentiment_outcome": self.sentiment_outcome,
+                "rate_delta_histogram": self.rate_delta_histogram,
+                "rate_delta_sum": self.rate_delta_sum,
+                "rate_delta_count": self.rate_delta_count,
+                "hourly_calls": self.hourly_calls,
+                "hourly_bookings": self.hourly_bookings
+            }
+        # Per-writer temp file: refreshes on the Sheets pool can save concurrently
+        tmp_path = f"{self.snapshot_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.snapshot_file)
+
+    def load_snapshot(self):
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable analytics snapshot: {str(e)}")
+            return
+        
+        if snapshot.get("version") != self.SNAPSHOT_VERSION:
+            # Version 1 read rates as the first run of digits ("$2,100.50" counted as 2);
+            # version 2 had no report aggregates
+            logger.info("Analytics snapshot is from an older format, rebuilding")
+            return
+        if snapshot.get("source") != self.source:
+            # Cursors are only meaningful for the store that produced them
+            logger.info("Analytics snapshot was taken from a different store, rebuilding")
+            return
+        
+        self.cursor = snapshot["cursor"]
+        self.total = snapshot["total"]
+        self.booking_intent = Counter(snapshot["booking_intent"])
+        self.sentiment = Counter(snapshot["sentiment"])
+        self.call_outcome = Counter(snapshot["call_outcome"])
+        self.negotiation_sum = snapshot["negotiation_sum"]
+        self.negotiation_count = snapshot["negotiation_count"]
+        self.negotiation_histogram = Counter(snapshot["negotiation_histogram"])
+        self.daily_bookings = Counter(snapshot["daily_bookings"])
+        self.recent_rates = deque((tuple(p) for p in snapshot["recent_rates"]), maxlen=ANALYTICS_RATE_SAMPLE_SIZE)
+        self.funnel = {outcome: Counter(stages) for outcome, stages in snapshot["funnel"].items()}
+        self.sentiment_outcome = {s: Counter(outcomes) for s, outcomes in snapshot["sentiment_outcome"].items()}
+        self.rate_delta_histogram = Counter(snapshot["rate_delta_histogram"])
+        self.rate_delta_sum = snapshot["rate_delta_sum"]
+        self.rate_delta_count = snapshot["rate_delta_count"]
+        self.hourly_calls = Counter(snapshot["hourly_calls"])
+        self.hourly_bookings = Counter(snapshot["hourly_bookings"])
+
+def timestamp_seconds(value: Any) -> Optional[float]:
+    """Epoch seconds of an ISO timestamp; naive timestamps are UTC, as stored by /webhook"""
+    try:
+        moment = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+class RollingWindows:
+    """Calls, bookings, sentiment mix and average agreed rate over the last 5 minutes, hour and day.
+
+    Records are counted into a ring of LIVE_BUCKET_SECONDS buckets that spans
+    the longest window. Every window keeps running totals. A record is added
+    to the totals of each window it falls in, and a bucket is subtracted from
+    a window's totals once it slides out. Reading a window is therefore O(1)
+    however busy it was.
+    """
+
+    SENTIMENTS = ("positive", "neutral", "negative", "other")
+    # Per-bucket cells: calls, bookings, agreed rate sum and count, then one count per sentiment
+    CALLS, BOOKINGS, RATE_SUM, RATE_COUNT = range(4)
+    SENTIMENT_CELLS = {sentiment: 4 + i for i, sentiment in enumerate(SENTIMENTS)}
+    WIDTH = 4 + len(SENTIMENTS)
+
+    def __init__(self, windows: Dict[str, int] = LIVE_WINDOWS, bucket_seconds: int = LIVE_BUCKET_SECONDS,
+                 clock=time.time):
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+        self.lengths = {name: max(1, seconds // bucket_seconds) for name, seconds in windows.items()}
+        self.size = max(self.lengths.values())
+        self.cells = array('d', bytes(8 * self.size * self.WIDTH))
+        self.totals = {name: [0.0] * self.WIDTH for name in windows}
+        self.current = self._bucket(clock())
+        self._lock = threading.Lock()
+
+    def _bucket(self, seconds: float) -> int:
+        return int(seconds // self.bucket_seconds)
+
+    def _advance(self, now: int):
+        """Slide every window forward to the bucket now, dropping the buckets that leave it"""
+        if now <= self.current:
+            return
+        for name, length in self.lengths.items():
+            totals = self.totals[name]
+            for bucket in range(self.current - length + 1, min(now - length + 1, self.current + 1)):
+                base = (bucket % self.size) * self.WIDTH
+                for i in range(self.WIDTH):
+                    totals[i] -= self.cells[base + i]
+            if totals[self.CALLS] <= 0:
+                # Nothing left in the window; also clears float drift in the rate sum
+                totals[:] = [0.0] * self.WIDTH
+        for bucket in range(max(self.current + 1, now - self.size + 1), now + 1):
+            base = (bucket % self.size) * self.WIDTH
+            self.cells[base:base + self.WIDTH] = array('d', bytes(8 * self.WIDTH))
+        self.current = now
+
+    def add(self, records: List[Dict[str, Any]]):
+        """Count stored records by their timestamp; ones older than the longest window are skipped"""
+        with self._lock:
+            now = self._bucket(self.clock())
+            self._advance(now)
+            for record in records:
+                seconds = timestamp_seconds(record.get('timestamp'))
+                bucket = min(self._bucket(seconds), now) if seconds is not None else now
+                age = now - bucket
+                if age >= self.size:
+                    continue
+                values = [(self.CALLS, 1.0)]
+                if record.get('booking_intent') == 'yes':
+                    values.append((self.BOOKINGS, 1.0))
+                rate = record.get('agreed_rate_value') if 'agreed_rate_value' in record \
+                    else parse_number(record.get('agreed_rate'))[0]
+                if rate is not None:
+                    values += [(self.RATE_SUM, rate), (self.RATE_COUNT, 1.0)]
+                values.append((self.SENTIMENT_CELLS.get(record.get('sentiment'), self.SENTIMENT_CELLS["other"]), 1.0))
+                
+                base = (bucket % self.size) * self.WIDTH
+                for i, value in values:
+                    self.cells[base + i] += value
+                for name, length in self.lengths.items():
+                    if age < length:
+                        totals = self.totals[name]
+                        for i, value in values:
+                            totals[i] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            self._advance(self._bucket(self.clock()))
+            windows = {}
+            for name, totals in self.totals.items():
+                calls = int(totals[self.CALLS])
+                windows[name] = {
+                    "calls": calls,
+                    "bookings": int(totals[self.BOOKINGS]),
+                    "booking_rate": round(totals[self.BOOKINGS] / calls, 4) if calls else 0,
+                    "sentiment": {s: int(totals[cell]) for s, cell in self.SENTIMENT_CELLS.items()},
+                    "average_agreed_rate": round(totals[self.RATE_SUM] / totals[self.RATE_COUNT], 2)
+                                           if totals[self.RATE_COUNT] else None
+                }
+            return windows
+
+def sse_frame(event: str, data: Any, event_id: Any = None) -> bytes:
+    """One Server-Sent Events frame with a JSON data line, and an id line when given"""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data, default=str)}\n\n".encode()
+
+class LiveFeed:
+    """Pushes newly stored call records and rolling-window stats to /live subscribers.
+
+    The ingest writer hands each committed group to publish() on its own
+    thread. The group updates the rolling windows there and is encoded once
+    into SSE frames. The event loop then puts the same bytes on every
+    subscriber's bounded queue. Window stats go out as one shared frame every
+    LIVE_STATS_INTERVAL seconds. A subscriber costs a queue put and a socket
+    write per frame, never a store read. One that falls LIVE_SUBSCRIBER_QUEUE
+    frames behind is dropped instead of being buffered without bound.
+
+    The windows count the records this worker stored; the default deployment
+    runs a single worker, which sees them all.
+
+    The server waits for open responses before it shuts down, so a stream is
+    ended after LIVE_STREAM_SECONDS. Record frames carry the record id and the
+    last LIVE_REPLAY_RECORDS of them are kept, so the client's reconnect with
+    Last-Event-ID picks up where the old stream stopped. The server only
+    runs the application shutdown once open responses have finished, so the
+    lifespan chains the SIGINT/SIGTERM handlers to close_soon(), which ends
+    every stream and refuses new ones as soon as the signal arrives; stop()
+    does the same for anything still open at shutdown.
+    """
+
+    def __init__(self, windows: Optional[RollingWindows] = None, queue_size: int = LIVE_SUBSCRIBER_QUEUE,
+                 max_subscribers: int = LIVE_MAX_SUBSCRIBERS, stats_interval: float = LIVE_STATS_INTERVAL,
+                 stream_seconds: float = LIVE_STREAM_SECONDS, replay: int = LIVE_REPLAY_RECORDS):
+        self.windows = windows or RollingWindows()
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.stats_interval = stats_interval
+        self.stream_seconds = stream_seconds
+        # Subscriber queue -> loop time its stream ends
+        self.subscribers: Dict[asyncio.Queue, float] = {}
+        self.recent: deque = deque(maxlen=replay)
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+        self.dropped = 0
+        self.expired = 0
+        # Set once the server is shutting down; streams end and no new ones start
+        self.closing = asyncio.Event()
+        self._ticker: Optional[asyncio.Task] = None
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        self.closing = asyncio.Event()
+        self._ticker = asyncio.create_task(self._stats_ticker())
+
+    async def stop(self):
+        if self._ticker is not None:
+            self._ticker.cancel()
+            self._ticker = None
+        self.close()
+        self.loop = None
+
+    def close(self):
+        """End every open stream and refuse new ones; runs on the event loop"""
+        self.closing.set()
+        self.close_subscribers()
+
+    def close_soon(self):
+        """Schedule close(); safe to call from any thread or a signal handler"""
+        loop = self.loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(self.close)
+        except RuntimeError:
+            # The loop closed during shutdown
+            pass
+
+    def close_subscribers(self):
+        for subscriber in list(self.subscribers):
+            self._close(subscriber)
+
+    def publish(self, records: List[Dict[str, Any]]):
+        """Count stored records into the windows and stream them; safe to call from any thread"""
+        if not records:
+            return
+        self.windows.add(records)
+        loop = self.loop
+        if loop is None:
+            return
+        if not self.subscribers:
+            # Only the newest frames can be replayed to a reconnecting client
+            records = records[-self.recent.maxlen:]
+        frames = [(int(record['id']), sse_frame("record", {field: record.get(field) for field in LIVE_RECORD_FIELDS},
+                                                 record['id']))
+                  for record in records]
+        try:
+            loop.call_soon_threadsafe(self._deliver, frames)
+        except RuntimeError:
+            # The loop closed during shutdown
+            pass
+
+    def _deliver(self, frames: List[tuple]):
+        """Keep (record id, frame) pairs for replay and send them on; runs on the event loop"""
+        self.recent.extend(frames)
+        if self.subscribers:
+            self._broadcast(b"".join(frame for _, frame in frames))
+
+    def _broadcast(self, frame: bytes):
+        self.published += 1
+        for subscriber in list(self.subscribers):
+            try:
+                subscriber.put_nowait(frame)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                self._close(subscriber)
+
+    def _close(self, subscriber: asyncio.Queue):
+        """Unsubscribe and wake the stream with the end-of-stream marker"""
+        self.subscribers.pop(subscriber, None)
+        while not subscriber.empty():
+            subscriber.get_nowait()
+        subscriber.put_nowait(None)
+
+    async def _stats_ticker(self):
+        while True:
+            await asyncio.sleep(self.stats_interval)
+            now = asyncio.get_running_loop().time()
+            for subscriber, ends in list(self.subscribers.items()):
+                if ends <= now:
+                    self.expired += 1
+                    self._close(subscriber)
+            if self.subscribers:
+                self._broadcast(sse_frame("stats", self.windows.snapshot()))
+
+    def full(self) -> bool:
+        return len(self.subscribers) >= self.max_subscribers
+
+    async def stream(self, last_event_id: Optional[int] = None):
+        """Subscribe and yield SSE frames: the current stats, any records after last_event_id
+        still held for replay, then records and stats as they come"""
+        if self.closing.is_set():
+            return
+        subscriber: asyncio.Queue = asyncio.Queue(self.queue_size)
+        # Subscribing and taking the replay happen in one loop step, so no record is missed or sent twice
+        self.subscribers[subscriber] = asyncio.get_running_loop().time() + self.stream_seconds
+        missed = [frame for record_id, frame in self.recent
+                  if last_event_id is not None and record_id > last_event_id]
+        try:
+            yield f"retry: {LIVE_RETRY_MS}\n".encode() + sse_frame("stats", self.windows.snapshot())
+            if missed:
+                yield b"".join(missed)
+            while not self.closing.is_set():
+                frame = await subscriber.get()
+                if frame is None:
+                    return
+                yield frame
+        finally:
+            self.subscribers.pop(subscriber, None)
+
+    def status(self) -> Dict[str, Any]:
+        return {"subscribers": len(self.subscribers), "frames_published": self.published,
+                "subscribers_dropped": self.dropped, "streams_expired": self.expired}
+
+def lane_key(origin: str, destination: str, equipment_type: Optional[str] = None) -> str:
+    """Normalized "origin|destination|equipment" key; "*" equipment is the all-equipment rollup"""
+    def place(location: str) -> str:
+        city, state = split_location(location)
+        return f"{city}, {state}" if state else city
+    equipment = equipment_type.strip().lower() if equipment_type and equipment_type.strip() else "*"
+    return f"{place(origin)}|{place(destination)}|{equipment}"
+
+def quantile(ordered: List[float], q: float) -> float:
+    """Linearly interpolated quantile of an already sorted list"""
+    position = (len(ordered) - 1) * q
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+class LaneRateIndex:
+    """Recent negotiation outcomes per lane, with their statistics precomputed.
+
+    Each lane (origin, destination and equipment type, plus an all-equipment
+    rollup) keeps its last LANE_RATE_WINDOW calls. Agreed rates are held in a
+    sorted list and acceptance and attempt totals are updated as calls enter
+    and leave the window, so the summary served by /rates is a dict lookup.
+    Lanes come from the payload's origin/destination/equipment_type, or from
+    the load book via its load_id.
+    """
+
+    SNAPSHOT_VERSION = 1
+
+    def __init__(self, snapshot_file: str = LANE_RATES_SNAPSHOT_FILE, source: str = "",
+                 resolve_load=None, window: int = LANE_RATE_WINDOW):
+        self.snapshot_file = snapshot_file
+        self.source = source
+        self.resolve_load = resolve_load or (lambda load_id: None)
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+        self.load_snapshot()
+
+    def reset(self):
+        self.cursor = 0
+        self.lanes: Dict[str, Dict[str, Any]] = {}
+        self.summaries: Dict[str, Dict[str, Any]] = {}
+        self.unmatched = 0
+
+    def lane_of(self, record: Dict[str, Any]) -> Optional[tuple]:
+        """(origin, destination, equipment_type) a call was about, if it can be told"""
+        try:
+            payload = json.loads(record.get('raw_payload') or '{}')
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(payload, dict):
+            return None
+        origin, destination = payload.get('origin'), payload.get('destination')
+        equipment = payload.get('equipment_type')
+        if not (origin and destination):
+            load_id = payload.get('load_id') or payload.get('loadId')
+            load = self.resolve_load(str(load_id)) if load_id else None
+            if load is None:
+                return None
+            origin, destination = load['origin'], load['destination']
+            equipment = equipment or load.get('equipment_type')
+        return str(origin), str(destination), str(equipment) if equipment else None
+
+    def _add(self, key: str, call: tuple):
+        lane = self.lanes.get(key)
+        if lane is None:
+            lane = self.lanes[key] = {"calls": deque(), "rates": [], "accepted": 0,
+                                      "attempts_sum": 0.0, "attempts_count": 0, "total": 0}
+        rate, accepted, attempts = call
+        if len(lane["calls"]) >= self.window:
+            old_rate, old_accepted, old_attempts = lane["calls"].popleft()
+            if old_rate is not None:
+                del lane["rates"][bisect.bisect_left(lane["rates"], old_rate)]
+            lane["accepted"] -= old_accepted
+            if old_attempts is not None:
+                lane["attempts_sum"] -= old_attempts
+                lane["attempts_count"] -= 1
+        lane["calls"].append(call)
+        if rate is not None:
+            bisect.insort(lane["rates"], rate)
+        lane["accepted"] += accepted
+        if attempts is not None:
+            lane["attempts_sum"] += attempts
+            lane["attempts_count"] += 1
+        lane["total"] += 1
+
+    def ingest(self, record: Dict[str, Any]) -> List[str]:
+        """Fold one record into its lanes; returns the lane keys it touched"""
+        lane = self.lane_of(record)
+        if lane is None:
+            self.unmatched += 1
+            return []
+        origin, destination, equipment = lane
+        call = (record.get('agreed_rate_value'), record.get('booking_intent') == 'yes',
+                record.get('negotiation_attempts_value'))
+        keys = [lane_key(origin, destination)]
+        if equipment:
+            keys.append(lane_key(origin, destination, equipment))
+        for key in keys:
+            self._add(key, call)
+        return keys
+
+    def _summarize(self, key: str) -> Dict[str, Any]:
+        lane = self.lanes[key]
+        rates, calls = lane["rates"], len(lane["calls"])
+        origin, destination, equipment = key.split("|")
+        return {
+            "origin": origin,
+            "destination": destination,
+            "equipment_type": None if equipment == "*" else equipment,
+            "calls": calls,
+            "total_calls": lane["total"],
+            "rate_samples": len(rates),
+            "median_agreed_rate": round(quantile(rates, 0.5), 2) if rates else None,
+            "p25_agreed_rate": round(quantile(rates, 0.25), 2) if rates else None,
+            "p75_agreed_rate": round(quantile(rates, 0.75), 2) if rates else None,
+            "acceptance_rate": round(lane["accepted"] / calls, 3) if calls else None,
+            "average_negotiation_attempts": round(lane["attempts_sum"] / lane["attempts_count"], 2)
+                                            if lane["attempts_count"] else None
+        }
+
+    def catch_up(self, read_new_records, batch_size: int = ANALYTICS_CATCH_UP_BATCH):
+        """Ingest every record stored after the current cursor and refresh the touched summaries.
+
+        Records (with their payloads) are read batch_size at a time and the
+        cursor moves after each batch, so memory stays bounded on a cold start.
+        """
+        while True:
+            with self._lock:
+                records, cursor = read_new_records(self.cursor, limit=batch_size)
+                if cursor < self.cursor:
+                    # Storage was reset underneath us; rebuild from scratch
+                    self.reset()
+                    records, cursor = read_new_records(0, limit=batch_size)
+                touched = set()
+                for record in records:
+                    touched.update(self.ingest(record))
+                summaries = dict(self.summaries)
+                for key in touched:
+                    summaries[key] = self._summarize(key)
+                # Readers never lock: they see either the old or the new mapping
+                self.summaries = summaries
+                self.cursor = cursor
+            if len(records) < batch_size:
+                return
+
+    def lookup(self, origin: str, destination: str, equipment_type: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Precomputed stats for a lane, falling back to all equipment when the exact lane has none"""
+        summaries = self.summaries
+        if equipment_type:
+            summary = summaries.get(lane_key(origin, destination, equipment_type))
+            if summary is not None:
+                return summary
+        return summaries.get(lane_key(origin, destination))
+
+    def status(self) -> Dict[str, Any]:
+        return {"lanes": len(self.summaries), "unmatched_records": self.unmatched, "cursor": self.cursor}
+
+    def save_snapshot(self):
+        with self._lock:
+            snapshot = {
+                "version": self.SNAPSHOT_VERSION,
+                "source": self.source,
+                "cursor": self.cursor,
+                "unmatched": self.unmatched,
+                "lanes": {key: {"calls": list(lane["calls"]), "total": lane["total"]}
+                          for key, lane in self.lanes.items()}
+            }
+        tmp_path = f"{self.snapshot_file}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.snapshot_file)
+
+    def load_snapshot(self):
+        try:
+            with open(self.snapshot_file, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.error(f"Ignoring unreadable lane rate snapshot: {str(e)}")
+            return
+        
+        if snapshot.get("version") != self.SNAPSHOT_VERSION or snapshot.get("source") != self.source:
+            logger.info("Lane rate snapshot does not match the current store, rebuilding")
+            return
+        
+        for key, saved in snapshot["lanes"].items():
+            for call in saved["calls"]:
+                self._add(key, tuple(call))
+            self.lanes[key]["total"] = saved["total"]
+        self.summaries = {key: self._summarize(key) for key in self.lanes}
+        self.cursor = snapshot["cursor"]
+        self.unmatched = snapshot["unmatched"]
+
+class Categorical:
+    """Dictionary-encoded string column: a small integer code per row plus the distinct values"""
+
+    __slots__ = ("codes", "values", "_index")
+
+    def __init__(self, codes: Optional[array] = None, values: Optional[List[str]] = None):
+        self.codes = codes if codes is not None else array('I')
+        self.values = values if values is not None else []
+        self._index = {value: code for code, value in enumerate(self.values)}
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def append(self, value: str):
+        code = self._index.get(value)
+        if code is None:
+            code = self._index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def extend(self, other: "Categorical"):
+        remap = [self._index.get(value) for value in other.values]
+        for code, value in enumerate(other.values):
+            if remap[code] is None:
+                remap[code] = self._index[value] = len(self.values)
+                self.values.append(value)
+        self.codes.extend(remap[code] for code in other.codes)
+
+    def copy(self) -> "Categorical":
+        return Categorical(array(self.codes.typecode, self.codes), list(self.values))
+
+    def count(self, value: str) -> int:
+        code = self._index.get(value)
+        return self.codes.count(code) if code is not None else 0
+
+    def counts(self) -> Counter:
+        return Counter({self.values[code]: n for code, n in Counter(self.codes).items()})
+
+ARCHIVE_MAGIC = b"CALLCOL1"
+ARCHIVE_DATE_PATTERN = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+
+def write_segment(path: str, columns: Dict[str, Any]):
+    """Write columns to an immutable segment file: magic, JSON header, then one packed array per column"""
+    header: Dict[str, Any] = {"rows": len(next(iter(columns.values()))), "columns": {}}
+    blobs, offset = [], 0
+    for name, column in columns.items():
+        if isinstance(column, Categorical):
+            data = column.codes.tobytes()
+            entry = {"type": "category", "code_type": column.codes.typecode, "values": column.values}
+        else:
+            data = column.tobytes()
+            entry = {"type": column.typecode}
+        entry.update(offset=offset, length=len(data))
+        header["columns"][name] = entry
+        blobs.append(data)
+        offset += len(data)
+    
+    header_bytes = json.dumps(header).encode()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(ARCHIVE_MAGIC + struct.pack("<I", len(header_bytes)) + header_bytes)
+        for data in blobs:
+            f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+def read_segment(path: str, names: List[str]) -> Dict[str, Any]:
+    """Read only the named columns of a segment file"""
+    with open(path, 'rb') as f:
+        if f.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+            raise ValueError(f"Not an archive segment: {path}")
+        header_length = struct.unpack("<I", f.read(4))[0]
+        header = json.loads(f.read(header_length))
+        base = f.tell()
+        columns = {}
+        for name in names:
+            entry = header["columns"][name]
+            f.seek(base + entry["offset"])
+            if entry["type"] == "category":
+                codes = array(entry["code_type"])
+                codes.frombytes(f.read(entry["length"]))
+                columns[name] = Categorical(codes, entry["values"])
+            else:
+                values = array(entry["type"])
+                values.frombytes(f.read(entry["length"]))
+                columns[name] = values
+        return columns
+
+class RecordArchive:
+    """Time-partitioned columnar copy of the columns analytics queries use.
+
+    Records are rolled from the store into one directory per day
+    (archive/2025-08-03/), each holding immutable segment files with one
+    packed array per column and dictionary-encoded strings. Records stored
+    since the last roll are the hot partition, kept in memory. Queries prune
+    partitions by date and read only the columns they ask for; compaction
+    merges a day's segments into one file.
+
+    The manifest lists the segments of every partition and the store cursor
+    the archive covers. Rolls and compactions rewrite it under a file lock,
+    so several workers can share one archive directory.
+    """
+
+    COLUMNS = {
+        "id": "q",
+        "epoch": "d",
+        "booking_intent": "category",
+        "sentiment": "category",
+        "call_outcome": "category",
+        "numeric_status": "category",
+        "counter_offer_value": "d",
+        "agreed_rate_value": "d",
+        "negotiation_attempts_value": "d"
+    }
+    # Replaced segments are deleted a little later so in-flight scans can finish reading them
+    OBSOLETE_GRACE_SECONDS = 60.0
+
+    def __init__(self, root: str = ARCHIVE_DIR, source: str = ""):
+        self.root = root
+        self.source = source
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self._lock = threading.Lock()
+        self._manifest_version = None
+        self.manifest = self._empty_manifest()
+        self.hot: Dict[str, Dict[str, Any]] = {}
+        self.hot_rows = 0
+        self.hot_cursor = 0
+        self.rolls = 0
+        self.compactions = 0
+
+    def _empty_manifest(self) -> Dict[str, Any]:
+        return {"source": self.source, "cursor": 0, "partitions": {}, "obsolete": []}
+
+    def _new_columns(self) -> Dict[str, Any]:
+        return {name: Categorical() if kind == "category" else array(kind) for name, kind in self.COLUMNS.items()}
+
+    def _append_row(self, columns: Dict[str, Any], record: Dict[str, Any]):
+        timestamp = str(record.get('timestamp') or '')
+        try:
+            parsed = datetime.fromisoformat(timestamp)
+            epoch = (parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)).timestamp()
+        except ValueError:
+            epoch = math.nan
+        columns["id"].append(int(record['id']))
+        columns["epoch"].append(epoch)
+        for name in ("booking_intent", "sentiment", "call_outcome", "numeric_status"):
+            columns[name].append(record.get(name) or "")
+        for name in ("counter_offer_value", "agreed_rate_value", "negotiation_attempts_value"):
+            value = record.get(name)
+            columns[name].append(math.nan if value is None else float(value))
+
+    def _partition(self, records: List[Dict[str, Any]], partitions: Dict[str, Dict[str, Any]]):
+        """Append records to per-day column sets, keyed by the date of their timestamp"""
+        for record in records:
+            date = str(record.get('timestamp') or '')[:10]
+            if not ARCHIVE_DATE_PATTERN.match(date):
+                date = "undated"
+            columns = partitions.get(date)
+            if columns is None:
+                columns = partitions[date] = self._new_columns()
+            self._append_row(columns, record)
+
+    @contextmanager
+    def _file_lock(self):
+        os.makedirs(self.root, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.root, ".lock"), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_manifest(self):
+        """Pick up rolls and compactions made by any worker (caller holds the lock)"""
+        try:
+            stat = os.stat(self.manifest_path)
+            version = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            version = None
+        if version == self._manifest_version:
+            return
+        self._manifest_version = version
+        manifest = self._empty_manifest()
+        if version is not None:
+            try:
+                with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                    loaded = json.load(f)
+                if loaded.get("source") == self.source:
+                    manifest = loaded
+                else:
+                    logger.info("Archive was built from a different store, rebuilding")
+            except (OSError, ValueError) as e:
+                logger.error(f"Ignoring unreadable archive manifest: {str(e)}")
+        self.manifest = manifest
+        # The hot partition is everything after the manifest cursor
+        self.hot, self.hot_rows, self.hot_cursor = {}, 0, manifest["cursor"]
+
+    def _save_manifest(self):
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+        stat = os.stat(self.manifest_path)
+        self._manifest_version = (stat.st_mtime_ns, stat.st_size)
+
+    def _segment_path(self, date: str, name: str) -> str:
+        return os.path.join(self.root, date, name)
+
+    def _write_partition(self, date: str, columns: Dict[str, Any]) -> Dict[str, Any]:
+        ids = columns["id"]
+        name = f"{min(ids)}-{max(ids)}-{uuid.uuid4().hex[:8]}.col"
+        os.makedirs(os.path.join(self.root, date), exist_ok=True)
+        write_segment(self._segment_path(date, name), columns)
+        return {"file": name, "rows": len(ids)}
+
+    def refresh(self, read_new_records):
+        """Fold records stored since the last look into the in-memory hot partition"""
+        with self._lock:
+            self._load_manifest()
+            records, cursor = read_new_records(self.hot_cursor)
+            if cursor < self.hot_cursor:
+                # The store was reset underneath us; the next roll rebuilds the archive
+                self.hot, self.hot_rows = {}, 0
+                records, cursor = read_new_records(0)
+            self._partition(records, self.hot)
+            self.hot_rows += len(records)
+            self.hot_cursor = cursor
+
+    def roll_due(self) -> bool:
+        """Whether the hot partition is large or holds records from a day that has ended"""
+        with self._lock:
+            today = datetime.utcnow().strftime("%Y-%m-%d")
+            return self.hot_rows >= ARCHIVE_HOT_MAX_ROWS or any(date < today for date in self.hot)
+
+    def roll(self, read_new_records) -> int:
+        """Write the records stored since the last roll to their day partitions"""
+        with self._lock, self._file_lock():
+            # Re-read under the file lock; another worker may have rolled already
+            self._manifest_version = None
+            self._load_manifest()
+            records, cursor = read_new_records(self.manifest["cursor"])
+            if cursor < self.manifest["cursor"]:
+                logger.info("Record store was reset, rebuilding the archive")
+                self.manifest = dict(self._empty_manifest(), obsolete=self._all_segments())
+                records, cursor = read_new_records(0)
+            
+            partitions: Dict[str, Dict[str, Any]] = {}
+            self._partition(records, partitions)
+            for date, columns in partitions.items():
+                self.manifest["partitions"].setdefault(date, []).append(self._write_partition(date, columns))
+            self.manifest["cursor"] = cursor
+            self._save_manifest()
+            self.hot, self.hot_rows, self.hot_cursor = {}, 0, cursor
+            self.rolls += 1
+        if records:
+            logger.info(f"Rolled {len(records)} records into {len(partitions)} archive partitions")
+        return len(records)
+
+    def _all_segments(self) -> List[List[Any]]:
+        return [[date, segment["file"], time.time()]
+                for date, segments in self.manifest["partitions"].items() for segment in segments]
+
+    def compact(self) -> int:
+        """Merge each partition's segments into one file; returns the number of partitions compacted"""
+        today = datetime.utcnow().strftime("%Y-%m-%d")
+        compacted = 0
+        with self._lock, self._file_lock():
+            self._manifest_version = None
+            self._load_manifest()
+            for date, segments in sorted(self.manifest["partitions"].items()):
+                # Today's partition keeps growing, so it is only merged once it has many segments
+                if len(segments) < 2 or (date >= today and len(segments) < ARCHIVE_MAX_SEGMENTS):
+                    continue
+                merged = self._new_columns()
+                for segment in segments:
+                    columns = read_segment(self._segment_path(date, segment["file"]), list(self.COLUMNS))
+                    for name, column in columns.items():
+                        merged[name].extend(column)
+                self.manifest["partitions"][date] = [self._write_partition(date, merged)]
+                self.manifest["obsolete"].extend([date, s["file"], time.time()] for s in segments)
+                compacted += 1
+            
+            cutoff = time.time() - self.OBSOLETE_GRACE_SECONDS
+            remaining = []
+            for date, name, replaced_at in self.manifest["obsolete"]:
+                if replaced_at >= cutoff:
+                    remaining.append([date, name, replaced_at])
+                    continue
+                try:
+                    os.remove(self._segment_path(date, name))
+                except FileNotFoundError:
+                    pass
+            self.manifest["obsolete"] = remaining
+            self._save_manifest()
+            self.hot, self.hot_rows, self.hot_cursor = {}, 0, self.manifest["cursor"]
+            self.compactions += 1
+        if compacted:
+            logger.info(f"Compacted {compacted} archive partitions")
+        return compacted
+
+    def scan(self, names: List[str], start: Optional[str] = None, end: Optional[str] = None):
+        """Yield (date, columns) for each segment and hot partition with start <= date < end.
+
+        Only the requested columns are read from disk; call refresh first so
+        the hot partition is current.
+        """
+        def wanted(date: str) -> bool:
+            if start is None and end is None:
+                return True
+            return date != "undated" and (start is None or date >= start) and (end is None or date < end)
+        
+        with self._lock:
+            segments = [(date, segment["file"]) for date, date_segments in sorted(self.manifest["partitions"].items())
+                        if wanted(date) for segment in date_segments]
+            hot = [(date, {name: columns[name].copy() if isinstance(columns[name], Categorical)
+                           else array(columns[name].typecode, columns[name]) for name in names})
+                   for date, columns in sorted(self.hot.items()) if wanted(date)]
+        for date, name in segments:
+            yield date, read_segment(self._segment_path(date, name), names)
+        yield from hot
+
+    def summary(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+        """Call counts, bookings and rate averages for the days in [start, end)"""
+        total = 0
+        daily_bookings: Counter = Counter()
+        outcomes: Counter = Counter()
+        sentiments: Counter = Counter()
+        sums = {"agreed_rate_value": [0.0, 0], "counter_offer_value": [0.0, 0], "negotiation_attempts_value": [0.0, 0]}
+        for date, columns in self.scan(["booking_intent", "call_outcome", "sentiment"] + list(sums), start, end):
+            total += len(columns["booking_intent"])
+            daily_bookings[date] += columns["booking_intent"].count("yes")
+            outcomes.update(columns["call_outcome"].counts())
+            sentiments.update(columns["sentiment"].counts())
+            for name, acc in sums.items():
+                present = [v for v in columns[name] if v == v]
+                acc[0] += math.fsum(present)
+                acc[1] += len(present)
+        outcomes.pop("", None)
+        sentiments.pop("", None)
+        averages = {name: round(total_sum / count, 2) if count else None for name, (total_sum, count) in sums.items()}
+        return {
+            "start": start,
+            "end": end,
+            "total_records": total,
+            "successful_bookings": sum(daily_bookings.values()),
+            "call_outcome_counts": dict(outcomes.most_common()),
+            "sentiment_counts": dict(sentiments.most_common()),
+            "average_agreed_rate": averages["agreed_rate_value"],
+            "average_counter_offer": averages["counter_offer_value"],
+            "average_negotiation_attempts": averages["negotiation_attempts_value"] or 0,
+            "daily_bookings": {date: n for date, n in sorted(daily_bookings.items()) if n}
+        }
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            partitions = self.manifest["partitions"]
+            return {
+                "partitions": len(partitions),
+                "segments": sum(len(segments) for segments in partitions.values()),
+                "archived_rows": sum(s["rows"] for segments in partitions.values() for s in segments),
+                "hot_rows": self.hot_rows,
+                "rolls": self.rolls,
+                "compactions": self.compactions
+            }
+
+def lower_render_priority(increment: int = RENDER_NICENESS):
+    """Process pool initializer that deprioritizes chart rendering"""
+    if hasattr(os, "nice"):
+        os.nice(increment)
+
+def save_figure(path: str, dpi: int):
+    """Save the current pyplot figure atomically, inferring the format from the extension"""
+    import matplotlib.pyplot as plt
+    
+    tmp_path = f"{path}.tmp"
+    plt.savefig(tmp_path, dpi=dpi, bbox_inches='tight', format=os.path.splitext(path)[1][1:])
+    plt.close()
+    os.replace(tmp_path, path)
+
+def render_chart_files(stats: Dict[str, Any], rate_pairs: List[tuple], paths: Dict[str, str],
+                       dpi: int) -> List[str]:
+    """Render the analytics charts to the given paths and return them.
+
+    Runs in the render process pool, so it only touches its arguments and pyplot.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    
+    # Set style
+    plt.style.use('default')  # Use default style for better compatibility
+    sns.set_palette("husl")
+    
+    # Create figure with subplots
+    fig, axes = plt.subplots(2, 2, figsize=(15, 12))
+    fig.suptitle('HappyRobot Webhook Data Analytics', fontsize=16, fontweight='bold')
+    
+    # 1. Booking Intent Distribution (Pie Chart)
+    booking_counts = stats["booking_intent_counts"]
+    if booking_counts:
+        axes[0, 0].pie(list(booking_counts.values()), labels=list(booking_counts.keys()), autopct='%1.1f%%', startangle=90)
+        axes[0, 0].set_title('Booking Intent Distribution', fontweight='bold')
+    else:
+        axes[0, 0].text(0.5, 0.5, 'No booking intent data', ha='center', va='center', transform=axes[0, 0].transAxes)
+        axes[0, 0].set_title('Booking Intent Distribution', fontweight='bold')
+    
+    # 2. Sentiment Analysis (Bar Chart)
+    sentiment_counts = stats["sentiment_counts"]
+    if sentiment_counts:
+        colors = ['green', 'red', 'orange', 'blue', 'purple'][:len(sentiment_counts)]
+        axes[0, 1].bar(list(sentiment_counts.keys()), list(sentiment_counts.values()), color=colors)
+        axes[0, 1].set_title('Sentiment Analysis', fontweight='bold')
+        axes[0, 1].set_ylabel('Count')
+    else:
+        axes[0, 1].text(0.5, 0.5, 'No sentiment data', ha='center', va='center', transform=axes[0, 1].transAxes)
+        axes[0, 1].set_title('Sentiment Analysis', fontweight='bold')
+    
+    # 3. Call Outcome Analysis (Horizontal Bar Chart)
+    outcome_counts = stats["call_outcome_counts"]
+    if outcome_counts:
+        axes[1, 0].barh(list(outcome_counts.keys()), list(outcome_counts.values()), color='skyblue')
+        axes[1, 0].set_title('Call Outcome Analysis', fontweight='bold')
+        axes[1, 0].set_xlabel('Count')
+    else:
+        axes[1, 0].text(0.5, 0.5, 'No call outcome data', ha='center', va='center', transform=axes[1, 0].transAxes)
+        axes[1, 0].set_title('Call Outcome Analysis', fontweight='bold')
+    
+    # 4. Negotiation Attempts Distribution (Histogram)
+    attempts_histogram = stats["negotiation_attempts_histogram"]
+    if attempts_histogram:
+        values = [int(v) for v in attempts_histogram.keys()]
+        counts = list(attempts_histogram.values())
+        axes[1, 1].hist(values, bins=min(10, sum(counts)), weights=counts, color='lightcoral', alpha=0.7, edgecolor='black')
+        axes[1, 1].set_title('Negotiation Attempts Distribution', fontweight='bold')
+        axes[1, 1].set_xlabel('Number of Attempts')
+        axes[1, 1].set_ylabel('Frequency')
+    else:
+        axes[1, 1].text(0.5, 0.5, 'No negotiation data', ha='center', va='center', transform=axes[1, 1].transAxes)
+        axes[1, 1].set_title('Negotiation Attempts Distribution', fontweight='bold')
+    
+    # Adjust layout
+    plt.tight_layout()
+    
+    # Save chart
+    save_figure(paths["webhook_analytics"], dpi)
+    
+    # 1. Rate Analysis Chart
+    plt.figure(figsize=(12, 6))
+    
+    # Most recent (counter offer, agreed rate) pairs kept by the aggregator
+    if rate_pairs:
+        counter_offers = [p[0] for p in rate_pairs]
+        agreed_rates = [p[1] for p in rate_pairs]
+        plt.subplot(1, 2, 1)
+        plt.scatter(counter_offers, agreed_rates, alpha=0.6, color='blue')
+        plt.plot([min(counter_offers), max(counter_offers)], 
+                [min(counter_offers), max(counter_offers)], 
+                'r--', alpha=0.5, label='Perfect Match')
+        plt.xlabel('Counter Offer')
+        plt.ylabel('Agreed Rate')
+        plt.title('Counter Offer vs Agreed Rate')
+        plt.legend()
+    
+    # 2. Time Series Analysis
+    plt.subplot(1, 2, 2)
+    daily_bookings = sorted(stats["daily_bookings"].items())
+    dates = [datetime.strptime(day, "%Y-%m-%d").date() for day, _ in daily_bookings]
+    plt.plot(dates, [count for _, count in daily_bookings], marker='o', linewidth=2, markersize=6)
+    plt.xlabel('Date')
+    plt.ylabel('Successful Bookings')
+    plt.title('Daily Successful Bookings')
+    plt.xticks(rotation=45)
+    
+    plt.tight_layout()
+    save_figure(paths["detailed_analytics"], dpi)
+    
+    return list(paths.values())
+
+class ChartRenderer:
+    """Renders the analytics charts on the render pool with debouncing and a retention policy.
+
+    Webhooks only mark the charts dirty; the scheduled "charts" job renders at
+    most once per debounce window. Output files are named after a hash of the
+    plotted aggregates, so a render whose inputs have not changed is skipped
+    and the existing files are reused, including across restarts. After each
+    render the oldest renders are deleted until at most keep_renders of them
+    and max_bytes of chart files remain.
+    """
+
+    CHART_NAMES = ("webhook_analytics", "detailed_analytics")
+    # Plotted inputs; total_records and the other summary counts are not drawn
+    PLOTTED_STATS = ("booking_intent_counts", "sentiment_counts", "call_outcome_counts",
+                     "negotiation_attempts_histogram", "daily_bookings")
+    # Also matches the timestamped files written before content-hash naming
+    FILE_PATTERN = re.compile(r'^(webhook_analytics|detailed_analytics)_(.+?)(?:_(full|thumbnail))?\.(png|svg)$')
+
+    def __init__(self, manager: "DataManager", charts_dir: str = CHARTS_DIR,
+                 debounce: float = CHART_DEBOUNCE_SECONDS, keep_renders: int = CHART_KEEP_RENDERS,
+                 max_bytes: int = CHART_MAX_BYTES):
+        self.manager = manager
+        self.charts_dir = charts_dir
+        self.debounce = debounce
+        self.keep_renders = keep_renders
+        self.max_bytes = max_bytes
+        self.dirty = False
+        self.last_render_at = 0.0
+        # Hash and inputs of the newest render, so other variants can be drawn from the same data
+        self.latest: Optional[Dict[str, Any]] = None
+        self.renders = 0
+        self.skipped = 0
+        self.deleted_files = 0
+        self._lock = asyncio.Lock()
+
+    def mark_dirty(self):
+        """Note that new records arrived since the last render"""
+        self.dirty = True
+
+    def due(self) -> bool:
+        """Whether the charts are stale and the debounce window has passed"""
+        return self.dirty and time.time() - self.last_render_at >= self.debounce
+
+    def content_hash(self, stats: Dict[str, Any], rate_pairs: List[tuple]) -> str:
+        plotted = {key: stats[key] for key in self.PLOTTED_STATS}
+        source = json.dumps([plotted, rate_pairs], sort_keys=True)
+        return hashlib.sha1(source.encode()).hexdigest()[:16]
+
+    def paths(self, digest: str, variant: str, fmt: str) -> Dict[str, str]:
+        return {
+            name: os.path.join(self.charts_dir, f"{name}_{digest}_{variant}.{fmt}")
+            for name in self.CHART_NAMES
+        }
+
+    async def _render(self, stats: Dict[str, Any], rate_pairs: List[tuple], digest: str,
+                      variant: str, fmt: str) -> bool:
+        """Render one variant unless its files already exist; returns whether it rendered"""
+        paths = self.paths(digest, variant, fmt)
+        async with self._lock:
+            if all(os.path.exists(p) for p in paths.values()):
+                self.skipped += 1
+                return False
+            loop = asyncio.get_running_loop()
+            try:
+                with metrics.timer("stage_duration_seconds", stage="chart_render"):
+                    await loop.run_in_executor(self.manager.get_render_executor(), render_chart_files,
+                                               stats, rate_pairs, paths, CHART_VARIANTS[variant])
+            except BrokenExecutor:
+                # A crashed render process breaks the pool; start a fresh one next time
+                self.manager.render_executor = None
+                raise
+            self.renders += 1
+        logger.info(f"Generated charts: {', '.join(paths.values())}")
+        return True
+
+    async def render(self, outputs: Optional[List[tuple]] = None) -> Optional[Dict[str, Any]]:
+        """Render the current aggregates in each (variant, format), skipping unchanged ones.
 
-class WebhookData(BaseModel):
-    timestamp: str
-    booking_intent: Optional[str]
-    counter_offer: Optional[str]
-    agreed_rate: Optional[str]
-    negotiation_attempts: Optional[str]
-    sentiment: Optional[str]
-    call_outcome: Optional[str]
-    raw_payload: Optional[Dict[str, Any]]
+        Returns None when there are no records to chart.
+        """
+        self.dirty = False
+        self.last_render_at = time.time()
+        stats = await self.manager.refresh_analytics_async()
+        if stats["total_records"] == 0:
+            logger.info("No data available for chart generation")
+            return None
+
+        rate_pairs = self.manager.analytics.rate_pairs()
+        digest = self.content_hash(stats, rate_pairs)
+        rendered = False
+        for variant, fmt in outputs or CHART_DEFAULT_OUTPUTS:
+            rendered = await self._render(stats, rate_pairs, digest, variant, fmt) or rendered
+        self.latest = {"hash": digest, "stats": stats, "rate_pairs": rate_pairs,
+                       "generated_at": datetime.utcnow().isoformat()}
+        if rendered:
+            await self.manager.run_io(self.enforce_retention)
+        return {"hash": digest, "rendered": rendered, "generated_at": self.latest["generated_at"]}
+
+    async def latest_file(self, chart: str, variant: str, fmt: str) -> Optional[tuple]:
+        """Path and hash of the newest render of a chart, drawing the variant on demand"""
+        if self.latest is None:
+            if await self.render([(variant, fmt)]) is None:
+                return None
+        latest = self.latest
+        path = self.paths(latest["hash"], variant, fmt)[chart]
+        if not os.path.exists(path):
+            await self._render(latest["stats"], latest["rate_pairs"], latest["hash"], variant, fmt)
+        return path, latest["hash"]
+
+    def enforce_retention(self) -> int:
+        """Delete the oldest renders beyond the count and size limits, returning files removed"""
+        renders: Dict[str, List[tuple]] = {}
+        for name in os.listdir(self.charts_dir):
+            match = self.FILE_PATTERN.match(name)
+            if not match:
+                continue
+            path = os.path.join(self.charts_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            renders.setdefault(match.group(2), []).append((path, stat.st_mtime, stat.st_size))
+
+        newest_first = sorted(renders.items(), key=lambda item: max(f[1] for f in item[1]), reverse=True)
+        latest_hash = self.latest["hash"] if self.latest else None
+        kept, kept_bytes, removed = 0, 0, 0
+        for digest, files in newest_first:
+            size = sum(f[2] for f in files)
+            if digest == latest_hash or (kept < self.keep_renders and kept_bytes + size <= self.max_bytes):
+                kept += 1
+                kept_bytes += size
+                continue
+            for path, _, _ in files:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+
+        if removed:
+            self.deleted_files += removed
+            logger.info(f"Removed {removed} old chart files, keeping {kept} renders ({kept_bytes} bytes)")
+        return removed
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "dirty": self.dirty,
+            "latest_hash": self.latest["hash"] if self.latest else None,
+            "renders": self.renders,
+            "skipped_unchanged": self.skipped,
+            "deleted_files": self.deleted_files
+        }
 
 class DataManager:
     def __init__(self):
         self.csv_file = CSV_FILE
         self.charts_dir = CHARTS_DIR
         self.spreadsheet_id = SPREADSHEET_ID
-        self.csv_fields = [
-            "id", "timestamp", "booking_intent", "counter_offer", "agreed_rate",
-            "negotiation_attempts", "sentiment", "call_outcome", "raw_payload"
-        ]
+        self.csv_fields = RECORD_FIELDS
+        self.store = create_store(STORAGE_BACKEND)
+        self.ingest_log = IngestLog()
+        self.live = LiveFeed()
+        self.ingest_writer = IngestWriter(self.store, self.ingest_log, on_commit=self.live.publish)
+        self.analytics = AnalyticsAggregator(source=self.store.describe())
+        # Aggregator cursor the Analytics worksheet was last written at
+        self.analytics_published_cursor: Optional[int] = None
+        self.archive = RecordArchive(source=self.store.describe())
+        self.lane_rates = LaneRateIndex(source=self.store.describe(),
+                                        resolve_load=lambda load_id: load_book.book.get(load_id))
+        # Aggregate cursors and record count the snapshots on disk were saved at
+        self.snapshot_lock = threading.Lock()
+        self.snapshot_cursors = (self.analytics.cursor, self.lane_rates.cursor)
+        self.snapshot_total = self.analytics.total
+        self.snapshot_saved_at = time.monotonic()
         self.google_client = None
         self.spreadsheet = None
+        self.worksheets: Dict[str, Any] = {}
+        self.sheets_writer = SheetsWriter(self)
+        self.chart_renderer = ChartRenderer(self)
+        self.idempotency = IdempotencyCache()
+        # Blocking work runs on dedicated pools so async handlers never stall the event loop
+        self.io_executor = ThreadPoolExecutor(max_workers=STORE_IO_WORKERS, thread_name_prefix="store-io")
+        self.sheets_executor = ThreadPoolExecutor(max_workers=SHEETS_WORKERS, thread_name_prefix="sheets")
+        self.render_executor = None
         
+    async def run_io(self, func, *args, **kwargs):
+        """Run a blocking store or file call on the store I/O pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.io_executor, partial(func, *args, **kwargs))
+    
+    async def run_sheets(self, func, *args, **kwargs):
+        """Run a blocking gspread call on the Sheets pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.sheets_executor, partial(func, *args, **kwargs))
+    
+    def get_render_executor(self):
+        """Get the chart render pool, falling back to a thread when processes are unavailable"""
+        if self.render_executor is None:
+            try:
+                # spawn avoids forking a parent that already runs executor threads
+                self.render_executor = ProcessPoolExecutor(
+                    max_workers=RENDER_WORKERS, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=lower_render_priority
+                )
+            except (OSError, NotImplementedError) as e:
+                logger.warning(f"Process pool unavailable, rendering charts on a thread: {str(e)}")
+                self.render_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="render")
+        return self.render_executor
+    
+    def shutdown_executors(self):
+        """Stop the worker pools, letting running calls finish"""
+        self.io_executor.shutdown(wait=True)
+        self.sheets_executor.shutdown(wait=True)
+        if self.render_executor is not None:
+            self.render_executor.shutdown(wait=True)
+            self.render_executor = None
+    
     def get_google_client(self):
         """Initialize Google Sheets client"""
         if self.google_client is None:
             try:
+                import gspread
+                from google.oauth2.service_account import Credentials
+                
                 # Check if credentials file exists
                 if not os.path.exists(GOOGLE_CREDENTIALS_FILE):
                     logger.error(f"Google credentials file not found: {GOOGLE_CREDENTIALS_FILE}")
@@ -160,9 +3796,10 @@ class DataManager:
             if client is None:
                 return None
             
+            import gspread
             try:
                 # Try to open existing spreadsheet
-                self.spreadsheet = client.open_by_key(self.spreadsheet_id)
+                self.spreadsheet = with_sheets_retry(client.open_by_key, self.spreadsheet_id)
                 logger.info(f"Opened existing spreadsheet: {self.spreadsheet.title}")
             except gspread.SpreadsheetNotFound:
                 logger.error(f"Spreadsheet not found with ID: {self.spreadsheet_id}")
@@ -173,121 +3810,169 @@ class DataManager:
         
         return self.spreadsheet
     
-    def get_next_id(self) -> int:
-        """Get the next ID for the record"""
-        if not os.path.exists(self.csv_file):
-            return 1
+    def get_worksheet(self, title: str, rows: int = 1000, cols: int = 20,
+                      headers: Optional[List[Any]] = None):
+        """Get a cached worksheet handle, creating the worksheet if needed"""
+        worksheet = self.worksheets.get(title)
+        if worksheet is not None:
+            return worksheet
         
-        with open(self.csv_file, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            records = list(reader)
-            if not records:
-                return 1
-            return max(int(record.get('id', 0)) for record in records) + 1
-    
-    def save_to_csv(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Save data to CSV file"""
-        record_id = self.get_next_id()
-        data['id'] = record_id
+        spreadsheet = self.get_spreadsheet()
+        if spreadsheet is None:
+            return None
         
-        file_exists = os.path.isfile(self.csv_file)
+        import gspread
+        try:
+            worksheet = with_sheets_retry(spreadsheet.worksheet, title)
+        except gspread.WorksheetNotFound:
+            worksheet = with_sheets_retry(spreadsheet.add_worksheet, title=title, rows=rows, cols=cols)
+            if headers:
+                with_sheets_retry(worksheet.append_row, headers)
+            logger.info(f"Created new worksheet: {title}")
         
-        with open(self.csv_file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=self.csv_fields)
-            if not file_exists:
-                writer.writeheader()
-            writer.writerow(data)
+        self.worksheets[title] = worksheet
+        return worksheet
+    
+    @timed_stage("store_append")
+    def save_record(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Save a record to the configured store through the ingest log, assigning its ID"""
+        return self.ingest_writer.write([data], [None])[0][0]
+    
+    @timed_stage("store_append")
+    async def save_record_async(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Append a record; the event loop waits on its group commit without holding a thread"""
+        results = await asyncio.wrap_future(self.ingest_writer.submit([data], [None]))
+        return results[0][0]
+    
+    @timed_stage("store_append")
+    def save_record_once(self, data: Dict[str, Any], key: str) -> tuple:
+        """Save a record unless its idempotency key was already stored; returns (record, created)"""
+        record, created = self.ingest_writer.write([data], [key])[0]
+        self.idempotency.put(key, record['id'])
+        return record, created
+    
+    @timed_stage("store_append")
+    async def save_record_once_async(self, data: Dict[str, Any], key: str) -> tuple:
+        """Idempotent append through the ingest log's group commit"""
+        results = await asyncio.wrap_future(self.ingest_writer.submit([data], [key]))
+        record, created = results[0]
+        self.idempotency.put(key, record['id'])
+        return record, created
+    
+    @timed_stage("store_append_batch")
+    def save_records(self, records: List[Dict[str, Any]], keys: List[Optional[str]]) -> List[tuple]:
+        """Store a batch in one logged group and one append; returns (record, created) per input"""
+        results = self.ingest_writer.write(records, keys)
+        for (record, _), key in zip(results, keys):
+            if key is not None:
+                self.idempotency.put(key, record['id'])
+        return results
+    
+    def ingest_webhook_batch(self, body: bytes, ndjson: bool) -> Dict[str, Any]:
+        """Parse, validate and store a webhook batch; runs on the store I/O pool"""
+        payloads, raw_payloads = parse_webhook_batch(body, ndjson)
+        if len(payloads) > WEBHOOK_BATCH_MAX_RECORDS:
+            raise OverflowError(f"Batch of {len(payloads)} records exceeds the limit of {WEBHOOK_BATCH_MAX_RECORDS}")
+        valid, rejected = validate_webhook_batch(payloads, datetime.utcnow().isoformat(), raw_payloads)
+        keys = [idempotency_key({}, payloads[index]) for index, _ in valid]
+        results = self.save_records([record for _, record in valid], keys)
         
-        logger.info(f"Saved record {record_id} to CSV")
-        return data
+        record_ids: List[Optional[int]] = [None] * len(payloads)
+        created = []
+        for (index, _), (record, was_created) in zip(valid, results):
+            record_ids[index] = record['id']
+            if was_created:
+                created.append(record)
+        return {
+            "received": len(payloads),
+            "created": created,
+            "duplicates": len(results) - len(created),
+            "rejected": rejected,
+            "record_ids": record_ids,
+            "flush_due": self.sheets_writer.add_many(created)
+        }
+    
+    def recover_ingest_log(self) -> int:
+        """Store the records that workers which died had logged but not committed"""
+        def commit(entries: List[tuple]):
+            results = self.store.append_many([record for _, record in entries], [key for key, _ in entries],
+                                             IDEMPOTENCY_TTL_SECONDS)
+            created = [record for record, created in results if created]
+            self.sheets_writer.add_many(created)
+            self.live.publish(created)
+        
+        replayed = self.ingest_log.recover(commit)
+        if replayed:
+            logger.warning(f"Recovered {replayed} logged records from stopped workers")
+        return replayed
+    
+    def purge_idempotency_keys(self) -> int:
+        """Drop stored idempotency keys older than the TTL"""
+        removed = self.store.purge_keys(time.time() - IDEMPOTENCY_TTL_SECONDS)
+        if removed:
+            logger.info(f"Purged {removed} expired idempotency keys")
+        return removed
     
     def save_to_google_sheets(self, data: Dict[str, Any]) -> bool:
-        """Save data to Google Sheets"""
-        try:
-            spreadsheet = self.get_spreadsheet()
-            if spreadsheet is None:
-                logger.error("Could not access Google Spreadsheet")
+        """Buffer a record for the next batched Google Sheets append"""
+        return self.sheets_writer.add(data)
+    
+    @timed_stage("sheets_append")
+    def flush_google_sheets(self) -> bool:
+        """Append all buffered records to Google Sheets in one call"""
+        return self.sheets_writer.flush()
+    
+    async def flush_google_sheets_async(self) -> bool:
+        """Flush the Sheets buffer on the Sheets pool"""
+        return await self.run_sheets(self.flush_google_sheets)
+    
+    def save_analytics_snapshots(self, force: bool = False) -> bool:
+        """Persist the analytics and lane-rate aggregates so the next startup only replays newer records.
+
+        Each save rewrites both snapshots whole, so it waits for
+        ANALYTICS_SNAPSHOT_RECORDS new records or ANALYTICS_SNAPSHOT_INTERVAL
+        seconds unless forced. Returns whether the snapshots were written.
+        """
+        with self.snapshot_lock:
+            cursors = (self.analytics.cursor, self.lane_rates.cursor)
+            if cursors == self.snapshot_cursors:
+                return False
+            folded = abs(self.analytics.total - self.snapshot_total)
+            if (not force and folded < ANALYTICS_SNAPSHOT_RECORDS
+                    and time.monotonic() - self.snapshot_saved_at < ANALYTICS_SNAPSHOT_INTERVAL):
                 return False
-            
-            # Get or create the main data worksheet
             try:
-                worksheet = spreadsheet.worksheet("Webhook Data")
-            except gspread.WorksheetNotFound:
-                # Create new worksheet
-                worksheet = spreadsheet.add_worksheet(title="Webhook Data", rows=1000, cols=20)
-                # Add headers
-                worksheet.append_row(self.csv_fields)
-                logger.info("Created new worksheet: Webhook Data")
-            
-            # Prepare row data
-            row_data = [
-                data.get('id', ''),
-                data.get('timestamp', ''),
-                data.get('booking_intent', ''),
-                data.get('counter_offer', ''),
-                data.get('agreed_rate', ''),
-                data.get('negotiation_attempts', ''),
-                data.get('sentiment', ''),
-                data.get('call_outcome', ''),
-                data.get('raw_payload', '')
-            ]
-            
-            # Append row to worksheet
-            worksheet.append_row(row_data)
-            logger.info(f"Saved record {data.get('id')} to Google Sheets")
+                self.analytics.save_snapshot()
+                self.lane_rates.save_snapshot()
+            except OSError as e:
+                logger.error(f"Error saving analytics snapshots: {str(e)}")
+                return False
+            self.snapshot_cursors = cursors
+            self.snapshot_total = self.analytics.total
+            self.snapshot_saved_at = time.monotonic()
             return True
-            
-        except Exception as e:
-            logger.error(f"Error saving to Google Sheets: {str(e)}")
-            return False
     
+    @timed_stage("sheets_analytics")
     def update_google_sheets_analytics(self):
         """Update analytics in Google Sheets"""
         try:
-            spreadsheet = self.get_spreadsheet()
-            if spreadsheet is None:
+            stats = self.refresh_analytics()
+            cursor = self.analytics.cursor
+            self.save_analytics_snapshots()
+            if stats["total_records"] == 0:
                 return False
+            if cursor == self.analytics_published_cursor:
+                # Nothing was stored since the sheet was last written
+                return True
             
             # Get or create analytics worksheet
-            try:
-                analytics_worksheet = spreadsheet.worksheet("Analytics")
-            except gspread.WorksheetNotFound:
-                analytics_worksheet = spreadsheet.add_worksheet(title="Analytics", rows=100, cols=10)
-                logger.info("Created new worksheet: Analytics")
-            
-            # Read CSV data for analytics
-            if not os.path.exists(self.csv_file):
+            analytics_worksheet = self.get_worksheet("Analytics", rows=100, cols=10)
+            if analytics_worksheet is None:
                 return False
             
-            df = pd.read_csv(self.csv_file)
-            
-            # Clear existing data
-            analytics_worksheet.clear()
-            
-            # Add summary statistics
-            analytics_data = [
-                ["Summary Statistics"],
-                ["", ""],
-                ["Total Records", len(df)],
-                ["Successful Bookings", len(df[df['booking_intent'] == 'yes']) if 'booking_intent' in df.columns else 0],
-                ["Positive Sentiment", len(df[df['sentiment'] == 'positive']) if 'sentiment' in df.columns else 0],
-                ["", ""],
-                ["Average Negotiation Attempts", ""]
-            ]
-            
-            # Calculate average negotiation attempts
-            if 'negotiation_attempts' in df.columns:
-                try:
-                    negotiation_attempts = df['negotiation_attempts'].astype(str).str.extract(r'(\d+)').astype(float)
-                    avg_negotiation = negotiation_attempts.mean()
-                    avg_negotiation = round(avg_negotiation, 2) if not pd.isna(avg_negotiation) else 0
-                    analytics_data[6][1] = avg_negotiation
-                except:
-                    analytics_data[6][1] = 0
-            
-            # Write analytics data
-            for row in analytics_data:
-                analytics_worksheet.append_row(row)
+            # The report is computed here and written in one call, without clearing the sheet first
+            publish_rows(analytics_worksheet, analytics_report_rows(self.analytics.report()))
+            self.analytics_published_cursor = cursor
             
             logger.info("Updated Google Sheets analytics")
             return True
@@ -296,178 +3981,93 @@ class DataManager:
             logger.error(f"Error updating Google Sheets analytics: {str(e)}")
             return False
     
-    def get_all_records(self) -> List[Dict[str, Any]]:
-        """Get all records from CSV file"""
-        if not os.path.exists(self.csv_file):
-            return []
-        
-        with open(self.csv_file, 'r', newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            return list(reader)
+    async def update_google_sheets_analytics_async(self) -> bool:
+        """Refresh the Analytics worksheet on the Sheets pool"""
+        return await self.run_sheets(self.update_google_sheets_analytics)
     
-    def generate_charts(self):
-        """Generate charts from the data"""
-        if not os.path.exists(self.csv_file):
-            return
-        
+    def get_all_records(self, with_payload: bool = False) -> List[CompactRecord]:
+        """Get all records from the configured store as compact records"""
+        return self.store.get_all_records(with_payload)
+    
+    def query_records(self, **filters):
+        """Yield records matching the dashboard filters without materializing them"""
+        return self.store.query_records(**filters)
+    
+    async def query_records_async(self, **filters) -> List[Dict[str, Any]]:
+        """Collect a bounded page of matching records on the store I/O pool"""
+        return await self.run_io(lambda: list(self.store.query_records(**filters)))
+    
+    def read_new_records(self, cursor: int = 0, with_payload: bool = False, limit: Optional[int] = None):
+        """Read up to limit records stored after a store-specific cursor"""
+        return self.store.read_new_records(cursor, with_payload, limit)
+    
+    @timed_stage("analytics_refresh")
+    def refresh_analytics(self) -> Dict[str, Any]:
+        """Fold newly stored records into the running aggregates and return a summary"""
+        self.analytics.catch_up(self.read_new_records)
+        # Lanes come from raw_payload, so read it with the rows rather than once per record
+        self.lane_rates.catch_up(partial(self.read_new_records, with_payload=True))
+        return self.analytics.summary()
+    
+    async def refresh_analytics_async(self) -> Dict[str, Any]:
+        """Catch the aggregates up on the store I/O pool"""
+        return await self.run_io(self.refresh_analytics)
+    
+    @timed_stage("archive_roll")
+    def roll_archive(self) -> int:
+        """Refresh the archive's hot partition and roll it to disk once a day has ended or it is full"""
+        self.archive.refresh(self.read_new_records)
+        if not self.archive.roll_due():
+            return 0
+        return self.archive.roll(self.read_new_records)
+    
+    async def roll_archive_async(self) -> int:
+        return await self.run_io(self.roll_archive)
+    
+    @timed_stage("archive_compact")
+    def compact_archive(self) -> int:
+        """Merge each day's archive segments into one file"""
+        return self.archive.compact()
+    
+    async def compact_archive_async(self) -> int:
+        return await self.run_io(self.compact_archive)
+    
+    def archive_summary(self, start: Optional[str], end: Optional[str]) -> Dict[str, Any]:
+        """Range analytics from the archive, reading only the partitions in [start, end)"""
+        self.archive.refresh(self.read_new_records)
+        return self.archive.summary(start, end)
+    
+    @timed_stage("charts")
+    async def generate_charts_async(self) -> bool:
+        """Render any changed charts on the render pool and list new ones in the Charts sheet"""
         try:
-            # Read data
-            df = pd.read_csv(self.csv_file)
-            
-            if len(df) == 0:
-                logger.info("No data available for chart generation")
-                return
-            
-            # Set style
-            plt.style.use('default')  # Use default style for better compatibility
-            sns.set_palette("husl")
-            
-            # Create figure with subplots
-            fig, axes = plt.subplots(2, 2, figsize=(15, 12))
-            fig.suptitle('HappyRobot Webhook Data Analytics', fontsize=16, fontweight='bold')
-            
-            # 1. Booking Intent Distribution (Pie Chart)
-            if 'booking_intent' in df.columns and len(df['booking_intent'].value_counts()) > 0:
-                booking_counts = df['booking_intent'].value_counts()
-                axes[0, 0].pie(booking_counts.values, labels=booking_counts.index, autopct='%1.1f%%', startangle=90)
-                axes[0, 0].set_title('Booking Intent Distribution', fontweight='bold')
-            else:
-                axes[0, 0].text(0.5, 0.5, 'No booking intent data', ha='center', va='center', transform=axes[0, 0].transAxes)
-                axes[0, 0].set_title('Booking Intent Distribution', fontweight='bold')
-            
-            # 2. Sentiment Analysis (Bar Chart)
-            if 'sentiment' in df.columns and len(df['sentiment'].value_counts()) > 0:
-                sentiment_counts = df['sentiment'].value_counts()
-                colors = ['green', 'red', 'orange', 'blue', 'purple'][:len(sentiment_counts)]
-                axes[0, 1].bar(sentiment_counts.index, sentiment_counts.values, color=colors)
-                axes[0, 1].set_title('Sentiment Analysis', fontweight='bold')
-                axes[0, 1].set_ylabel('Count')
-            else:
-                axes[0, 1].text(0.5, 0.5, 'No sentiment data', ha='center', va='center', transform=axes[0, 1].transAxes)
-                axes[0, 1].set_title('Sentiment Analysis', fontweight='bold')
-            
-            # 3. Call Outcome Analysis (Horizontal Bar Chart)
-            if 'call_outcome' in df.columns and len(df['call_outcome'].value_counts()) > 0:
-                outcome_counts = df['call_outcome'].value_counts()
-                axes[1, 0].barh(outcome_counts.index, outcome_counts.values, color='skyblue')
-                axes[1, 0].set_title('Call Outcome Analysis', fontweight='bold')
-                axes[1, 0].set_xlabel('Count')
-            else:
-                axes[1, 0].text(0.5, 0.5, 'No call outcome data', ha='center', va='center', transform=axes[1, 0].transAxes)
-                axes[1, 0].set_title('Call Outcome Analysis', fontweight='bold')
-            
-            # 4. Negotiation Attempts Distribution (Histogram)
-            if 'negotiation_attempts' in df.columns:
-                try:
-                    negotiation_attempts = df['negotiation_attempts'].astype(str).str.extract(r'(\d+)').astype(float)
-                    valid_attempts = negotiation_attempts.dropna()
-                    if len(valid_attempts) > 0:
-                        axes[1, 1].hist(valid_attempts, bins=min(10, len(valid_attempts)), color='lightcoral', alpha=0.7, edgecolor='black')
-                        axes[1, 1].set_title('Negotiation Attempts Distribution', fontweight='bold')
-                        axes[1, 1].set_xlabel('Number of Attempts')
-                        axes[1, 1].set_ylabel('Frequency')
-                    else:
-                        axes[1, 1].text(0.5, 0.5, 'No negotiation data', ha='center', va='center', transform=axes[1, 1].transAxes)
-                        axes[1, 1].set_title('Negotiation Attempts Distribution', fontweight='bold')
-                except:
-                    axes[1, 1].text(0.5, 0.5, 'No negotiation data', ha='center', va='center', transform=axes[1, 1].transAxes)
-                    axes[1, 1].set_title('Negotiation Attempts Distribution', fontweight='bold')
-            else:
-                axes[1, 1].text(0.5, 0.5, 'No negotiation data', ha='center', va='center', transform=axes[1, 1].transAxes)
-                axes[1, 1].set_title('Negotiation Attempts Distribution', fontweight='bold')
-            
-            # Adjust layout
-            plt.tight_layout()
-            
-            # Save chart
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            chart_file = os.path.join(self.charts_dir, f"webhook_analytics_{timestamp}.png")
-            plt.savefig(chart_file, dpi=300, bbox_inches='tight')
-            plt.close()
-            
-            logger.info(f"Generated charts: {chart_file}")
-            
-            # Generate additional detailed charts
-            self.generate_detailed_charts(df, timestamp)
+            result = await self.chart_renderer.render()
+            if result is None or not result["rendered"]:
+                return True
+            return await self.run_sheets(self.upload_charts_to_sheets, result["hash"], result["generated_at"])
             
         except Exception as e:
             logger.error(f"Error generating charts: {str(e)}")
-            # Don't raise exception, just log the error
-    
-    def generate_detailed_charts(self, df: pd.DataFrame, timestamp: str):
-        """Generate additional detailed charts"""
-        
-        # 1. Rate Analysis Chart
-        plt.figure(figsize=(12, 6))
-        
-        # Extract numeric values from rate columns
-        counter_offers = df['counter_offer'].astype(str).str.extract(r'(\d+)').astype(float)
-        agreed_rates = df['agreed_rate'].astype(str).str.extract(r'(\d+)').astype(float)
-        
-        # Create rate comparison
-        valid_data = counter_offers.notna() & agreed_rates.notna()
-        if valid_data.sum() > 0:
-            plt.subplot(1, 2, 1)
-            plt.scatter(counter_offers[valid_data], agreed_rates[valid_data], alpha=0.6, color='blue')
-            plt.plot([counter_offers[valid_data].min(), counter_offers[valid_data].max()], 
-                    [counter_offers[valid_data].min(), counter_offers[valid_data].max()], 
-                    'r--', alpha=0.5, label='Perfect Match')
-            plt.xlabel('Counter Offer')
-            plt.ylabel('Agreed Rate')
-            plt.title('Counter Offer vs Agreed Rate')
-            plt.legend()
-        
-        # 2. Time Series Analysis
-        plt.subplot(1, 2, 2)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        daily_bookings = df[df['booking_intent'] == 'yes'].groupby(df['timestamp'].dt.date).size()
-        plt.plot(daily_bookings.index, daily_bookings.values, marker='o', linewidth=2, markersize=6)
-        plt.xlabel('Date')
-        plt.ylabel('Successful Bookings')
-        plt.title('Daily Successful Bookings')
-        plt.xticks(rotation=45)
-        
-        plt.tight_layout()
-        detailed_chart_file = os.path.join(self.charts_dir, f"detailed_analytics_{timestamp}.png")
-        plt.savefig(detailed_chart_file, dpi=300, bbox_inches='tight')
-        plt.close()
-        
-        logger.info(f"Generated detailed charts: {detailed_chart_file}")
-        
-        # Upload charts to Google Sheets
-        self.upload_charts_to_sheets(timestamp)
-
-    def upload_charts_to_sheets(self, timestamp: str):
+            return False
+    
+    @timed_stage("sheets_charts")
+    def upload_charts_to_sheets(self, digest: str, generated_at: str):
         """Upload generated charts to Google Sheets"""
         try:
-            client = self.get_google_client()
-            if not client:
-                return False
-            
-            spreadsheet = client.open_by_key(SPREADSHEET_ID)
-            
             # Get or create "Charts" worksheet
-            try:
-                charts_worksheet = spreadsheet.worksheet("Charts")
-            except gspread.WorksheetNotFound:
-                charts_worksheet = spreadsheet.add_worksheet(title="Charts", rows=1000, cols=20)
-                # Add headers
-                headers = ["Chart Type", "Generated At", "Description", "File Path"]
-                charts_worksheet.append_row(headers)
+            headers = ["Chart Type", "Generated At", "Description", "File Path"]
+            charts_worksheet = self.get_worksheet("Charts", rows=1000, cols=20, headers=headers)
+            if charts_worksheet is None:
+                return False
             
             # Add chart information to the worksheet
-            chart_files = [
-                f"webhook_analytics_{timestamp}.png",
-                f"detailed_analytics_{timestamp}.png"
-            ]
-            
+            paths = self.chart_renderer.paths(digest, "full", "png")
             chart_info = [
-                ["Main Analytics Dashboard", timestamp, "Booking Intent, Sentiment, Call Outcome, and Negotiation Attempts", f"charts/webhook_analytics_{timestamp}.png"],
-                ["Detailed Analytics", timestamp, "Rate Analysis and Time Series Analysis", f"charts/detailed_analytics_{timestamp}.png"]
+                ["Main Analytics Dashboard", generated_at, "Booking Intent, Sentiment, Call Outcome, and Negotiation Attempts", paths["webhook_analytics"]],
+                ["Detailed Analytics", generated_at, "Rate Analysis and Time Series Analysis", paths["detailed_analytics"]]
             ]
             
-            for info in chart_info:
-                charts_worksheet.append_row(info)
+            with_sheets_retry(charts_worksheet.append_rows, chart_info)
             
             logger.info("Charts information uploaded to Google Sheets")
             return True
@@ -476,60 +4076,682 @@ class DataManager:
             logger.error(f"Error uploading charts to Google Sheets: {str(e)}")
             return False
 
+def with_sheets_retry(func, *args, **kwargs):
+    """Call a gspread method, retrying rate-limit (429) and 5xx errors with backoff"""
+    import gspread
+    
+    method = getattr(func, '__name__', 'call')
+    for attempt in range(SHEETS_MAX_RETRIES + 1):
+        metrics.inc("sheets_api_calls_total", method=method)
+        try:
+            return func(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            status = getattr(e.response, 'status_code', None) or e.code
+            if status not in SHEETS_RETRY_STATUS_CODES or attempt == SHEETS_MAX_RETRIES:
+                metrics.inc("sheets_api_errors_total", method=method, status=str(status))
+                raise
+            metrics.inc("sheets_api_retries_total", method=method, status=str(status))
+            delay = SHEETS_RETRY_BASE_DELAY * (2 ** attempt) + random.uniform(0, SHEETS_RETRY_BASE_DELAY)
+            logger.warning(f"Google Sheets API returned {status}, retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+def analytics_report_rows(report: Dict[str, Any]) -> List[List[Any]]:
+    """Lay the analytics report out as worksheet rows, one titled section after another"""
+    summary, funnel = report["summary"], report["funnel"]
+    rows: List[List[Any]] = [
+        ["Analytics Report", report["generated_at"]],
+        [],
+        ["Summary Statistics"],
+        ["Total Records", summary["total_records"]],
+        ["Successful Bookings", summary["successful_bookings"]],
+        ["Positive Sentiment", summary["positive_sentiment"]],
+        ["Average Negotiation Attempts", summary["average_negotiation_attempts"]],
+        [],
+        ["Conversion Funnel by Outcome"],
+        ["Outcome"] + [stage.title() for stage in funnel["stages"]] + ["Booking Rate"]
+    ]
+    for outcome, stages in funnel["by_outcome"].items():
+        rows.append([outcome] + [stages[stage] for stage in funnel["stages"]] + [stages["booking_rate"]])
+    overall = funnel["overall"]
+    rows.append(["All"] + [overall[stage] for stage in funnel["stages"]]
+                + [round(overall["booked"] / overall["calls"], 4) if overall["calls"] else 0])
+    
+    crosstab = report["sentiment_by_outcome"]
+    rows += [[], ["Sentiment by Call Outcome"], ["Sentiment"] + crosstab["outcomes"]]
+    for sentiment, counts in crosstab["counts"].items():
+        rows.append([sentiment] + [counts[outcome] for outcome in crosstab["outcomes"]])
+    
+    deltas = report["rate_delta"]
+    rows += [
+        [], ["Agreed Rate minus Counter Offer ($)"],
+        ["Calls With Both Rates", deltas["count"]],
+        ["Mean", deltas["mean"] if deltas["mean"] is not None else ""],
+        ["From", "To", "Calls"]
+    ]
+    for bucket, count in deltas["histogram"].items():
+        rows.append([int(bucket), int(bucket) + deltas["bucket_width"], count])
+    
+    rows += [[], ["Hourly Call Volume (UTC)"], ["Hour", "Calls", "Bookings"]]
+    rows += [[f"{hour}:00", volume["calls"], volume["bookings"]] for hour, volume in report["hourly_volume"].items()]
+    return rows
+
+def publish_rows(worksheet, rows: List[List[Any]]):
+    """Replace a worksheet's contents with one values update.
+
+    The rows are padded with blanks to cover the whole grid, so whatever a
+    longer earlier version left behind is overwritten in the same call and
+    readers never see the sheet half-written or empty. The grid only grows
+    (one extra call) when the rows do not fit.
+    """
+    from gspread.utils import rowcol_to_a1
+    
+    width = max(len(row) for row in rows)
+    if len(rows) > worksheet.row_count or width > worksheet.col_count:
+        with_sheets_retry(worksheet.resize, rows=max(len(rows), worksheet.row_count),
+                          cols=max(width, worksheet.col_count))
+    height, width = worksheet.row_count, worksheet.col_count
+    grid = [list(row) + [""] * (width - len(row)) for row in rows]
+    grid += [[""] * width for _ in range(height - len(rows))]
+    with_sheets_retry(worksheet.update, range_name=f"A1:{rowcol_to_a1(height, width)}", values=grid)
+
+class SheetsWriter:
+    """Buffers webhook rows and appends them to the "Webhook Data" worksheet in batches.
+
+    The id of the last record known to be in the sheet is kept in a small state
+    file, so after a crash only the records above that high-water mark are
+    re-synced from the record store. The file belongs to one process: a second
+    worker writing its own mark there would move it back or past rows that
+    worker has not appended.
+    """
+
+    WORKSHEET_TITLE = "Webhook Data"
+
+    def __init__(self, manager: "DataManager", state_file: str = SHEETS_SYNC_STATE_FILE,
+                 batch_size: int = SHEETS_BATCH_SIZE, flush_interval: float = SHEETS_FLUSH_INTERVAL):
+        self.manager = manager
+        self.state_file = state_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer: List[Dict[str, Any]] = []
+        self.oldest_buffered_at: Optional[float] = None
+        self.consecutive_failures = 0
+        self.retry_at = 0.0
+        self.synced_id = self._load_synced_id()
+        # Set once records were left out of a full buffer; they are pulled from the store in id order later
+        self.overflowed = False
+        self.api_calls = 0
+        self._lock = threading.Lock()
+        # Serializes flushes so batches reach the sheet in id order
+        self._flush_lock = threading.Lock()
+
+    def _load_synced_id(self) -> int:
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return int(json.load(f).get("synced_id", 0))
+        except (OSError, ValueError):
+            return 0
+
+    def _save_synced_id(self):
+        tmp_path = f"{self.state_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"synced_id": self.synced_id}, f)
+        os.replace(tmp_path, self.state_file)
+
+    def to_row(self, data: Dict[str, Any]) -> List[Any]:
+        return [data.get(field, '') for field in self.manager.csv_fields]
+
+    def add(self, data: Dict[str, Any]) -> bool:
+        """Buffer a record, returning True when the batch size has been reached"""
+        return self.add_many([data])
+
+    def add_many(self, records: List[Dict[str, Any]]) -> bool:
+        """Buffer records under one lock, returning True when the batch size has been reached"""
+        with self._lock:
+            added = False
+            for data in records:
+                if int(data.get('id', 0)) <= self.synced_id:
+                    continue
+                if self.overflowed or len(self.buffer) >= SHEETS_MAX_BUFFER:
+                    # Leave this and every later record in the store so the high-water mark never
+                    # skips it; resync pulls them in id order after the next successful flush
+                    self.overflowed = True
+                    added = True
+                    continue
+                self.buffer.append(data)
+                added = True
+            if not added:
+                return False
+            if self.oldest_buffered_at is None:
+                self.oldest_buffered_at = time.time()
+            return (len(self.buffer) >= self.batch_size or self.overflowed) and time.time() >= self.retry_at
+
+    def due(self) -> bool:
+        """Whether the buffer should be flushed on the size or time threshold"""
+        with self._lock:
+            if not self.buffer or time.time() < self.retry_at:
+                return False
+            return (len(self.buffer) >= self.batch_size or
+                    time.time() - self.oldest_buffered_at >= self.flush_interval)
+
+    def resync(self):
+        """Buffer stored records above the high-water mark that never reached the sheet"""
+        with self._lock:
+            self.overflowed = False
+        missing = list(self.manager.store.query_records(after_id=self.synced_id, limit=SHEETS_MAX_BUFFER))
+        with self._lock:
+            by_id = {int(r['id']): r for r in self.buffer}
+            by_id.update((int(r['id']), r) for r in missing)
+            if len(missing) == SHEETS_MAX_BUFFER:
+                # More remain in the store: keep the buffer gapless and pull the rest after this batch
+                last_id = int(missing[-1]['id'])
+                by_id = {record_id: r for record_id, r in by_id.items() if record_id <= last_id}
+                self.overflowed = True
+            self.buffer = [by_id[record_id] for record_id in sorted(by_id)]
+            if self.buffer and self.oldest_buffered_at is None:
+                self.oldest_buffered_at = time.time()
+        if missing:
+            logger.info(f"Re-syncing {len(missing)} records to Google Sheets above id {self.synced_id}")
+
+    def flush(self) -> bool:
+        """Append every buffered row with a single append_rows call"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self.buffer = self.buffer, []
+                self.oldest_buffered_at = None
+            if not batch:
+                return True
+            
+            try:
+                worksheet = self.manager.get_worksheet(self.WORKSHEET_TITLE, headers=self.manager.csv_fields)
+                if worksheet is None:
+                    raise RuntimeError("Could not access Google Spreadsheet")
+                batch.sort(key=lambda r: int(r.get('id', 0)))
+                self.api_calls += 1
+                with_sheets_retry(worksheet.append_rows, [self.to_row(r) for r in batch])
+            except Exception as e:
+                logger.error(f"Error saving {len(batch)} records to Google Sheets: {str(e)}")
+                with self._lock:
+                    if len(batch) + len(self.buffer) > SHEETS_MAX_BUFFER:
+                        self.overflowed = True
+                    self.buffer = (batch + self.buffer)[:SHEETS_MAX_BUFFER]
+                    self.oldest_buffered_at = time.time()
+                    self.consecutive_failures += 1
+                    self.retry_at = time.time() + min(self.flush_interval * 2 ** self.consecutive_failures, 300)
+                return False
+            
+            self.consecutive_failures = 0
+            self.retry_at = 0.0
+            self.synced_id = max(self.synced_id, int(batch[-1].get('id', 0)))
+            self._save_synced_id()
+            logger.info(f"Saved {len(batch)} records to Google Sheets (synced through id {self.synced_id})")
+            if self.overflowed:
+                self.resync()
+            return True
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "buffered": len(self.buffer),
+            "overflowed": self.overflowed,
+            "synced_id": self.synced_id,
+            "append_calls": self.api_calls
+        }
+
+class JobQueue:
+    """Bounded in-process job queue with worker tasks and a durable on-disk spool.
+
+    Every job is written to the spool directory before it is queued and removed
+    once it completes, so jobs that were pending when the process stopped are
+    picked up again on the next startup. The spool belongs to one process, which
+    replays every job in it.
+    """
+
+    # Job kinds whose pending instances can be merged into a single run
+    COALESCED_KINDS = {"sheets_flush", "analytics_refresh", "charts", "load_book_reload", "idempotency_purge",
+                       "archive_roll", "archive_compact", "ingest_recover"}
+
+    def __init__(self, spool_dir: str = JOB_SPOOL_DIR, maxsize: int = JOB_QUEUE_MAXSIZE,
+                 workers: int = JOB_WORKERS):
+        self.spool_dir = spool_dir
+        self.maxsize = maxsize
+        self.num_workers = workers
+        self.handlers: Dict[str, Any] = {}
+        self.schedules: List[tuple] = []
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+        # Jobs that are spooled but did not fit in the bounded queue
+        self.overflow: List[str] = []
+        # Failed jobs waiting out their backoff, by job id
+        self.retry_timers: Dict[str, asyncio.TimerHandle] = {}
+        self.pending: Dict[str, float] = {}
+        self.pending_kinds: Dict[str, str] = {}
+        self.in_flight = 0
+        self.processed = 0
+        self.failed = 0
+        self.retried = 0
+        self.last_lag_seconds = 0.0
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    def register(self, kind: str, handler):
+        """Register a handler for a job kind; blocking handlers run on a worker thread"""
+        self.handlers[kind] = handler
+
+    def schedule(self, kind: str, interval: float, when=None):
+        """Enqueue a job of this kind every interval seconds, optionally only when a predicate holds"""
+        self.schedules.append((kind, interval, when))
+
+    async def _ticker(self, kind: str, interval: float, when):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if when is None or when():
+                    await self.enqueue_async(kind)
+            except Exception as e:
+                logger.error(f"Error scheduling {kind} job: {str(e)}")
+
+    def _spool_path(self, job_id: str) -> str:
+        return os.path.join(self.spool_dir, f"{job_id}.json")
+
+    def _write_spool(self, job: Dict[str, Any]):
+        path = self._spool_path(job["id"])
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _read_spool(self, job_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._spool_path(job_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not read spooled job {job_id}: {str(e)}")
+            return None
+
+    def _remove_spool(self, job_id: str):
+        try:
+            os.remove(self._spool_path(job_id))
+        except FileNotFoundError:
+            pass
+
+    def _dispatch(self, job: Dict[str, Any]):
+        """Hand a spooled job to the bounded queue, spilling to overflow when full"""
+        self.pending[job["id"]] = job["enqueued_at"]
+        if job["kind"] in self.COALESCED_KINDS:
+            self.pending_kinds[job["kind"]] = job["id"]
+        if self.queue is None or self.overflow:
+            self.overflow.append(job["id"])
+            return
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            logger.warning(f"Job queue full, job {job['id']} kept in spool")
+            self.overflow.append(job["id"])
+
+    def _dispatch_when_due(self, job: Dict[str, Any]):
+        """Dispatch a job now, or on a timer once its not_before time has passed"""
+        delay = job.get("not_before", 0.0) - time.time()
+        if delay <= 0:
+            self._dispatch(job)
+            return
+        self.pending[job["id"]] = job["enqueued_at"]
+        self.retry_timers[job["id"]] = asyncio.get_running_loop().call_later(delay, self._redispatch, job)
+
+    def _redispatch(self, job: Dict[str, Any]):
+        self.retry_timers.pop(job["id"], None)
+        self._dispatch(job)
+
+    def _refill(self):
+        while self.overflow and self.queue is not None and not self.queue.full():
+            job_id = self.overflow.pop(0)
+            job = self._read_spool(job_id)
+            if job is None:
+                self.pending.pop(job_id, None)
+                continue
+            self.queue.put_nowait(job)
+
+    def _new_job(self, kind: str, payload: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "id": f"{int(time.time() * 1000):013d}-{uuid.uuid4().hex[:8]}",
+            "kind": kind,
+            "payload": payload or {},
+            "attempts": 0,
+            "enqueued_at": time.time()
+        }
+
+    def enqueue(self, kind: str, payload: Optional[Dict[str, Any]] = None) -> str:
+        """Spool a job and queue it for the workers, returning its id"""
+        if kind in self.COALESCED_KINDS and kind in self.pending_kinds:
+            return self.pending_kinds[kind]
+        job = self._new_job(kind, payload)
+        self._write_spool(job)
+        self._dispatch(job)
+        return job["id"]
+
+    async def enqueue_async(self, kind: str, payload: Optional[Dict[str, Any]] = None) -> str:
+        """Like enqueue, but fsyncs the spool file off the event loop"""
+        if kind in self.COALESCED_KINDS and kind in self.pending_kinds:
+            return self.pending_kinds[kind]
+        job = self._new_job(kind, payload)
+        if kind in self.COALESCED_KINDS:
+            # Claim the kind before yielding so concurrent callers coalesce onto this job
+            self.pending_kinds[kind] = job["id"]
+        try:
+            await asyncio.to_thread(self._write_spool, job)
+        except Exception:
+            if self.pending_kinds.get(kind) == job["id"]:
+                del self.pending_kinds[kind]
+            raise
+        self._dispatch(job)
+        return job["id"]
+
+    async def start(self):
+        """Create the queue, recover spooled jobs and start the workers"""
+        self.queue = asyncio.Queue(maxsize=self.maxsize)
+        recovered = 0
+        for name in sorted(os.listdir(self.spool_dir)):
+            if not name.endswith('.json'):
+                continue
+            job = self._read_spool(name[:-len('.json')])
+            if job is None:
+                continue
+            if job["kind"] in self.COALESCED_KINDS and job["kind"] in self.pending_kinds:
+                self._remove_spool(job["id"])
+                continue
+            self._dispatch_when_due(job)
+            recovered += 1
+        self._refill()
+        if recovered:
+            logger.info(f"Recovered {recovered} spooled jobs")
+        self.workers = [asyncio.create_task(self._worker(i)) for i in range(self.num_workers)]
+        self.workers += [asyncio.create_task(self._ticker(*s)) for s in self.schedules]
+
+    async def stop(self):
+        """Cancel the workers and retry timers; unfinished jobs stay in the spool"""
+        for handle in self.retry_timers.values():
+            handle.cancel()
+        self.retry_timers.clear()
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+
+    async def _worker(self, worker_id: int):
+        while True:
+            job = await self.queue.get()
+            if self.pending_kinds.get(job["kind"]) == job["id"]:
+                del self.pending_kinds[job["kind"]]
+            self.in_flight += 1
+            try:
+                await self._run(job)
+            finally:
+                self.in_flight -= 1
+                self.queue.task_done()
+                self._refill()
+
+    async def _run(self, job: Dict[str, Any]):
+        handler = self.handlers.get(job["kind"])
+        if handler is None:
+            logger.error(f"No handler registered for job kind: {job['kind']}")
+            self._finish(job, ok=False)
+            return
+        job["attempts"] += 1
+        try:
+            if asyncio.iscoroutinefunction(handler):
+                result = await handler(**job["payload"])
+            else:
+                result = await asyncio.to_thread(handler, **job["payload"])
+        except Exception as e:
+            if job["attempts"] >= JOB_MAX_ATTEMPTS:
+                logger.error(f"Job {job['id']} ({job['kind']}) failed permanently: {str(e)}")
+                self._finish(job, ok=False)
+                return
+            delay = JOB_RETRY_BASE_DELAY * (2 ** (job["attempts"] - 1))
+            logger.warning(f"Job {job['id']} ({job['kind']}) failed, retrying in {delay}s: {str(e)}")
+            self.retried += 1
+            # Wait out the backoff on a timer so the worker moves on to other jobs
+            job["not_before"] = time.time() + delay
+            await asyncio.to_thread(self._write_spool, job)
+            self._dispatch_when_due(job)
+            return
+        self._finish(job, ok=result is not False)
+
+    def _finish(self, job: Dict[str, Any], ok: bool):
+        self._remove_spool(job["id"])
+        self.pending.pop(job["id"], None)
+        self.last_lag_seconds = time.time() - job["enqueued_at"]
+        if ok:
+            self.processed += 1
+        else:
+            self.failed += 1
+
+    def status(self) -> Dict[str, Any]:
+        """Report queue depth and job lag"""
+        now = time.time()
+        oldest = min(self.pending.values()) if self.pending else None
+        return {
+            "queue_depth": self.queue.qsize() if self.queue is not None else 0,
+            "overflow_depth": len(self.overflow),
+            "pending": len(self.pending),
+            "in_flight": self.in_flight,
+            "workers": self.num_workers if self.workers else 0,
+            "processed": self.processed,
+            "failed": self.failed,
+            "retried": self.retried,
+            "awaiting_retry": len(self.retry_timers),
+            "oldest_pending_age_seconds": round(now - oldest, 3) if oldest is not None else 0.0,
+            "last_job_lag_seconds": round(self.last_lag_seconds, 3)
+        }
+
 # Initialize data manager
 data_manager = DataManager()
 
+# Initialize background job pipeline
+job_queue = JobQueue()
+job_queue.register("sheets_flush", data_manager.flush_google_sheets_async)
+job_queue.register("analytics_refresh", data_manager.update_google_sheets_analytics_async)
+job_queue.register("charts", data_manager.generate_charts_async)
+job_queue.schedule("sheets_flush", SHEETS_FLUSH_INTERVAL / 2, when=data_manager.sheets_writer.due)
+job_queue.schedule("charts", CHART_DEBOUNCE_SECONDS / 2, when=data_manager.chart_renderer.due)
+job_queue.register("load_book_reload", load_book.reload)
+job_queue.schedule("load_book_reload", LOAD_BOOK_POLL_INTERVAL, when=load_book.source_changed)
+job_queue.register("idempotency_purge", data_manager.purge_idempotency_keys)
+job_queue.schedule("idempotency_purge", IDEMPOTENCY_PURGE_INTERVAL)
+job_queue.register("archive_roll", data_manager.roll_archive_async)
+job_queue.schedule("archive_roll", ARCHIVE_ROLL_INTERVAL)
+job_queue.register("archive_compact", data_manager.compact_archive_async)
+job_queue.schedule("archive_compact", ARCHIVE_COMPACT_INTERVAL)
+job_queue.register("ingest_recover", data_manager.recover_ingest_log)
+job_queue.schedule("ingest_recover", INGEST_RECOVERY_INTERVAL)
+
+# Scrape-time gauges over the live queues and stores
+metrics.gauge("job_queue_jobs", "Background jobs by state",
+              lambda: {state: job_queue.status()[key] for state, key in
+                       (("queued", "queue_depth"), ("overflow", "overflow_depth"),
+                        ("pending", "pending"), ("in_flight", "in_flight"),
+                        ("awaiting_retry", "awaiting_retry"))}, label="state")
+metrics.gauge("jobs_total", "Background jobs finished or retried since startup",
+              lambda: {"processed": job_queue.processed, "failed": job_queue.failed, "retried": job_queue.retried},
+              label="result", kind="counter")
+metrics.gauge("sheets_buffered_rows", "Rows waiting for the next Google Sheets append",
+              lambda: len(data_manager.sheets_writer.buffer))
+metrics.gauge("records", "Call records folded into the analytics aggregates", lambda: data_manager.analytics.total)
+metrics.gauge("loads", "Loads in the live load book", lambda: len(load_book.index))
+metrics.gauge("chart_renders_total", "Chart variant renders by outcome",
+              lambda: {"rendered": data_manager.chart_renderer.renders,
+                       "skipped_unchanged": data_manager.chart_renderer.skipped}, label="result", kind="counter")
+
+def resolve_point(near: Optional[str], lat: Optional[float], lon: Optional[float]) -> Optional[tuple]:
+    """Turn a city/ZIP or explicit coordinates from the query string into a point"""
+    if lat is not None and lon is not None:
+        return (lat, lon)
+    if near:
+        point = gazetteer.geocode(near)
+        if point is None:
+            raise HTTPException(status_code=400, detail=f"Unknown location: {near}")
+        return point
+    return None
+
 @app.get("/search", response_model=List[Load])
 def search_loads(
-    origin: Optional[str] = Query(None),
-    destination: Optional[str] = Query(None),
+    origin: Optional[str] = Query(None, description="Substring of the origin, e.g. 'chicago'"),
+    destination: Optional[str] = Query(None, description="Substring of the destination"),
     load_id: Optional[str] = Query(None),
+    equipment_type: Optional[str] = Query(None),
+    origin_city: Optional[str] = Query(None),
+    origin_state: Optional[str] = Query(None),
+    destination_city: Optional[str] = Query(None),
+    destination_state: Optional[str] = Query(None),
+    min_rate: Optional[float] = Query(None),
+    max_rate: Optional[float] = Query(None),
+    min_miles: Optional[int] = Query(None),
+    max_miles: Optional[int] = Query(None),
+    pickup_from: Optional[str] = Query(None, description="Earliest pickup (ISO 8601, inclusive)"),
+    pickup_to: Optional[str] = Query(None, description="Latest pickup (ISO 8601, inclusive; a date covers the whole day)"),
+    pickup_near: Optional[str] = Query(None, description="City ('Chicago, IL') or ZIP to search around for pickup"),
+    pickup_lat: Optional[float] = Query(None, ge=-90, le=90),
+    pickup_lon: Optional[float] = Query(None, ge=-180, le=180),
+    pickup_radius: float = Query(GEO_DEFAULT_RADIUS_MILES, gt=0, description="Pickup radius in miles"),
+    drop_near: Optional[str] = Query(None, description="City or ZIP to search around for delivery"),
+    drop_lat: Optional[float] = Query(None, ge=-90, le=90),
+    drop_lon: Optional[float] = Query(None, ge=-180, le=180),
+    drop_radius: float = Query(GEO_DEFAULT_RADIUS_MILES, gt=0, description="Delivery radius in miles"),
+    heading: Optional[str] = Query(None, pattern="^(north|south|east|west)$", description="General lane direction"),
+    sort_by: Optional[str] = Query(None, pattern="^(pickup_datetime|loadboard_rate|miles)$"),
+    order: str = Query("asc", pattern="^(asc|desc)$"),
+    limit: Optional[int] = Query(None, ge=1),
+    offset: int = Query(0, ge=0),
     auth: None = Depends(verify_api_key)
 ):
-    results = loads
-
-    if load_id:
-        results = [l for l in results if l["load_id"] == load_id]
-    if origin:
-        results = [l for l in results if origin.lower() in l["origin"].lower()]
-    if destination:
-        results = [l for l in results if destination.lower() in l["destination"].lower()]
+    params = {
+        "origin": origin, "destination": destination, "load_id": load_id, "equipment_type": equipment_type,
+        "origin_city": origin_city, "origin_state": origin_state,
+        "destination_city": destination_city, "destination_state": destination_state,
+        "min_rate": min_rate, "max_rate": max_rate, "min_miles": min_miles, "max_miles": max_miles,
+        "pickup_from": pickup_from, "pickup_to": pickup_to,
+        "pickup_near": pickup_near, "pickup_lat": pickup_lat, "pickup_lon": pickup_lon, "pickup_radius": pickup_radius,
+        "drop_near": drop_near, "drop_lat": drop_lat, "drop_lon": drop_lon, "drop_radius": drop_radius,
+        "heading": heading, "sort_by": sort_by, "order": order, "limit": limit, "offset": offset
+    }
+    # Read the index once so the cache key and the results describe the same load book
+    index = load_book.index
+    cached = response_cache.get("search", index.version, params)
+    if cached is None:
+        cached = search_response_body(index, params)
+        response_cache.put("search", index.version, params, cached)
+    if cached == SEARCH_NOT_FOUND:
+        raise HTTPException(status_code=404, detail="No matching loads found")
+    return Response(content=cached, media_type="application/json")
 
+def search_response_body(index: "LoadIndex", params: Dict[str, Any]) -> bytes:
+    """Run a /search query and serialize it the way response_model=List[Load] would"""
+    p = params
+    pickup_point = resolve_point(p["pickup_near"], p["pickup_lat"], p["pickup_lon"])
+    drop_point = resolve_point(p["drop_near"], p["drop_lat"], p["drop_lon"])
+    results = index.search(
+        load_id=p["load_id"], origin=p["origin"], destination=p["destination"], equipment_type=p["equipment_type"],
+        origin_city=p["origin_city"], origin_state=p["origin_state"],
+        destination_city=p["destination_city"], destination_state=p["destination_state"],
+        min_rate=p["min_rate"], max_rate=p["max_rate"], min_miles=p["min_miles"], max_miles=p["max_miles"],
+        pickup_from=p["pickup_from"], pickup_to=p["pickup_to"],
+        pickup_point=pickup_point, pickup_radius=p["pickup_radius"],
+        drop_point=drop_point, drop_radius=p["drop_radius"], heading=p["heading"],
+        sort_by=p["sort_by"], descending=p["order"] == "desc", limit=p["limit"], offset=p["offset"]
+    )
     if not results:
-        raise HTTPException(status_code=404, detail="No matching loads found")
+        return SEARCH_NOT_FOUND
+    return search_results_adapter.dump_json(search_results_adapter.validate_python(results))
+
+class LoadBulkRequest(BaseModel):
+    loads: List[Dict[str, Any]] = []
+    expire: List[str] = []
+
+@app.post("/loads/bulk")
+async def bulk_upsert_loads(body: LoadBulkRequest, auth: None = Depends(verify_api_key)):
+    """Upsert loads and expire load_ids in the load book"""
+    try:
+        result = await asyncio.to_thread(load_book.apply, body.loads, body.expire)
+        return {"status": "success", **result}
+    except Exception as e:
+        logger.error(f"Error updating load book: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error updating load book: {str(e)}")
+
+@app.post("/loads/reload")
+async def reload_loads(auth: None = Depends(verify_api_key)):
+    """Re-read the load book source and swap in a fresh index"""
+    reloaded = await asyncio.to_thread(load_book.reload)
+    return {"status": "success" if reloaded else "unchanged", "load_book": load_book.status()}
+
+@app.get("/loads/status")
+async def get_load_book_status(auth: None = Depends(verify_api_key)):
+    """Report load book size and last reload time"""
+    return {"status": "success", "load_book": load_book.status()}
+
+def duplicate_delivery_response(record_id: int) -> JSONResponse:
+    logger.info(f"Duplicate webhook delivery for record {record_id}, skipping")
+    return JSONResponse(
+        content={
+            "status": "success",
+            "message": "Duplicate delivery, data already stored",
+            "record_id": record_id,
+            "duplicate": True,
+            "google_sheets_url": GOOGLE_SHEETS_URL
+        },
+        status_code=200
+    )
 
-    return results
+async def read_limited_body(request: Request, limit: int) -> bytes:
+    """Read a request body, answering 413 as soon as it is known to be over limit bytes"""
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > limit:
+        raise HTTPException(status_code=413, detail=f"Body of {declared} bytes exceeds the limit of {limit}")
+    chunks, size = [], 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise HTTPException(status_code=413, detail=f"Body exceeds the limit of {limit} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
 
 @app.post("/webhook")
 async def webhook_receiver(request: Request):
-    """Receive webhook data from HappyRobot and store in CSV/Google Sheets with charts"""
+    """Receive webhook data from HappyRobot, store it and queue Sheets sync and charts"""
+    body = await read_limited_body(request, WEBHOOK_MAX_BODY_BYTES)
+    try:
+        payload = decode_json(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid JSON body: {str(e)}")
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=400, detail="Expected a JSON object")
+    log_webhook_payload(body)
+    
     try:
-        payload = await request.json()
-        logger.info(f"Received webhook payload: {payload}")
+        # A retried delivery gets the original record_id back without redoing any work
+        key = idempotency_key(request.headers, payload)
+        if key is not None:
+            record_id = data_manager.idempotency.get(key)
+            if record_id is not None:
+                metrics.inc("webhook_duplicates_total", source="cache")
+                return duplicate_delivery_response(record_id)
         
         # Prepare data for storage
-        data = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "booking_intent": payload.get("booking_intent", ""),
-            "counter_offer": payload.get("counter_offer", ""),
-            "agreed_rate": payload.get("agreed_rate", ""),
-            "negotiation_attempts": payload.get("negotiation_attempts", ""),
-            "sentiment": payload.get("sentiment", ""),
-            "call_outcome": payload.get("call_outcome", ""),
-            "raw_payload": json.dumps(payload)
-        }
+        data = webhook_record(payload, datetime.utcnow().isoformat(), raw_payload_text(body, payload))
         
-        # Save to CSV
-        saved_data = data_manager.save_to_csv(data)
+        # Save to the record store
+        if key is None:
+            saved_data = await data_manager.save_record_async(data)
+        else:
+            saved_data, created = await data_manager.save_record_once_async(data, key)
+            if not created:
+                metrics.inc("webhook_duplicates_total", source="store")
+                return duplicate_delivery_response(saved_data['id'])
         
-        # Save to Google Sheets
-        google_sheets_success = data_manager.save_to_google_sheets(saved_data)
-        
-        # Update Google Sheets analytics
-        analytics_success = data_manager.update_google_sheets_analytics()
-        
-        # Generate charts
-        data_manager.generate_charts()
+        # Buffer the row for Google Sheets and queue analytics refresh; charts re-render on their debounce tick
+        queued_jobs = []
+        if data_manager.save_to_google_sheets(saved_data):
+            queued_jobs.append(await job_queue.enqueue_async("sheets_flush"))
+        queued_jobs.append(await job_queue.enqueue_async("analytics_refresh"))
+        data_manager.chart_renderer.mark_dirty()
         
         logger.info(f"Successfully processed webhook data with ID: {saved_data['id']}")
         return JSONResponse(
@@ -538,10 +4760,12 @@ async def webhook_receiver(request: Request):
                 "message": "Data stored successfully",
                 "record_id": saved_data['id'],
                 "timestamp": data["timestamp"],
-                "files_updated": [CSV_FILE],
-                "google_sheets_updated": google_sheets_success,
-                "analytics_updated": analytics_success,
-                "charts_generated": True,
+                "files_updated": [data_manager.store.path],
+                "duplicate": False,
+                "queued_jobs": queued_jobs,
+                "google_sheets_updated": "queued",
+                "analytics_updated": "queued",
+                "charts_generated": "queued",
                 "google_sheets_url": GOOGLE_SHEETS_URL
             }, 
             status_code=200
@@ -551,22 +4775,153 @@ async def webhook_receiver(request: Request):
         logger.error(f"Error processing webhook: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error processing webhook: {str(e)}")
 
+@app.post("/webhook/batch")
+async def webhook_batch_receiver(request: Request, auth: None = Depends(verify_api_key)):
+    """Ingest many call payloads at once from a JSON array or an NDJSON stream.
+
+    Payloads are validated together, stored with one id allocation and one
+    commit, and followed by a single Sheets flush, analytics refresh and
+    chart invalidation. Invalid items are reported by index and skipped.
+    """
+    body = await read_limited_body(request, WEBHOOK_BATCH_MAX_BODY_BYTES)
+    content_type = request.headers.get("content-type", "")
+    ndjson = "ndjson" in content_type or "jsonl" in content_type
+    try:
+        result = await data_manager.run_io(data_manager.ingest_webhook_batch, body, ndjson)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid batch body: {str(e)}")
+    except OverflowError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error processing webhook batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error processing webhook batch: {str(e)}")
+    
+    created = result["created"]
+    if result["duplicates"]:
+        metrics.inc("webhook_duplicates_total", result["duplicates"], source="store")
+    queued_jobs = []
+    if created:
+        if result["flush_due"]:
+            queued_jobs.append(await job_queue.enqueue_async("sheets_flush"))
+        queued_jobs.append(await job_queue.enqueue_async("analytics_refresh"))
+        data_manager.chart_renderer.mark_dirty()
+    
+    logger.info(f"Processed webhook batch: {len(created)} stored, {result['duplicates']} duplicates, "
+                f"{len(result['rejected'])} rejected")
+    return JSONResponse(
+        content={
+            "status": "success",
+            "received": result["received"],
+            "accepted": len(created),
+            "duplicates": result["duplicates"],
+            "rejected": result["rejected"],
+            "record_ids": result["record_ids"],
+            "queued_jobs": queued_jobs,
+            "google_sheets_url": GOOGLE_SHEETS_URL
+        },
+        status_code=200
+    )
+
+def project_record(record: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    if not fields:
+        return record
+    return {field: record.get(field) for field in fields}
+
+def export_rows(records, fields: List[str], export_format: str):
+    """Stream records as NDJSON lines or CSV text in batches"""
+    if export_format == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for i, record in enumerate(records, 1):
+            writer.writerow(record)
+            if i % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        batch = []
+        for record in records:
+            batch.append(json.dumps(project_record(record, fields), default=str))
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                yield "\n".join(batch) + "\n"
+                batch = []
+        if batch:
+            yield "\n".join(batch) + "\n"
+
 @app.get("/dashboard")
-async def get_dashboard_data(auth: None = Depends(verify_api_key)):
-    """Retrieve all webhook data from CSV file for dashboard display"""
+async def get_dashboard_data(
+    request: Request,
+    cursor: int = Query(0, ge=0, description="Return records with an id above this cursor"),
+    limit: Optional[int] = Query(None, ge=1, le=DASHBOARD_MAX_LIMIT),
+    start: Optional[str] = Query(None, description="Earliest timestamp (inclusive, ISO 8601)"),
+    end: Optional[str] = Query(None, description="Latest timestamp (exclusive, ISO 8601)"),
+    call_outcome: Optional[str] = Query(None),
+    sentiment: Optional[str] = Query(None),
+    booking_intent: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    format: str = Query("json", pattern="^(json|ndjson|csv)$"),
+    auth: None = Depends(verify_api_key)
+):
+    """Retrieve webhook data from the record store for dashboard display.
+
+    JSON responses are paginated by record id; ndjson and csv stream every
+    matching record (or up to limit) without building the result in memory.
+    """
+    selected_fields = [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+    unknown = [f for f in selected_fields or [] if f not in STORED_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    
     try:
-        records = data_manager.get_all_records()
+        version = await data_manager.run_io(data_manager.store.version)
+        etag_source = f"{version}|{sorted(request.query_params.multi_items())}"
+        etag = f'"{hashlib.sha1(etag_source.encode()).hexdigest()}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        
+        filters = {
+            "after_id": cursor, "start": start, "end": end, "call_outcome": call_outcome,
+            "sentiment": sentiment, "booking_intent": booking_intent
+        }
+        
+        if format != "json":
+            # Starlette iterates sync generators on its thread pool, so the export never blocks the loop
+            records = data_manager.query_records(limit=limit, **filters)
+            media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+            return StreamingResponse(
+                export_rows(records, selected_fields or STORED_FIELDS, format),
+                media_type=media_type, headers={"ETag": etag}
+            )
+        
+        cache_params = {"query": sorted(request.query_params.multi_items())}
+        cached = await response_cache.get_async("dashboard", version, cache_params)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json", headers={"ETag": etag})
+        
+        page_size = limit or DASHBOARD_DEFAULT_LIMIT
+        # Fetch one extra record to know whether another page exists
+        records = await data_manager.query_records_async(limit=page_size + 1, **filters)
+        has_more = len(records) > page_size
+        records = records[:page_size]
+        next_cursor = int(records[-1]["id"]) if has_more else None
         logger.info(f"Retrieved {len(records)} records for dashboard")
-        return {
+        content = {
             "status": "success",
             "count": len(records),
-            "data": records,
+            "next_cursor": next_cursor,
+            "data": [project_record(r, selected_fields) for r in records],
             "files": {
                 "csv": CSV_FILE,
+                "database": SQLITE_FILE if STORAGE_BACKEND == "sqlite" else None,
                 "charts_directory": CHARTS_DIR,
                 "google_sheets_url": GOOGLE_SHEETS_URL
             }
         }
+        response = JSONResponse(content=content, headers={"ETag": etag})
+        await response_cache.put_async("dashboard", version, cache_params, response.body)
+        return response
     except Exception as e:
         logger.error(f"Error retrieving dashboard data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error retrieving dashboard data: {str(e)}")
@@ -581,10 +4936,16 @@ async def get_files_info(auth: None = Depends(verify_api_key)):
                 "exists": os.path.exists(CSV_FILE),
                 "size": os.path.getsize(CSV_FILE) if os.path.exists(CSV_FILE) else 0
             },
+            "database": {
+                "backend": STORAGE_BACKEND,
+                "path": SQLITE_FILE,
+                "exists": os.path.exists(SQLITE_FILE),
+                "size": os.path.getsize(SQLITE_FILE) if os.path.exists(SQLITE_FILE) else 0
+            },
             "charts_directory": {
                 "path": CHARTS_DIR,
                 "exists": os.path.exists(CHARTS_DIR),
-                "chart_count": len([f for f in os.listdir(CHARTS_DIR) if f.endswith('.png')]) if os.path.exists(CHARTS_DIR) else 0
+                "chart_count": len([f for f in os.listdir(CHARTS_DIR) if f.endswith(('.png', '.svg'))]) if os.path.exists(CHARTS_DIR) else 0
             },
             "google_sheets": {
                 "url": GOOGLE_SHEETS_URL,
@@ -602,8 +4963,8 @@ async def get_files_info(auth: None = Depends(verify_api_key)):
 async def generate_charts_endpoint(auth: None = Depends(verify_api_key)):
     """Manually trigger chart generation and upload to Google Sheets"""
     try:
-        # Generate charts
-        data_manager.generate_charts()
+        # Render in the process pool (skipped if the aggregates are unchanged); the upload runs on the Sheets pool
+        await data_manager.generate_charts_async()
         
         logger.info("Charts generated and uploaded to Google Sheets successfully")
         return JSONResponse(
@@ -612,7 +4973,8 @@ async def generate_charts_endpoint(auth: None = Depends(verify_api_key)):
                 "message": "Charts generated and uploaded to Google Sheets",
                 "timestamp": datetime.utcnow().isoformat(),
                 "google_sheets_url": GOOGLE_SHEETS_URL,
-                "charts_worksheet": "Charts"
+                "charts_worksheet": "Charts",
+                "charts": data_manager.chart_renderer.status()
             }, 
             status_code=200
         )
@@ -621,6 +4983,151 @@ async def generate_charts_endpoint(auth: None = Depends(verify_api_key)):
         logger.error(f"Error generating charts: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error generating charts: {str(e)}")
 
+CHART_MEDIA_TYPES = {"png": "image/png", "svg": "image/svg+xml"}
+
+@app.get("/charts/{chart_name}")
+async def get_latest_chart(
+    request: Request,
+    chart_name: str,
+    variant: str = Query("full", pattern="^(full|thumbnail)$"),
+    format: str = Query("png", pattern="^(png|svg)$"),
+    auth: None = Depends(verify_api_key)
+):
+    """Serve the latest render of a chart, drawing the requested variant on demand"""
+    if chart_name not in ChartRenderer.CHART_NAMES:
+        raise HTTPException(status_code=404, detail=f"Unknown chart: {chart_name}")
+    
+    try:
+        latest = await data_manager.chart_renderer.latest_file(chart_name, variant, format)
+    except Exception as e:
+        logger.error(f"Error rendering chart: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error rendering chart: {str(e)}")
+    if latest is None:
+        raise HTTPException(status_code=404, detail="No data available for charts")
+    
+    path, digest = latest
+    # Files are named by content hash, so the hash is a strong validator
+    headers = {
+        "ETag": f'"{digest}-{variant}-{format}"',
+        "Cache-Control": f"private, max-age={int(CHART_DEBOUNCE_SECONDS)}"
+    }
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=CHART_MEDIA_TYPES[format], headers=headers)
+
+@app.get("/stats")
+async def get_stats(
+    start: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="First day (YYYY-MM-DD)"),
+    end: Optional[str] = Query(None, pattern=r"^\d{4}-\d{2}-\d{2}$", description="Day after the last (YYYY-MM-DD)"),
+    auth: None = Depends(verify_api_key)
+):
+    """Return the running analytics aggregates as JSON.
+
+    With start and/or end, the stats cover only those days and are computed
+    from the columnar archive, reading just the partitions in range.
+    """
+    try:
+        # Any new record changes the store version, so a cached summary is never behind the store
+        version = await data_manager.run_io(data_manager.store.version)
+        cache_params = {"start": start, "end": end}
+        cached = await response_cache.get_async("stats", version, cache_params)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+        
+        if start or end:
+            stats = await data_manager.run_io(data_manager.archive_summary, start, end)
+        else:
+            stats = await data_manager.refresh_analytics_async()
+        response = JSONResponse(content={"status": "success", "stats": stats})
+        await response_cache.put_async("stats", version, cache_params, response.body)
+        return response
+    except Exception as e:
+        logger.error(f"Error retrieving stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error retrieving stats: {str(e)}")
+
+@app.get("/analytics")
+async def get_analytics_report(auth: None = Depends(verify_api_key)):
+    """Return the analytics report that is published to the Analytics worksheet.
+
+    It covers the conversion funnel by call outcome, sentiment by outcome,
+    the spread of agreed rate minus counter offer and hourly call volume. It
+    is computed locally from the running aggregates, so it never waits on
+    Google Sheets.
+    """
+    try:
+        version = await data_manager.run_io(data_manager.store.version)
+        cached = await response_cache.get_async("analytics", version, {})
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+        
+        await data_manager.refresh_analytics_async()
+        response = JSONResponse(content={"status": "success", "report": data_manager.analytics.report()})
+        await response_cache.put_async("analytics", version, {}, response.body)
+        return response
+    except Exception as e:
+        logger.error(f"Error building analytics report: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error building analytics report: {str(e)}")
+
+@app.get("/live")
+async def live_stream(request: Request, auth: None = Depends(verify_api_key)):
+    """Server-Sent Events stream of new call records and rolling-window stats.
+
+    "record" events carry each call as it is stored, with the record id as
+    the event id; "stats" events carry bookings, sentiment mix and average
+    agreed rate over the last 5 minutes, hour and day, on connect and every
+    few seconds after. Both come from memory, so subscribers never cause
+    store reads. Streams end after a few minutes; EventSource reconnects
+    with Last-Event-ID and gets the records it missed.
+    """
+    if data_manager.live.closing.is_set():
+        raise HTTPException(status_code=503, detail="Server is shutting down")
+    if data_manager.live.full():
+        raise HTTPException(status_code=503,
+                            detail=f"Live stream is at its limit of {data_manager.live.max_subscribers} subscribers")
+    last_event_id = request.headers.get("last-event-id", "")
+    return StreamingResponse(
+        data_manager.live.stream(int(last_event_id) if last_event_id.isdigit() else None),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/rates")
+async def get_lane_rates(
+    origin: str = Query(..., description="Lane origin, e.g. 'Chicago, IL'"),
+    destination: str = Query(..., description="Lane destination"),
+    equipment_type: Optional[str] = Query(None, description="Falls back to all equipment if this lane has no history"),
+    auth: None = Depends(verify_api_key)
+):
+    """Recent agreed-rate statistics for a lane, for use during a live negotiation.
+
+    Served from the precomputed lane index without touching the store, so it
+    answers in well under a millisecond; the index catches up with every
+    analytics refresh.
+    """
+    stats = data_manager.lane_rates.lookup(origin, destination, equipment_type)
+    if stats is None:
+        raise HTTPException(status_code=404, detail="No rate history for this lane")
+    return {"status": "success", "rates": stats}
+
+@app.get("/jobs/status")
+async def get_job_status(auth: None = Depends(verify_api_key)):
+    """Report background job queue depth and lag"""
+    return {
+        "status": "success",
+        "jobs": job_queue.status(),
+        "google_sheets": data_manager.sheets_writer.status(),
+        "charts": data_manager.chart_renderer.status(),
+        "ingest": data_manager.ingest_writer.status(),
+        "live": data_manager.live.status(),
+        "archive": data_manager.archive.status(),
+        "response_cache": response_cache.status()
+    }
+
+@app.get("/metrics")
+async def get_metrics(auth: None = Depends(verify_api_key)):
+    """Expose request, stage, Sheets and queue metrics in the Prometheus text format"""
+    return Response(content=metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -0,0 +1,149 @@
+import os
+import time
+
+import main
+from conftest import call
+
+
+def reader(store, sizes=None, with_payload=False):
+    """store.read_new_records, noting how many records each read returned"""
+    def read_new_records(cursor=0, limit=None):
+        records, cursor = store.read_new_records(cursor, with_payload, limit)
+        if sizes is not None:
+            sizes.append(len(records))
+        return records, cursor
+    return read_new_records
+
+
+def aggregator(tmp_path, name="analytics"):
+    return main.AnalyticsAggregator(snapshot_file=str(tmp_path / f"{name}.json"), source=name)
+
+
+def test_catch_up_reads_in_batches(tmp_path, sqlite_store):
+    for i in range(10):
+        sqlite_store.append(call(i))
+    sizes = []
+    batched = aggregator(tmp_path, "batched")
+    batched.catch_up(reader(sqlite_store, sizes), batch_size=3)
+    whole = aggregator(tmp_path, "whole")
+    whole.catch_up(reader(sqlite_store))
+
+    assert sizes == [3, 3, 3, 1]
+    assert batched.cursor == whole.cursor == 10
+    assert batched.summary() == whole.summary()
+
+
+def test_catch_up_resumes_from_the_cursor(tmp_path, csv_store):
+    for i in range(4):
+        csv_store.append(call(i))
+    analytics = aggregator(tmp_path)
+    analytics.catch_up(reader(csv_store), batch_size=3)
+    cursor = analytics.cursor
+    csv_store.append(call(4))
+    sizes = []
+    analytics.catch_up(reader(csv_store, sizes), batch_size=3)
+
+    assert sizes == [1]
+    assert analytics.cursor > cursor
+    assert analytics.summary()["total_records"] == 5
+
+
+def test_catch_up_advances_past_a_bad_record(tmp_path, sqlite_store):
+    class Failing(main.AnalyticsAggregator):
+        def ingest(self, record):
+            if record["id"] == 2:
+                raise ValueError("bad record")
+            super().ingest(record)
+
+    for i in range(3):
+        sqlite_store.append(call(i))
+    analytics = Failing(snapshot_file=str(tmp_path / "analytics.json"))
+    analytics.catch_up(reader(sqlite_store))
+    assert analytics.cursor == 3
+    assert analytics.skipped == 1
+
+    sqlite_store.append(call(3))
+    analytics.catch_up(reader(sqlite_store))
+    assert analytics.cursor == 4
+    assert analytics.summary()["total_records"] == 3
+
+
+def test_non_finite_stored_rates_are_left_out(tmp_path, sqlite_store):
+    sqlite_store.append(call(0))
+    sqlite_store.append(call(1))
+    # Rows written before parse_number rejected non-finite values
+    conn = sqlite_store.connection()
+    conn.execute("UPDATE records SET agreed_rate_value = ? WHERE id = 2", (float("inf"),))
+    conn.commit()
+    analytics = aggregator(tmp_path)
+    analytics.catch_up(reader(sqlite_store))
+
+    assert analytics.cursor == 2
+    assert analytics.skipped == 0
+    assert sum(analytics.report()["rate_delta"]["histogram"].values()) == 1
+
+
+def test_catch_up_starts_over_when_the_store_is_replaced(tmp_path, sqlite_store):
+    for i in range(5):
+        sqlite_store.append(call(i))
+    analytics = aggregator(tmp_path)
+    analytics.catch_up(reader(sqlite_store))
+
+    replacement = main.SQLiteStore(str(tmp_path / "replacement.db"))
+    replacement.open()
+    for i in range(2):
+        replacement.append(call(i))
+    analytics.catch_up(reader(replacement), batch_size=1)
+    assert analytics.cursor == 2
+    assert analytics.summary()["total_records"] == 2
+
+
+def test_lane_rates_catch_up_in_batches(tmp_path, sqlite_store):
+    payload = '{"origin": "Chicago, IL", "destination": "Dallas, TX", "equipment_type": "Dry Van"}'
+    for i in range(7):
+        sqlite_store.append(call(i, raw_payload=payload))
+    sizes = []
+    batched = main.LaneRateIndex(snapshot_file=str(tmp_path / "batched.json"))
+    batched.catch_up(reader(sqlite_store, sizes, with_payload=True), batch_size=2)
+    whole = main.LaneRateIndex(snapshot_file=str(tmp_path / "whole.json"))
+    whole.catch_up(reader(sqlite_store, with_payload=True))
+
+    assert sizes == [2, 2, 2, 1]
+    assert batched.cursor == whole.cursor == 7
+    assert batched.summaries == whole.summaries
+    assert batched.lookup("Chicago, IL", "Dallas, TX", "Dry Van")["calls"] == 7
+
+
+def test_snapshots_are_saved_on_a_record_or_time_threshold(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "ANALYTICS_SNAPSHOT_RECORDS", 5)
+    manager = main.DataManager()
+    manager.store.open()
+    try:
+        for i in range(3):
+            manager.store.append(call(i))
+        manager.refresh_analytics()
+        assert not manager.save_analytics_snapshots()
+        assert not os.path.exists(main.ANALYTICS_SNAPSHOT_FILE)
+
+        for i in range(3, 6):
+            manager.store.append(call(i))
+        manager.refresh_analytics()
+        assert manager.save_analytics_snapshots()
+        assert main.AnalyticsAggregator(source=manager.store.describe()).cursor == 6
+        assert os.path.exists(main.LANE_RATES_SNAPSHOT_FILE)
+
+        manager.store.append(call(6))
+        manager.refresh_analytics()
+        assert not manager.save_analytics_snapshots()
+        monkeypatch.setattr(manager, "snapshot_saved_at", time.monotonic() - main.ANALYTICS_SNAPSHOT_INTERVAL)
+        assert manager.save_analytics_snapshots()
+
+        # Shutdown saves whatever is new, and nothing when the snapshots are current
+        manager.store.append(call(7))
+        manager.refresh_analytics()
+        assert manager.save_analytics_snapshots(force=True)
+        assert not manager.save_analytics_snapshots(force=True)
+        assert main.AnalyticsAggregator(source=manager.store.describe()).cursor == 8
+    finally:
+        manager.shutdown_executors()
@@ -0,0 +1,180 @@
+import json
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from conftest import LOADS, load_ids
+
+HEADERS = {"X-API-Key": main.API_KEY}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def post_call(client, headers=None, **fields):
+    payload = {"booking_intent": "yes", "counter_offer": "2000", "agreed_rate": "2100", "sentiment": "positive",
+               "call_outcome": "booked"}
+    payload.update(fields)
+    response = client.post("/webhook", json=payload, headers=headers or {})
+    assert response.status_code == 200
+    return response.json()
+
+
+def test_retried_delivery_is_stored_once(client):
+    first = post_call(client, call_id="retry-1")
+    again = post_call(client, call_id="retry-1")
+    by_header = post_call(client, headers={main.IDEMPOTENCY_HEADER: "delivery-1"})
+    header_again = post_call(client, headers={main.IDEMPOTENCY_HEADER: "delivery-1"}, call_id="other")
+
+    assert not first["duplicate"] and again["duplicate"]
+    assert first["analytics_updated"] == first["charts_generated"] == "queued"
+    assert again["record_id"] == first["record_id"]
+    assert header_again["duplicate"] and header_again["record_id"] == by_header["record_id"]
+    assert post_call(client)["record_id"] != post_call(client)["record_id"]
+
+
+def test_batch_timestamps_are_normalized_or_rejected(client):
+    items = [{"booking_intent": "yes", "timestamp": "2025-08-01T10:00:00+02:00"},
+             {"booking_intent": "yes", "timestamp": "yesterday"},
+             {"booking_intent": "yes", "timestamp": 1754042400},
+             {"booking_intent": "yes"}]
+    response = client.post("/webhook/batch", json=items, headers=HEADERS)
+    assert response.status_code == 200
+    body = response.json()
+
+    assert body["accepted"] == 2
+    assert [item["index"] for item in body["rejected"]] == [1, 2]
+    assert body["record_ids"][1] is None and body["record_ids"][2] is None
+    assert all(item["error"].startswith("timestamp:") for item in body["rejected"])
+    stored = {record["id"]: record for record in main.data_manager.store.get_all_records()}
+    assert stored[body["record_ids"][0]]["timestamp"] == "2025-08-01T08:00:00"
+    assert datetime.fromisoformat(stored[body["record_ids"][3]]["timestamp"])
+
+
+def test_dashboard_etag(client):
+    post_call(client)
+    response = client.get("/dashboard", headers=HEADERS)
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+
+    cached = client.get("/dashboard", headers=dict(HEADERS, **{"If-None-Match": etag}))
+    assert cached.status_code == 304
+    assert cached.headers["ETag"] == etag and not cached.content
+    other_query = client.get("/dashboard", params={"limit": 1}, headers=dict(HEADERS, **{"If-None-Match": etag}))
+    assert other_query.status_code == 200 and other_query.headers["ETag"] != etag
+
+    post_call(client)
+    changed = client.get("/dashboard", headers=dict(HEADERS, **{"If-None-Match": etag}))
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+
+
+def test_chart_etag(client):
+    post_call(client)
+    name = main.ChartRenderer.CHART_NAMES[0]
+    response = client.get(f"/charts/{name}", headers=HEADERS)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    cached = client.get(f"/charts/{name}", headers=dict(HEADERS, **{"If-None-Match": etag}))
+    assert cached.status_code == 304 and cached.headers["ETag"] == etag
+    thumbnail = client.get(f"/charts/{name}", params={"variant": "thumbnail"},
+                           headers=dict(HEADERS, **{"If-None-Match": etag}))
+    assert thumbnail.status_code == 200 and thumbnail.headers["ETag"] != etag
+
+
+def metric_count(text, name, **labels):
+    """The value of name_count with exactly these labels, or 0 when the series is absent"""
+    series = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    prefix = f"{name}_count{{{series}}} "
+    return next((float(line[len(prefix):]) for line in text.splitlines() if line.startswith(prefix)), 0)
+
+
+def request_count(text, **labels):
+    return metric_count(text, "http_request_duration_seconds", **labels)
+
+
+def test_metrics_label_routes_by_template_and_time_stages(client):
+    before = client.get("/metrics", headers=HEADERS).text
+    post_call(client)
+    client.get("/charts/no-such-chart", headers=HEADERS)
+    client.get("/no-such-route")
+    text = client.get("/metrics", headers=HEADERS).text
+
+    assert text.count("# TYPE http_request_duration_seconds histogram") == 1
+    assert request_count(text, method="POST", route="/webhook", status="200") == \
+        request_count(before, method="POST", route="/webhook", status="200") + 1
+    assert request_count(text, method="GET", route="/charts/{chart_name}", status="404") >= 1
+    assert request_count(text, method="GET", route="unmatched", status="404") >= 1
+    assert "no-such-chart" not in text and "no-such-route" not in text
+
+    assert "# TYPE stage_duration_seconds histogram" in text
+    for stage in ("store_append", "ingest_group_commit"):
+        assert metric_count(text, "stage_duration_seconds", stage=stage) > \
+            metric_count(before, "stage_duration_seconds", stage=stage)
+    assert 'stage_duration_seconds_bucket{stage="store_append",le="+Inf"}' in text
+
+
+def cache_lookups(client, namespace):
+    """Response cache hits and misses counted so far for a namespace"""
+    text = client.get("/metrics", headers=HEADERS).text
+    counts = {}
+    for result in ("hit", "miss"):
+        prefix = f'response_cache_requests_total{{namespace="{namespace}",result="{result}"}} '
+        counts[result] = next((float(line[len(prefix):]) for line in text.splitlines() if line.startswith(prefix)), 0)
+    return counts
+
+
+def cached_get(client, namespace, path, **params):
+    """GET path and report whether the response cache answered it"""
+    before = cache_lookups(client, namespace)
+    response = client.get(path, params=params, headers=HEADERS)
+    assert response.status_code == 200
+    after = cache_lookups(client, namespace)
+    assert after["hit"] - before["hit"] + after["miss"] - before["miss"] == 1
+    return response.json(), after["hit"] > before["hit"]
+
+
+@pytest.mark.parametrize("path", ["/stats", "/dashboard"])
+def test_a_new_webhook_misses_the_cache(client, path):
+    namespace = path.strip("/")
+    post_call(client)
+    first, hit = cached_get(client, namespace, path)
+    again, hit_again = cached_get(client, namespace, path)
+    assert not hit and hit_again and again == first
+
+    post_call(client)
+    fresh, hit = cached_get(client, namespace, path)
+    assert not hit and fresh != first
+    if path == "/stats":
+        assert fresh["stats"]["total_records"] == first["stats"]["total_records"] + 1
+    assert cached_get(client, namespace, path)[1]
+
+
+def test_load_book_changes_miss_the_search_cache(client, tmp_path, monkeypatch):
+    path = str(tmp_path / "loads.json")
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"loads": LOADS[:2]}, f)
+    monkeypatch.setattr(main, "load_book", main.LoadBook(path))
+    assert client.post("/loads/reload", headers=HEADERS).json()["status"] == "success"
+
+    first, hit = cached_get(client, "search", "/search", equipment_type="Reefer")
+    assert not hit and load_ids(first) == ["2"]
+    assert cached_get(client, "search", "/search", equipment_type="Reefer") == (first, True)
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"loads": LOADS[:5]}, f)
+    assert client.post("/loads/reload", headers=HEADERS).json()["status"] == "success"
+    reloaded, hit = cached_get(client, "search", "/search", equipment_type="Reefer")
+    assert not hit and load_ids(reloaded) == ["2", "5"]
+
+    response = client.post("/loads/bulk", json={"loads": [dict(LOADS[5], equipment_type="Reefer")], "expire": ["2"]},
+                           headers=HEADERS)
+    assert response.json()["upserted"] == 1
+    applied, hit = cached_get(client, "search", "/search", equipment_type="Reefer")
+    assert not hit and load_ids(applied) == ["5", "6"]
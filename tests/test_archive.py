@@ -0,0 +1,129 @@
+import math
+import os
+from collections import Counter
+
+import main
+from conftest import call
+
+DAYS = ["2025-08-01", "2025-08-02", "2025-08-03", "2025-08-04"]
+
+
+def day_call(i: int):
+    """A call spread over DAYS with a mix of outcomes, sentiments and missing rates"""
+    return call(i, timestamp=f"{DAYS[i % len(DAYS)]}T{i % 24:02d}:15:00",
+                call_outcome="booked" if i % 3 else "declined",
+                sentiment=["positive", "neutral", "negative"][i % 3],
+                agreed_rate="" if i % 5 == 0 else str(1900 + i))
+
+
+def store_summary(store, start=None, end=None):
+    """The archive summary fields computed straight from every stored record"""
+    records = [r for r in store.get_all_records()
+               if (start is None or r["timestamp"][:10] >= start) and (end is None or r["timestamp"][:10] < end)]
+    rates = [r.get("agreed_rate_value") for r in records if r.get("agreed_rate_value") is not None]
+    return {
+        "total_records": len(records),
+        "successful_bookings": sum(r.get("booking_intent") == "yes" for r in records),
+        "call_outcome_counts": dict(Counter(r.get("call_outcome") for r in records)),
+        "sentiment_counts": dict(Counter(r.get("sentiment") for r in records)),
+        "average_agreed_rate": round(math.fsum(rates) / len(rates), 2) if rates else None
+    }
+
+
+def archive_summary(archive, start=None, end=None):
+    summary = archive.summary(start, end)
+    return {key: summary[key] for key in ("total_records", "successful_bookings", "call_outcome_counts",
+                                          "sentiment_counts", "average_agreed_rate")}
+
+
+def archive(tmp_path, store):
+    return main.RecordArchive(str(tmp_path / "archive"), source=store.describe())
+
+
+RANGES = [(None, None), ("2025-08-02", "2025-08-04"), ("2025-08-03", None), (None, "2025-08-02"),
+          ("2025-09-01", None)]
+
+
+def test_rolls_partition_records_by_day(tmp_path, store):
+    for i in range(40):
+        store.append(day_call(i))
+    records = archive(tmp_path, store)
+
+    assert records.roll(store.read_new_records) == 40
+    assert sorted(records.manifest["partitions"]) == DAYS
+    assert records.status()["archived_rows"] == 40
+    for date, segments in records.manifest["partitions"].items():
+        assert all(os.path.exists(os.path.join(records.root, date, s["file"])) for s in segments)
+    # A second roll with nothing new adds no segments
+    assert records.roll(store.read_new_records) == 0
+    assert records.status()["segments"] == len(DAYS)
+
+
+def test_scan_matches_the_store_across_rolls_compaction_and_reopen(tmp_path, store, monkeypatch):
+    monkeypatch.setattr(main.RecordArchive, "OBSOLETE_GRACE_SECONDS", 0.0)
+    records = archive(tmp_path, store)
+    for batch in range(3):
+        for i in range(batch * 30, batch * 30 + 30):
+            store.append(day_call(i))
+        records.refresh(store.read_new_records)
+        records.roll(store.read_new_records)
+    assert records.status()["segments"] == 3 * len(DAYS)
+    # Records stored after the last roll are only in the hot partition
+    for i in range(90, 100):
+        store.append(day_call(i))
+    records.refresh(store.read_new_records)
+    assert records.status()["hot_rows"] == 10
+    for start, end in RANGES:
+        assert archive_summary(records, start, end) == store_summary(store, start, end)
+
+    old_files = {(date, s["file"]) for date, segments in records.manifest["partitions"].items() for s in segments}
+    assert records.compact() == len(DAYS)
+    assert records.status()["segments"] == len(DAYS)
+    assert records.status()["archived_rows"] == 90
+    # The grace period is zero, so the next compaction deletes the replaced segments
+    records.compact()
+    assert not any(os.path.exists(os.path.join(records.root, date, name)) for date, name in old_files)
+
+    records.refresh(store.read_new_records)
+    for start, end in RANGES:
+        assert archive_summary(records, start, end) == store_summary(store, start, end)
+
+    reopened = archive(tmp_path, store)
+    reopened.refresh(store.read_new_records)
+    assert reopened.status()["archived_rows"] == 90
+    assert reopened.status()["hot_rows"] == 10
+    for start, end in RANGES:
+        assert archive_summary(reopened, start, end) == store_summary(store, start, end)
+
+
+def test_scan_reads_only_the_requested_columns_and_days(tmp_path, store):
+    for i in range(20):
+        store.append(day_call(i))
+    records = archive(tmp_path, store)
+    records.roll(store.read_new_records)
+
+    scanned = list(records.scan(["id", "booking_intent"], "2025-08-02", "2025-08-03"))
+
+    assert [date for date, _ in scanned] == ["2025-08-02"]
+    columns = scanned[0][1]
+    assert set(columns) == {"id", "booking_intent"}
+    expected = [r for r in store.get_all_records() if r["timestamp"].startswith("2025-08-02")]
+    assert list(columns["id"]) == [int(r["id"]) for r in expected]
+    assert columns["booking_intent"].counts() == Counter(r["booking_intent"] for r in expected)
+
+
+def test_an_archive_from_another_store_is_rebuilt(tmp_path, store):
+    for i in range(10):
+        store.append(day_call(i))
+    records = archive(tmp_path, store)
+    records.roll(store.read_new_records)
+
+    other = main.CSVStore(str(tmp_path / "other.csv"))
+    other.open()
+    for i in range(4):
+        other.append(day_call(i))
+    rebuilt = archive(tmp_path, other)
+    rebuilt.refresh(other.read_new_records)
+
+    assert rebuilt.status()["archived_rows"] == 0
+    assert archive_summary(rebuilt) == store_summary(other)
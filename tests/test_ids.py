@@ -0,0 +1,81 @@
+import csv
+import multiprocessing
+import os
+import threading
+
+import main
+
+
+def write_csv(path, ids, tail=""):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=main.RECORD_FIELDS)
+        writer.writeheader()
+        for record_id in ids:
+            writer.writerow({"id": record_id, "timestamp": "2025-08-01T10:00:00"})
+        f.write(tail)
+
+
+def test_ids_stay_monotonic_across_a_reopen(tmp_path):
+    path = str(tmp_path / "calls.csv")
+    ids = main.IdAllocator(path)
+    assert [ids.allocate() for _ in range(3)] == [1, 2, 3]
+    assert ids.allocate(5) == 4
+
+    reopened = main.IdAllocator(path)
+    assert reopened.allocate() == 9
+    assert ids.allocate() == 10
+
+
+def test_seeds_from_a_csv_without_a_sidecar(tmp_path):
+    path = str(tmp_path / "calls.csv")
+    write_csv(path, [1, 2, 7])
+    ids = main.IdAllocator(path)
+    assert not os.path.exists(ids.counter_file)
+
+    assert ids.allocate() == 8
+    with open(ids.counter_file, encoding='utf-8') as f:
+        assert f.read() == "8"
+
+
+def test_seeds_past_an_unparseable_last_row(tmp_path):
+    path = str(tmp_path / "calls.csv")
+    write_csv(path, [3, 12, 5], tail="not-an-id,broken\n")
+    assert main.IdAllocator(path).allocate() == 13
+
+
+def test_header_only_csv_starts_at_one(tmp_path):
+    path = str(tmp_path / "calls.csv")
+    write_csv(path, [])
+    assert main.IdAllocator(path).allocate() == 1
+
+
+def allocate_in_threads(path, threads, per_thread, results):
+    ids = main.IdAllocator(path)
+    allocated = []
+
+    def run():
+        for _ in range(per_thread):
+            allocated.append(ids.allocate())
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    results.put(allocated)
+
+
+def test_concurrent_processes_get_unique_ids(tmp_path):
+    path = str(tmp_path / "calls.csv")
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = [context.Process(target=allocate_in_threads, args=(path, 4, 50, results)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    allocated = [record_id for _ in processes for record_id in results.get(timeout=60)]
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    assert sorted(allocated) == list(range(1, 801))
+    assert main.IdAllocator(path).allocate() == 801
@@ -0,0 +1,256 @@
+import multiprocessing
+import os
+import threading
+
+import pytest
+
+import main
+from conftest import call
+
+
+class SlowStore:
+    """Wraps a store so the first group commit blocks until released, letting later submits queue up"""
+
+    def __init__(self, store):
+        self.store = store
+        self.release = threading.Event()
+        self.entered = threading.Event()
+        self.group_sizes = []
+
+    def append_many(self, records, keys, ttl):
+        self.group_sizes.append(len(records))
+        self.entered.set()
+        self.release.wait(10)
+        return self.store.append_many(records, keys, ttl)
+
+
+def writer(tmp_path, store, **kwargs):
+    return main.IngestWriter(store, main.IngestLog(str(tmp_path / "ingest_log")), **kwargs)
+
+
+def test_idempotency_key_sources():
+    header = main.idempotency_key({main.IDEMPOTENCY_HEADER: "abc"}, {"call_id": "c1"})
+    assert header == main.idempotency_key({main.IDEMPOTENCY_HEADER: "abc"}, {"call_id": "c2"})
+    assert main.idempotency_key({}, {"call_id": "c1"}) == main.idempotency_key({}, {"call_id": "c1"})
+    assert main.idempotency_key({}, {"call_id": "c1"}) != main.idempotency_key({}, {"call_id": "c2"})
+    assert main.idempotency_key({}, {"call_id": "c1"}) != header
+    assert main.idempotency_key({}, {"call_id": ""}) is None
+    assert main.idempotency_key({}, {"agreed_rate": "2100"}) is None
+
+
+def test_append_once_stores_a_key_once(sqlite_store, csv_store):
+    for store in (sqlite_store, csv_store):
+        first, created = store.append_once(call(1), "key-1", main.IDEMPOTENCY_TTL_SECONDS)
+        again, created_again = store.append_once(call(2), "key-1", main.IDEMPOTENCY_TTL_SECONDS)
+        assert created and not created_again
+        assert again["id"] == first["id"]
+        assert len(store.get_all_records()) == 1
+
+
+def test_writer_groups_queued_submits(tmp_path, sqlite_store):
+    slow = SlowStore(sqlite_store)
+    committed = []
+    ingest = writer(tmp_path, slow, on_commit=committed.extend)
+    first = ingest.submit([call(0)], [None])
+    assert slow.entered.wait(10)
+    futures = [ingest.submit([call(i)], [None]) for i in range(1, 6)]
+    slow.release.set()
+    results = [future.result(10) for future in [first] + futures]
+    ingest.close()
+
+    assert slow.group_sizes == [1, 5]
+    assert ingest.status()["groups"] == 2
+    assert [record["id"] for [(record, created)] in results] == [1, 2, 3, 4, 5, 6]
+    assert all(created for [(_, created)] in results)
+    assert [record["id"] for record in committed] == [1, 2, 3, 4, 5, 6]
+
+
+def test_writer_respects_max_records(tmp_path, sqlite_store):
+    slow = SlowStore(sqlite_store)
+    ingest = writer(tmp_path, slow, max_records=2)
+    first = ingest.submit([call(0)], [None])
+    assert slow.entered.wait(10)
+    futures = [ingest.submit([call(i)], [None]) for i in range(1, 6)]
+    slow.release.set()
+    for future in [first] + futures:
+        future.result(10)
+    ingest.close()
+    assert slow.group_sizes == [1, 2, 2, 1]
+
+
+def test_writer_deduplicates_keys_within_and_across_groups(tmp_path, sqlite_store):
+    committed = []
+    ingest = writer(tmp_path, sqlite_store, on_commit=committed.extend)
+    [(record, created)] = ingest.write([call(1)], ["delivery-1"])
+    [(again, created_again)] = ingest.write([call(2)], ["delivery-1"])
+    ingest.close()
+
+    assert created and not created_again
+    assert again["id"] == record["id"]
+    assert len(sqlite_store.get_all_records()) == 1
+    assert [r["id"] for r in committed] == [record["id"]]
+
+
+def test_unfinished_groups_are_replayed_once(tmp_path, sqlite_store):
+    directory = str(tmp_path / "ingest_log")
+    dead = main.IngestLog(directory)
+    done = dead.append([("key-1", call(1))])
+    dead.finish(done)
+    dead.append([("key-2", call(2)), ("key-3", call(3))])
+    # The worker dies: its lease goes away but the segment stays
+    dead._file.close()
+    dead._file = None
+
+    def commit(entries):
+        keys = [key for key, _ in entries]
+        sqlite_store.append_many([record for _, record in entries], keys, main.IDEMPOTENCY_TTL_SECONDS)
+
+    survivor = main.IngestLog(directory)
+    assert survivor.recover(commit) == 2
+    assert survivor.recover(commit) == 0
+    assert len(sqlite_store.get_all_records()) == 2
+
+
+def test_a_new_segment_is_not_lost_to_a_concurrent_recover(tmp_path, monkeypatch, sqlite_store):
+    directory = str(tmp_path / "ingest_log")
+    worker = main.IngestLog(directory)
+    sweeper = main.IngestLog(directory)
+
+    def commit(entries):
+        keys = [key for key, _ in entries]
+        sqlite_store.append_many([record for _, record in entries], keys, main.IDEMPOTENCY_TTL_SECONDS)
+
+    flock = main.fcntl.flock
+    swept = []
+
+    def recover_before_the_lease(f, operation):
+        # The worker has created its segment but not locked it yet: another worker's recover runs now
+        if not swept and f.name == worker.path and operation == main.fcntl.LOCK_EX:
+            swept.append(sweeper.recover(commit))
+        return flock(f, operation)
+
+    monkeypatch.setattr(main.fcntl, "flock", recover_before_the_lease)
+    worker.append([("key-1", call(1))])
+    monkeypatch.setattr(main.fcntl, "flock", flock)
+
+    assert swept == [0]
+    assert os.path.exists(worker.path)
+    assert os.fstat(worker._file.fileno()).st_ino == os.stat(worker.path).st_ino
+    # The worker dies before committing; its group must still be replayable
+    worker._file.close()
+    worker._file = None
+    assert main.IngestLog(directory).recover(commit) == 1
+    assert len(sqlite_store.get_all_records()) == 1
+
+
+def ingest_in_threads(store_type, path, directory, first, threads, per_thread, results):
+    """One worker: its own store, IngestLog and IngestWriter, with threads writing calls first, first + 1, ...
+
+    Odd calls carry a delivery key. Puts the (id, counter_offer) pairs the writer acknowledged on results.
+    """
+    store = store_type(path)
+    store.open()
+    ingest = main.IngestWriter(store, main.IngestLog(directory))
+    acknowledged = []
+
+    def run(start):
+        for i in range(start, start + per_thread):
+            [(record, created)] = ingest.write([call(i)], [f"call-{i}" if i % 2 else None])
+            assert created
+            acknowledged.append((int(record["id"]), record["counter_offer"]))
+
+    workers = [threading.Thread(target=run, args=(first + n * per_thread,)) for n in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    ingest.close()
+    results.put(acknowledged)
+
+
+def test_concurrent_workers_store_each_record_once_under_its_id(tmp_path, store):
+    directory = str(tmp_path / "ingest_log")
+    processes, threads, per_thread = 3, 8, 25
+    per_worker = threads * per_thread
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    children = [context.Process(target=ingest_in_threads,
+                                args=(type(store), store.path, directory, n * per_worker, threads, per_thread, results))
+                for n in range(1, processes + 1)]
+    for child in children:
+        child.start()
+    # This process is a worker too, writing alongside the children
+    ingest_in_threads(type(store), store.path, directory, 0, threads, per_thread, results)
+    acknowledged = [pair for _ in range(processes + 1) for pair in results.get(timeout=120)]
+    for child in children:
+        child.join(60)
+        assert child.exitcode == 0
+
+    total = (processes + 1) * per_worker
+    ids = [record_id for record_id, _ in acknowledged]
+    assert len(ids) == len(set(ids)) == total
+    stored = {int(record["id"]): record["counter_offer"] for record in store.get_all_records()}
+    assert stored == dict(acknowledged)
+    assert sorted(stored.values()) == sorted(str(1800 + i) for i in range(total))
+    assert not os.listdir(directory)
+
+
+class CrashingStore:
+    """Kills the process on its crash_at-th group, before or after the group reaches the store"""
+
+    def __init__(self, store, crash_at, after_store):
+        self.store = store
+        self.crash_at = crash_at
+        self.after_store = after_store
+        self.calls = 0
+
+    def append_many(self, records, keys, ttl):
+        self.calls += 1
+        if self.calls == self.crash_at and not self.after_store:
+            os._exit(1)
+        results = self.store.append_many(records, keys, ttl)
+        if self.calls == self.crash_at:
+            os._exit(1)
+        return results
+
+
+def ingest_then_crash(store_type, path, directory, groups, group_size, after_store):
+    store = store_type(path)
+    store.open()
+    ingest = main.IngestWriter(CrashingStore(store, groups, after_store), main.IngestLog(directory))
+    for group in range(groups):
+        first = group * group_size
+        ingest.write([call(i) for i in range(first, first + group_size)],
+                     [f"call-{i}" if i % 2 else None for i in range(first, first + group_size)])
+
+
+@pytest.mark.parametrize("after_store", [False, True], ids=["before-store", "after-store"])
+def test_recover_after_an_interrupted_commit_neither_drops_nor_duplicates(tmp_path, store, after_store):
+    directory = str(tmp_path / "ingest_log")
+    groups, group_size = 3, 5
+    context = multiprocessing.get_context("fork")
+    child = context.Process(target=ingest_then_crash,
+                            args=(type(store), store.path, directory, groups, group_size, after_store))
+    child.start()
+    child.join(60)
+    assert child.exitcode == 1
+    assert len(store.get_all_records()) == (groups if after_store else groups - 1) * group_size
+
+    def commit(entries):
+        keys = [key for key, _ in entries]
+        store.append_many([record for _, record in entries], keys, main.IDEMPOTENCY_TTL_SECONDS)
+
+    # Two survivors sweep at once; only one of them may replay the dead worker's segment
+    replayed = []
+    survivors = [threading.Thread(target=lambda: replayed.append(main.IngestLog(directory).recover(commit)))
+                 for _ in range(2)]
+    for survivor in survivors:
+        survivor.start()
+    for survivor in survivors:
+        survivor.join()
+
+    assert sorted(replayed) == [0, group_size]
+    offers = [record["counter_offer"] for record in store.get_all_records()]
+    assert sorted(offers) == sorted(str(1800 + i) for i in range(groups * group_size))
+    assert main.IngestLog(directory).recover(commit) == 0
+    assert not os.listdir(directory)
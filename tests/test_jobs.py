@@ -0,0 +1,33 @@
+import asyncio
+
+import main
+
+
+def test_failed_job_waits_without_holding_a_worker(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "JOB_RETRY_BASE_DELAY", 0.2)
+    calls = []
+
+    def flaky():
+        calls.append("flaky")
+        if calls.count("flaky") == 1:
+            raise RuntimeError("sheets unavailable")
+
+    async def scenario():
+        queue = main.JobQueue(spool_dir=str(tmp_path / "spool"), workers=1)
+        queue.register("flaky", flaky)
+        queue.register("quick", lambda: calls.append("quick"))
+        await queue.start()
+        queue.enqueue("flaky")
+        await asyncio.sleep(0.05)
+        queue.enqueue("quick")
+        await asyncio.sleep(0.05)
+        waiting = queue.status()
+        await asyncio.sleep(0.3)
+        await queue.stop()
+        return waiting, queue.status()
+
+    waiting, done = asyncio.run(scenario())
+    assert calls == ["flaky", "quick", "flaky"]
+    assert waiting["awaiting_retry"] == 1 and waiting["pending"] == 1
+    assert done["processed"] == 2 and done["retried"] == 1 and done["pending"] == 0
+    assert not list((tmp_path / "spool").iterdir())
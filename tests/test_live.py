@@ -0,0 +1,124 @@
+import asyncio
+import signal
+from datetime import datetime, timezone
+
+import main
+
+NOW = datetime(2025, 8, 1, 12, 0, tzinfo=timezone.utc).timestamp()
+
+
+class Clock:
+    def __init__(self, now: float = NOW):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def stored_at(seconds: float, **fields):
+    record = {"timestamp": datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=None).isoformat(),
+              "booking_intent": "yes", "agreed_rate_value": 2000.0, "sentiment": "positive"}
+    record.update(fields)
+    return record
+
+
+def test_windows_count_recent_records():
+    windows = main.RollingWindows(clock=Clock())
+    windows.add([stored_at(NOW - 30), stored_at(NOW - 600, booking_intent="no", agreed_rate_value=1000.0,
+                                                 sentiment="angry")])
+    snapshot = windows.snapshot()
+
+    assert snapshot["5m"]["calls"] == 1
+    assert snapshot["1h"] == {
+        "calls": 2, "bookings": 1, "booking_rate": 0.5, "average_agreed_rate": 1500.0,
+        "sentiment": {"positive": 1, "neutral": 0, "negative": 0, "other": 1}
+    }
+    assert snapshot["24h"]["calls"] == 2
+
+
+def test_windows_slide_as_time_passes():
+    clock = Clock()
+    windows = main.RollingWindows(clock=clock)
+    windows.add([stored_at(NOW)])
+    clock.now += 301
+    assert windows.snapshot()["5m"]["calls"] == 0
+    assert windows.snapshot()["1h"]["calls"] == 1
+    clock.now += 3600
+    assert windows.snapshot()["1h"]["calls"] == 0
+    windows.add([stored_at(clock.now)])
+    assert windows.snapshot()["5m"]["calls"] == 1
+    assert windows.snapshot()["24h"]["calls"] == 2
+    clock.now += 2 * 86400
+    assert windows.snapshot()["24h"] == {
+        "calls": 0, "bookings": 0, "booking_rate": 0, "average_agreed_rate": None,
+        "sentiment": {"positive": 0, "neutral": 0, "negative": 0, "other": 0}
+    }
+
+
+def test_windows_skip_records_older_than_a_day():
+    windows = main.RollingWindows(clock=Clock())
+    windows.add([stored_at(NOW - 2 * 86400)])
+    assert windows.snapshot()["24h"]["calls"] == 0
+
+
+def test_reconnect_replays_missed_records():
+    async def run():
+        feed = main.LiveFeed(windows=main.RollingWindows(clock=Clock()), stats_interval=0.05,
+                             stream_seconds=0.2, replay=3)
+        await feed.start()
+        feed.publish([stored_at(NOW, id=i) for i in range(1, 6)])
+        await asyncio.sleep(0.01)
+        frames = []
+        async for frame in feed.stream(last_event_id=3):
+            frames.append(frame)
+            if len(frames) == 2:
+                feed.publish([stored_at(NOW, id=6)])
+        await feed.stop()
+        return b"".join(frames).decode(), feed.status()
+
+    text, status = asyncio.run(run())
+    assert text.startswith(f"retry: {main.LIVE_RETRY_MS}\nevent: stats\n")
+    assert [line for line in text.split("\n") if line.startswith("id: ")] == ["id: 4", "id: 5", "id: 6"]
+    assert status["streams_expired"] == 1
+    assert status["subscribers"] == 0
+
+
+def test_close_soon_ends_open_streams_and_refuses_new_ones():
+    async def run():
+        feed = main.LiveFeed(windows=main.RollingWindows(clock=Clock()), stream_seconds=60)
+        await feed.start()
+        frames = []
+
+        async def consume():
+            async for frame in feed.stream():
+                frames.append(frame)
+
+        streams = [asyncio.create_task(consume()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        assert feed.status()["subscribers"] == 3
+        # As from a signal handler, off the event loop
+        await asyncio.to_thread(feed.close_soon)
+        await asyncio.wait_for(asyncio.gather(*streams), 5)
+        late = [frame async for frame in feed.stream()]
+        await feed.stop()
+        return frames, late, feed.status()
+
+    frames, late, status = asyncio.run(run())
+    assert len(frames) == 3 and late == []
+    assert status["subscribers"] == 0
+
+
+def test_shutdown_signals_close_first_then_chain():
+    calls = []
+    original = signal.getsignal(signal.SIGTERM)
+    signal.signal(signal.SIGTERM, lambda signum, frame: calls.append(("server", signum)))
+    try:
+        previous = main.chain_shutdown_signals(lambda: calls.append("close"))
+        signal.raise_signal(signal.SIGTERM)
+        main.restore_signal_handlers(previous)
+        signal.raise_signal(signal.SIGTERM)
+    finally:
+        signal.signal(signal.SIGTERM, original)
+
+    assert calls == ["close", ("server", signal.SIGTERM), ("server", signal.SIGTERM)]
+    assert signal.getsignal(signal.SIGINT) is previous[signal.SIGINT]
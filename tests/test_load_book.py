@@ -0,0 +1,113 @@
+import json
+import os
+
+import pytest
+
+import main
+from conftest import LOADS, load_ids
+
+SOURCES = ["loads.json", "loads.csv", "loads.db"]
+
+
+def write_source(path, rows):
+    """Write rows through the source's own writer, as LoadBook.apply would"""
+    source = main.create_load_source(path)
+    source.apply({row["load_id"]: row for row in rows}, rows, [])
+
+
+@pytest.mark.parametrize("name", SOURCES)
+def test_reload_reads_every_source_format(tmp_path, name):
+    path = str(tmp_path / name)
+    write_source(path, LOADS)
+    book = main.LoadBook(path)
+    assert len(book.index) == 0
+
+    assert book.reload()
+    assert len(book.index) == len(LOADS) and not book.last_rejected
+    # CSV and SQLite hand back text; validation restores the Load field types
+    assert book.book["4"]["loadboard_rate"] == 2100 and book.book["4"]["miles"] == 810
+    assert load_ids(book.index.search(origin_state="IL", sort_by="loadboard_rate")) == ["3", "1"]
+    assert not book.source_changed()
+
+
+def test_invalid_rows_are_rejected_on_reload(tmp_path):
+    path = str(tmp_path / "loads.json")
+    rows = LOADS[:2] + [dict(LOADS[2], loadboard_rate="call us"), {"load_id": "9"}]
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"loads": rows}, f)
+    book = main.LoadBook(path)
+
+    assert book.reload()
+    assert sorted(book.book) == ["1", "2"]
+    assert [(reject["index"], reject["load_id"]) for reject in book.last_rejected] == [(2, "3"), (3, "9")]
+    assert book.status()["rejected_on_last_reload"] == 2
+
+
+@pytest.mark.parametrize("name", SOURCES)
+def test_apply_persists_upserts_and_expiries(tmp_path, name):
+    path = str(tmp_path / name)
+    write_source(path, LOADS)
+    book = main.LoadBook(path)
+    book.reload()
+
+    result = book.apply([dict(LOADS[0], loadboard_rate=999), dict(LOADS[0], load_id="8")], expire=["5", "404"])
+    assert result == {"upserted": 2, "expired": 1, "rejected": [], "total_loads": len(LOADS)}
+
+    reread = main.LoadBook(path)
+    assert reread.reload()
+    assert sorted(reread.book) == sorted(["1", "2", "3", "4", "6", "7", "8"])
+    assert reread.book["1"]["loadboard_rate"] == 999
+
+
+def test_apply_swaps_in_a_new_index_atomically(tmp_path):
+    book = main.LoadBook(str(tmp_path / "loads.json"), initial_loads=LOADS)
+    before = book.index
+
+    result = book.apply([dict(LOADS[0], load_id="8", equipment_type="Reefer")], expire=["2"])
+    assert result["rejected"] == []
+    # A search that already holds the old index keeps seeing the old loads
+    assert load_ids(before.search(equipment_type="reefer")) == ["2", "5"]
+    assert load_ids(book.index.search(equipment_type="reefer")) == ["5", "8"]
+    assert book.index.version != before.version
+
+
+def test_apply_rejects_invalid_loads_without_swapping(tmp_path):
+    book = main.LoadBook(str(tmp_path / "loads.json"), initial_loads=LOADS)
+    before = book.index
+
+    result = book.apply([{"load_id": "9", "origin": "Chicago, IL"}])
+    assert result["upserted"] == 0 and [reject["load_id"] for reject in result["rejected"]] == ["9"]
+    assert book.index is before
+    assert not os.path.exists(book.source_path)
+
+
+def test_reload_keeps_the_book_when_the_source_is_missing_or_broken(tmp_path):
+    path = str(tmp_path / "loads.json")
+    book = main.LoadBook(path, initial_loads=LOADS)
+    before = book.index
+    assert not book.reload()
+
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[{not json")
+    assert book.source_changed()
+    assert not book.reload()
+    assert book.index is before and len(book.book) == len(LOADS)
+
+
+def test_external_edits_are_noticed(tmp_path):
+    path = str(tmp_path / "loads.json")
+    write_source(path, LOADS)
+    book = main.LoadBook(path)
+    book.reload()
+    assert not book.source_changed()
+
+    write_source(path, LOADS[:3])
+    mtime = os.path.getmtime(path) + 10
+    os.utime(path, (mtime, mtime))
+    assert book.source_changed()
+    assert book.reload() and len(book.index) == 3
+
+
+def test_unsupported_source_extension():
+    with pytest.raises(ValueError):
+        main.create_load_source("loads.xlsx")
@@ -0,0 +1,61 @@
+import math
+
+import pytest
+
+import main
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2100", (2100.0, "ok")),
+    ("$2,100.50", (2100.5, "ok")),
+    ("2.1k USD", (2100.0, "ok")),
+    (2100, (2100.0, "ok")),
+    (" 1,950 dollars ", (1950.0, "ok")),
+    ("about 2,100 per load", (2100.0, "partial")),
+    ("", (None, "empty")),
+    ("   ", (None, "empty")),
+    (None, (None, "empty")),
+    ("no rate given", (None, "invalid")),
+    (True, (None, "invalid")),
+])
+def test_parse_number(value, expected):
+    assert main.parse_number(value) == expected
+
+
+@pytest.mark.parametrize("value", [
+    float("nan"), float("inf"), float("-inf"), 10 ** 400,
+    "nan", "inf", "-inf", "Infinity", "1" * 400, "1" + "0" * 306 + "k"
+])
+def test_parse_number_rejects_non_finite(value):
+    assert main.parse_number(value) == (None, "invalid")
+
+
+def test_parse_number_results_are_finite():
+    for value in ("9" * 308, "1" + "0" * 305 + "k", "about " + "9" * 300 + " per load"):
+        number, status = main.parse_number(value)
+        assert status in ("ok", "partial") and math.isfinite(number)
+
+
+def test_numeric_fields_take_the_worst_status():
+    columns = main.parse_numeric_fields({"counter_offer": "nan", "agreed_rate": "2100", "negotiation_attempts": "2"})
+    assert columns == {"counter_offer_value": None, "agreed_rate_value": 2100.0,
+                       "negotiation_attempts_value": 2, "numeric_status": "invalid"}
+    columns = main.parse_numeric_fields({"agreed_rate": "around 2100", "negotiation_attempts": "3"})
+    assert columns["agreed_rate_value"] == 2100.0 and columns["numeric_status"] == "partial"
+    assert main.parse_numeric_fields({})["numeric_status"] == "empty"
+
+
+def test_fractional_attempts_are_truncated_and_partial():
+    columns = main.parse_numeric_fields({"negotiation_attempts": "2.5"})
+    assert columns["negotiation_attempts_value"] == 2
+    assert isinstance(columns["negotiation_attempts_value"], int)
+    assert columns["numeric_status"] == "partial"
+
+
+def test_typed_columns_survive_a_text_round_trip():
+    record = {"agreed_rate": "2100", "agreed_rate_value": "2100.0", "counter_offer_value": "",
+              "negotiation_attempts_value": "2", "numeric_status": "ok"}
+    typed = main.typed_numeric_fields(record)
+    assert typed["agreed_rate_value"] == 2100.0
+    assert typed["counter_offer_value"] is None
+    assert typed["negotiation_attempts_value"] == 2
@@ -0,0 +1,103 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from conftest import LOADS, load_ids
+
+
+@pytest.fixture(scope="module")
+def index():
+    return main.LoadIndex(LOADS)
+
+
+def test_date_only_pickup_to_includes_the_whole_day(index):
+    assert load_ids(index.search(pickup_from="2025-08-05", pickup_to="2025-08-05")) == ["2", "3", "4"]
+    assert load_ids(index.search(pickup_to="2025-08-05")) == ["1", "2", "3", "4"]
+    # With a time the bound is exact
+    assert load_ids(index.search(pickup_from="2025-08-05", pickup_to="2025-08-05T09:00")) == ["2", "3"]
+    # Also when the range is checked per candidate rather than through the sorted index
+    assert load_ids(index.search(equipment_type="reefer", pickup_to="2025-08-05")) == ["2"]
+
+
+def test_substring_filters_match_either_case(index):
+    assert load_ids(index.search(origin="CHIC")) == ["1"]
+    assert load_ids(index.search(destination=", tx")) == ["1", "2"]
+    assert load_ids(index.search(origin="il", destination="minn")) == ["3"]
+    assert index.search(origin="atlantis") == []
+
+
+def test_exact_filters(index):
+    assert load_ids(index.search(load_id="5")) == ["5"]
+    assert index.search(load_id="99") == []
+    assert load_ids(index.search(equipment_type="reefer")) == ["2", "5"]
+    assert load_ids(index.search(origin_state="IL")) == ["1", "3"]
+    assert load_ids(index.search(origin_city="dallas", destination_city="Chicago")) == ["6"]
+    assert load_ids(index.search(equipment_type="Flatbed", destination_state="wa")) == ["7"]
+
+
+def test_range_filters_are_inclusive(index):
+    assert load_ids(index.search(min_rate=1500, max_rate=2100)) == ["2", "4", "5"]
+    assert load_ids(index.search(max_miles=810)) == ["3", "4"]
+    assert load_ids(index.search(min_miles=950, max_miles=1080, min_rate=1300)) == ["5", "6"]
+    assert load_ids(index.search(equipment_type="Dry Van", min_rate=1250)) == ["4", "6"]
+
+
+def test_sorting_and_paging(index):
+    assert load_ids(index.search(sort_by="loadboard_rate")) == ["3", "1", "6", "5", "2", "4", "7"]
+    assert load_ids(index.search(sort_by="miles", descending=True, limit=2)) == ["7", "2"]
+    assert load_ids(index.search(equipment_type="reefer", sort_by="loadboard_rate", descending=True)) == ["2", "5"]
+    assert load_ids(index.search(limit=2, offset=3)) == ["4", "5"]
+    assert load_ids(index.search(sort_by="pickup_datetime", offset=6)) == ["7"]
+
+
+CHICAGO = main.gazetteer.geocode("Chicago, IL")
+
+
+def test_geocoding_accepts_places_cities_and_zips():
+    assert main.gazetteer.geocode("chicago, il") == CHICAGO
+    assert main.gazetteer.geocode("Chicago") == CHICAGO
+    assert main.gazetteer.geocode("60601") == CHICAGO
+    assert main.gazetteer.geocode("Chicago, TX") is None
+    assert main.gazetteer.geocode("Atlantis") is None
+
+
+def test_pickup_radius_ranks_by_deadhead(index):
+    nearby = index.search(pickup_point=CHICAGO, pickup_radius=100)
+    assert [(load["load_id"], load["deadhead_miles"]) for load in nearby] == [
+        ("1", 0.0), ("2", 24.5), ("3", 33.7), ("4", 81.4)
+    ]
+    assert load_ids(index.search(pickup_point=CHICAGO, pickup_radius=30)) == ["1", "2"]
+    assert load_ids(index.search(pickup_point=CHICAGO, pickup_radius=100, equipment_type="dry van", offset=1)) == ["4"]
+    # An explicit sort order replaces the deadhead ranking
+    assert load_ids(index.search(pickup_point=CHICAGO, pickup_radius=100, sort_by="loadboard_rate")) == [
+        "3", "1", "2", "4"
+    ]
+
+
+def test_drop_radius_matches_nearby_destinations(index):
+    fort_worth = main.gazetteer.geocode("Fort Worth, TX")
+    assert load_ids(index.search(drop_point=fort_worth, drop_radius=50)) == ["1"]
+    assert load_ids(index.search(drop_point=fort_worth, drop_radius=10)) == []
+    assert load_ids(index.search(pickup_point=CHICAGO, pickup_radius=100, drop_point=fort_worth, drop_radius=300)) == [
+        "1", "2"
+    ]
+
+
+def test_heading_keeps_lanes_within_45_degrees(index):
+    assert load_ids(index.search(heading="north")) == ["6"]
+    assert load_ids(index.search(heading="south")) == ["1", "2", "4", "5"]
+    assert load_ids(index.search(heading="west")) == ["3", "7"]
+    assert index.search(heading="east") == []
+    assert [(load["load_id"], load["deadhead_miles"])
+            for load in index.search(pickup_point=CHICAGO, pickup_radius=100, heading="south", limit=2)] == [
+        ("1", 0.0), ("2", 24.5)
+    ]
+
+
+def test_unknown_location_is_a_bad_request():
+    with TestClient(main.app) as client:
+        headers = {"X-API-Key": main.API_KEY}
+        response = client.get("/search", params={"pickup_near": "Atlantis"}, headers=headers)
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Unknown location: Atlantis"
+        assert client.get("/search", params={"drop_near": "00000"}, headers=headers).status_code == 400
@@ -0,0 +1,111 @@
+import time
+
+import pytest
+
+import main
+from conftest import call
+from fake_gspread import FakeClient
+
+
+class SheetsManager:
+    """The parts of DataManager that SheetsWriter uses, over a fake client and a test store"""
+
+    csv_fields = main.RECORD_FIELDS
+
+    def __init__(self, client, store):
+        self.store = store
+        self.worksheet = client.open_by_key("sheet").add_worksheet(main.SheetsWriter.WORKSHEET_TITLE)
+
+    def get_worksheet(self, title, headers=None, **kwargs):
+        return self.worksheet
+
+
+@pytest.fixture
+def client():
+    return FakeClient()
+
+
+def sheets_writer(tmp_path, client, store, **kwargs):
+    return main.SheetsWriter(SheetsManager(client, store), state_file=str(tmp_path / "sheets_sync_state.json"),
+                             **kwargs)
+
+
+def sheet_ids(writer):
+    return [int(row[0]) for row in writer.manager.worksheet.rows]
+
+
+def test_size_threshold_flushes_in_one_call(tmp_path, client, sqlite_store):
+    writer = sheets_writer(tmp_path, client, sqlite_store, batch_size=3)
+    records = [sqlite_store.append(call(i)) for i in range(3)]
+    assert not writer.add(records[0]) and not writer.add(records[1])
+    assert writer.add(records[2])
+
+    assert writer.flush()
+    assert client.calls["append_rows"] == 1
+    assert sheet_ids(writer) == [1, 2, 3]
+    assert writer.synced_id == 3 and not writer.buffer
+
+
+def test_time_threshold_flushes_in_one_call(tmp_path, client, sqlite_store):
+    writer = sheets_writer(tmp_path, client, sqlite_store, batch_size=100, flush_interval=0.05)
+    writer.add_many([sqlite_store.append(call(i)) for i in range(2)])
+    assert not writer.due()
+    time.sleep(0.06)
+    assert writer.due()
+
+    assert writer.flush()
+    assert client.calls["append_rows"] == 1
+    assert sheet_ids(writer) == [1, 2]
+
+
+def test_rate_limits_and_server_errors_are_retried(tmp_path, client, sqlite_store, monkeypatch):
+    monkeypatch.setattr(main, "SHEETS_RETRY_BASE_DELAY", 0.001)
+    writer = sheets_writer(tmp_path, client, sqlite_store)
+    writer.add_many([sqlite_store.append(call(i)) for i in range(2)])
+    client.fail_next = [429, 503]
+
+    assert writer.flush()
+    assert client.calls["append_rows"] == 3
+    assert sheet_ids(writer) == [1, 2]
+
+
+def test_a_client_error_keeps_the_batch_for_later(tmp_path, client, sqlite_store, monkeypatch):
+    monkeypatch.setattr(main, "SHEETS_RETRY_BASE_DELAY", 0.001)
+    writer = sheets_writer(tmp_path, client, sqlite_store)
+    writer.add_many([sqlite_store.append(call(i)) for i in range(2)])
+    client.fail_next = [400]
+
+    assert not writer.flush()
+    assert client.calls["append_rows"] == 1
+    assert [int(r["id"]) for r in writer.buffer] == [1, 2]
+    assert writer.synced_id == 0 and writer.retry_at > time.time()
+
+
+def test_restart_resyncs_only_rows_after_the_high_water_mark(tmp_path, client, sqlite_store):
+    writer = sheets_writer(tmp_path, client, sqlite_store)
+    writer.add_many([sqlite_store.append(call(i)) for i in range(5)])
+    assert writer.flush()
+    # Stored, buffered, then lost with the process before the next flush
+    writer.add_many([sqlite_store.append(call(i)) for i in range(5, 8)])
+
+    restarted = main.SheetsWriter(writer.manager, state_file=writer.state_file)
+    assert restarted.synced_id == 5
+    restarted.resync()
+    assert [int(r["id"]) for r in restarted.buffer] == [6, 7, 8]
+    assert restarted.flush()
+    assert sheet_ids(restarted) == list(range(1, 9))
+
+
+def test_overflowed_records_are_resynced_in_id_order(tmp_path, client, sqlite_store, monkeypatch):
+    monkeypatch.setattr(main, "SHEETS_MAX_BUFFER", 4)
+    writer = sheets_writer(tmp_path, client, sqlite_store)
+    assert writer.add_many([sqlite_store.append(call(i)) for i in range(10)])
+    assert len(writer.buffer) == 4 and writer.overflowed
+
+    flushes = 0
+    while writer.buffer:
+        assert writer.flush()
+        flushes += 1
+    assert flushes == 3 and not writer.overflowed
+    assert sheet_ids(writer) == list(range(1, 11))
+    assert writer.synced_id == 10